@@ -3,10 +3,8 @@ Main StudyMate application with multi-page navigation
 """
 import streamlit as st
 from streamlit_option_menu import option_menu
-from pages.main_app import main_app
-from pages.about import about_page
-from pages.team import team_page
 from config.settings import UI_CONFIG
+from utils.warmup import start_warmup
 
 # Page configuration
 st.set_page_config(
@@ -175,12 +173,16 @@ def main():
             }
         )
     
-    # Page routing
+    # Page routing; pages are imported on demand so the About and Team
+    # pages never load the ML stack
     if selected == "🏠 Home":
+        from pages.main_app import main_app
         main_app()
     elif selected == "📖 About":
+        from pages.about import about_page
         about_page()
     elif selected == "👥 Team":
+        from pages.team import team_page
         team_page()
     
     # Footer
@@ -190,6 +192,9 @@ def main():
         <p>Empowering students worldwide with intelligent document analysis</p>
     </div>
     """, unsafe_allow_html=True)
+    
+    # The first paint is done; load models before the user needs them
+    start_warmup()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,6 @@
+"""
+Performance benchmarks for StudyMate
+
+Run a benchmark from the repository root, e.g.
+``python -m benchmarks.bench_index_load --vectors 200000``.
+"""
@@ -0,0 +1,103 @@
+"""
+Memory and time of loading an upload: separate parses vs one shared document
+
+``separate`` reproduces the old upload path: the processor and the reader
+each copy the bytes and open their own PyMuPDF document, and the reader
+extracts page text again whenever a page is shown. ``shared`` loads one
+LoadedDocument used by both. Each run happens in a fresh interpreter.
+
+    python -m benchmarks.bench_document_memory --pages 100 400 1000
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.common import MemorySampler, current_rss_mb, save_results
+from benchmarks.synthetic import make_pdf
+
+def separate(data: bytes):
+    import fitz  # PyMuPDF
+
+    # DocumentProcessor.extract_text_from_pdf
+    upload = io.BytesIO(data)
+    processor_doc = fitz.open(stream=upload.read(), filetype="pdf")
+    texts = [page.get_text("text") for page in processor_doc]
+
+    # PDFReader.load_pdf after uploaded_file.seek(0)
+    upload.seek(0)
+    reader_doc = fitz.open(stream=upload.read(), filetype="pdf")
+    return (processor_doc, reader_doc, texts), lambda page: reader_doc[page].get_text("text")
+
+def shared(data: bytes):
+    from utils.document_processor import DocumentProcessor
+    from utils.loaded_document import LoadedDocument
+    from utils.pdf_reader import PDFReader
+
+    document = LoadedDocument(data, "upload.pdf")
+    texts = DocumentProcessor().extract_pages_from_pdf(document, progress_callback=lambda _: None)
+    reader = PDFReader()
+    reader.load_pdf(document)
+    return (document, reader, texts), reader.get_page_text
+
+def run_worker(mode: str, path: str):
+    # Import everything up front so only the document itself is measured
+    import fitz  # noqa: F401
+    import utils.document_processor, utils.loaded_document, utils.pdf_reader  # noqa: F401
+    baseline = current_rss_mb()
+    with open(path, "rb") as f:
+        data = f.read()
+
+    with MemorySampler() as memory:
+        start = time.perf_counter()
+        handles, get_page_text = {"separate": separate, "shared": shared}[mode](data)
+        load_time = time.perf_counter() - start
+
+    # Flip through every page as a student reading the document would
+    pages = len(handles[2])
+    start = time.perf_counter()
+    for page in range(pages):
+        get_page_text(page)
+    page_text_time = time.perf_counter() - start
+
+    print(json.dumps({
+        "load_s": load_time,
+        "page_text_ms_per_page": 1000 * page_text_time / max(pages, 1),
+        "peak_growth_mb": memory.peak_mb - baseline,
+        "resident_growth_mb": current_rss_mb() - baseline
+    }), flush=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 400, 1000])
+    parser.add_argument("--worker", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(*args.worker)
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            path = os.path.join(tmp, f"{pages}.pdf")
+            with open(path, "wb") as f:
+                f.write(make_pdf(pages, seed=pages))
+
+            results[pages] = {"file_mb": os.path.getsize(path) / 2**20}
+            for mode in ("separate", "shared"):
+                command = [sys.executable, "-m", "benchmarks.bench_document_memory", "--worker", mode, path]
+                output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+                report = json.loads(output.strip().splitlines()[-1])
+                results[pages][mode] = report
+                print(f"{pages:>5} pages {mode:>8}: load {report['load_s'] * 1000:8.1f} ms | "
+                      f"peak +{report['peak_growth_mb']:7.1f} MiB | resident +{report['resident_growth_mb']:7.1f} MiB | "
+                      f"page text {report['page_text_ms_per_page']:6.3f} ms/page")
+
+    print(f"Results written to {save_results('document_memory', results)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Ingestion encode throughput (chunks/sec) per encoder configuration
+
+Encodes the chunks of a synthetic PDF with every combination of batch
+size, torch intra-op threads and multi-process pool size, plus the
+autotuned batch size.
+
+    python -m benchmarks.bench_encode --pages 100 --batch-sizes 16 32 64 128 --threads 1 4 --processes 0 4
+"""
+import argparse
+import io
+import os
+import time
+from benchmarks.common import save_results
+from benchmarks.synthetic import make_pdf
+from config.settings import MODEL_PARAMS
+from utils.document_processor import DocumentProcessor
+from utils.encoder import EncodeEngine
+from utils.search_engine import get_embedder
+
+def load_chunks(pages: int):
+    processor = DocumentProcessor()
+    page_texts = processor.extract_pages_from_pdf(io.BytesIO(make_pdf(pages=pages)))
+    chunks, _ = processor.chunk_pages(page_texts, MODEL_PARAMS["chunk_size"], MODEL_PARAMS["chunk_overlap"])
+    return chunks
+
+def run(embedder, chunks, threads: int, config: dict) -> dict:
+    engine = EncodeEngine(dict(config, torch_threads=threads))
+    try:
+        start = time.perf_counter()
+        engine.encode(embedder, chunks)
+        elapsed = time.perf_counter() - start
+    finally:
+        engine.close()
+
+    return {
+        "threads": threads,
+        "batch_size": engine.last_run["batch_size"],
+        "processes": engine.last_run["processes"],
+        "autotune": engine.last_run["autotune"],
+        "seconds": elapsed,
+        "chunks_per_sec": len(chunks) / elapsed
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 32, 64, 128])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--processes", type=int, nargs="+", default=[0])
+    args = parser.parse_args()
+
+    chunks = load_chunks(args.pages)
+    embedder = get_embedder()
+
+    # Warm up so the first configuration doesn't pay for lazy initialisation
+    embedder.encode(chunks[:32])
+
+    runs = []
+    for processes in args.processes:
+        for threads in args.threads:
+            configs = [{"batch_size": size} for size in args.batch_sizes]
+            configs.append({"batch_size": "auto", "batch_candidates": args.batch_sizes})
+            for config in configs:
+                config.update(pool_processes=processes, pool_min_chunks=0)
+                result = run(embedder, chunks, threads, config)
+                runs.append(result)
+                print(f"processes={result['processes']:>2} threads={threads:>3} "
+                      f"batch={config['batch_size']!s:>4} ({result['batch_size']:>3}): "
+                      f"{result['chunks_per_sec']:8.1f} chunks/s")
+
+    path = save_results("encode", {"chunks": len(chunks), "cpu_count": os.cpu_count(), "runs": runs})
+    print(f"Results written to {path}")
+
+if __name__ == "__main__":
+    main()
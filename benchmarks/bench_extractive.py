@@ -0,0 +1,83 @@
+"""
+Latency and accuracy of extractive answers, and how Auto mode answers
+
+Uses the fact corpus of bench_rerank: each question has exactly one
+sentence that answers it. Extractive answers are checked for that
+sentence; Auto mode runs against a stub LLM with a fixed latency, with
+the opt-in direct-answer threshold if ``--direct-confidence`` is given.
+
+    python -m benchmarks.bench_extractive --entities 100 --llm-latency 2.0 --direct-confidence 0.75
+"""
+import argparse
+import random
+import time
+from collections import Counter
+from benchmarks.bench_rerank import build_corpus
+from benchmarks.common import save_results, summarize_latencies
+from benchmarks.stubs import StubWatsonxClient
+from config.settings import ANSWER_CONFIG
+from utils.extractive_qa import ExtractiveAnswerer, answer_with_fallback
+from utils.search_engine import SearchEngine
+from utils.watsonx_client import WatsonxClient
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entities", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--llm-latency", type=float, default=2.0)
+    parser.add_argument("--direct-confidence", type=float, help="Answer extractively at or above this score")
+    args = parser.parse_args()
+    ANSWER_CONFIG["direct_confidence"] = args.direct_confidence
+
+    passages, queries = build_corpus(args.entities, seed=0)
+    queries = random.Random(1).sample(queries, min(args.queries, len(queries)))
+
+    engine = SearchEngine()
+    engine.add_documents(passages, "synthetic")
+    answerer = ExtractiveAnswerer(engine)
+    client = StubWatsonxClient(latency=args.llm_latency)
+
+    correct, confidences, latencies = 0, [], []
+    auto_modes, auto_latencies = Counter(), []
+    for query, _ in queries:
+        search_results = engine.search(query, top_k=args.k)
+        # "What is the X of Y?" is answered by "The X of Y is ..."
+        expected = "The " + query[len("What is the "):-1] + " is"
+
+        start = time.perf_counter()
+        result = answerer.answer(query, search_results)
+        latencies.append(time.perf_counter() - start)
+        correct += expected in result["answer"]
+        confidences.append(result["confidence"])
+
+        start = time.perf_counter()
+        auto = answer_with_fallback(client, answerer, query, search_results,
+                                    WatsonxClient.format_context(search_results))
+        auto_latencies.append(time.perf_counter() - start)
+        auto_modes[auto["mode"]] += 1
+
+    results = {
+        "queries": len(queries),
+        "extractive": {
+            "accuracy": correct / len(queries),
+            "mean_confidence": sum(confidences) / len(confidences),
+            "latency": summarize_latencies(latencies)
+        },
+        "auto": {
+            "llm_latency": args.llm_latency,
+            "direct_confidence": args.direct_confidence,
+            "modes": dict(auto_modes),
+            "latency": summarize_latencies(auto_latencies)
+        }
+    }
+    extractive = results["extractive"]
+    print(f"Extractive: accuracy {extractive['accuracy']:.3f} | mean confidence {extractive['mean_confidence']:.2f} | "
+          f"p50 {extractive['latency']['p50_ms']:6.1f} ms | p95 {extractive['latency']['p95_ms']:6.1f} ms")
+    print(f"      Auto: {dict(auto_modes)} | p50 {results['auto']['latency']['p50_ms']:7.1f} ms | "
+          f"p95 {results['auto']['latency']['p95_ms']:7.1f} ms")
+
+    print(f"Results written to {save_results('extractive', results)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Cold/warm load time and per-process memory of a persisted search index
+
+Compares heap-loaded and memory-mapped FAISS indexes. Several worker
+processes load the same index at once to show how much of it is shared
+through the OS page cache.
+
+    python -m benchmarks.bench_index_load --vectors 200000 --workers 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import faiss
+from benchmarks.common import evict_from_page_cache, process_memory, save_results, summarize_latencies
+from utils.chunk_store import ChunkStore
+from utils.search_engine import read_faiss_index
+
+def build_index(filepath: str, vectors: int, dimension: int):
+    """Write a synthetic flat index and chunk store to ``filepath``"""
+    rng = np.random.default_rng(0)
+    index = faiss.IndexFlatL2(dimension)
+    for start in range(0, vectors, 50000):
+        batch = min(50000, vectors - start)
+        index.add(rng.random((batch, dimension), dtype=np.float32))
+    faiss.write_index(index, f"{filepath}.index")
+
+    store = ChunkStore()
+    store.extend([f"Synthetic chunk {i} " + "lorem ipsum " * 40 for i in range(vectors)], "synthetic")
+    store.save(filepath)
+
+def run_worker(filepath: str, mmap: bool, queries: int, dimension: int):
+    """Load the index, query it and report; stay alive until stdin closes"""
+    start = time.perf_counter()
+    index = read_faiss_index(f"{filepath}.index", mmap=mmap)
+    store = ChunkStore.load(filepath)
+    load_time = time.perf_counter() - start
+
+    rng = np.random.default_rng(os.getpid())
+    latencies = []
+    for _ in range(queries):
+        query = rng.random((1, dimension), dtype=np.float32)
+        query_start = time.perf_counter()
+        _, indices = index.search(query, 3)
+        [store[int(i)] for i in indices[0] if i >= 0]
+        latencies.append(time.perf_counter() - query_start)
+
+    print(json.dumps({
+        "load_s": load_time,
+        "search": summarize_latencies(latencies),
+        "memory": process_memory()
+    }), flush=True)
+    sys.stdin.read()
+
+def start_workers(filepath: str, mmap: bool, count: int, queries: int, dimension: int):
+    """Start ``count`` workers and collect their reports once all are loaded"""
+    command = [sys.executable, "-m", "benchmarks.bench_index_load", "--worker", filepath,
+               "--queries", str(queries), "--dimension", str(dimension)]
+    if mmap:
+        command.append("--mmap")
+
+    workers = [
+        subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(count)
+    ]
+    reports = [json.loads(worker.stdout.readline()) for worker in workers]
+
+    # Re-read memory now that every worker is resident at the same time
+    for worker, report in zip(workers, reports):
+        report["memory"] = process_memory(worker.pid) or report["memory"]
+    for worker in workers:
+        worker.stdin.close()
+        worker.wait()
+
+    return reports
+
+def benchmark_mode(filepath: str, mmap: bool, args) -> dict:
+    for suffix in (".index", ".chunks.bin", ".offsets.npy"):
+        evict_from_page_cache(f"{filepath}{suffix}")
+    cold = start_workers(filepath, mmap, 1, args.queries, args.dimension)[0]
+    warm = start_workers(filepath, mmap, 1, args.queries, args.dimension)[0]
+    shared = start_workers(filepath, mmap, args.workers, args.queries, args.dimension)
+
+    return {
+        "cold": cold,
+        "warm": warm,
+        "workers": args.workers,
+        "total_rss_mb": sum(r["memory"].get("rss_mb", 0.0) for r in shared),
+        "total_pss_mb": sum(r["memory"].get("pss_mb", 0.0) for r in shared),
+        "per_worker": shared
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=200000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--mmap", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.mmap, args.queries, args.dimension)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filepath = os.path.join(tmp, "library")
+        build_index(filepath, args.vectors, args.dimension)
+        results = {
+            "vectors": args.vectors,
+            "dimension": args.dimension,
+            "index_file_mb": os.path.getsize(f"{filepath}.index") / 2**20,
+            "heap": benchmark_mode(filepath, False, args),
+            "mmap": benchmark_mode(filepath, True, args)
+        }
+
+    for mode in ("heap", "mmap"):
+        r = results[mode]
+        print(f"{mode:>5}: cold load {r['cold']['load_s'] * 1000:8.1f} ms | "
+              f"warm load {r['warm']['load_s'] * 1000:8.1f} ms | "
+              f"{r['workers']} workers PSS {r['total_pss_mb']:8.1f} MiB (RSS {r['total_rss_mb']:8.1f} MiB)")
+    print(f"Results written to {save_results('index_load', results)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Parity, query latency and memory of the ONNX embedding backends
+
+Each backend runs in a fresh interpreter so its load time and resident
+memory are measured in isolation. The ONNX backends are then compared
+with the PyTorch one: cosine similarity of every chunk and query
+embedding, and agreement of the top-k chunks retrieved per query. The
+run fails if any cosine falls below ``--min-cosine``.
+
+    python -m benchmarks.bench_onnx --pages 50 --queries 100
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from benchmarks.common import current_rss_mb, process_memory, save_results, summarize_latencies
+from benchmarks.synthetic import make_pdf, make_questions
+from config.settings import MODEL_PARAMS
+from utils.document_processor import DocumentProcessor
+
+BACKENDS = ("torch", "onnx", "onnx_int8")
+
+def load_corpus(pages: int, queries: int):
+    pdf = make_pdf(pages=pages)
+    processor = DocumentProcessor()
+    page_texts = processor.extract_pages_from_pdf(io.BytesIO(pdf))
+    chunks, _ = processor.chunk_pages(page_texts, MODEL_PARAMS["chunk_size"], MODEL_PARAMS["chunk_overlap"])
+    return chunks, make_questions(queries)
+
+def run_worker(backend: str, args):
+    """Load one backend, embed the corpus and time single-query encodes"""
+    from utils.search_engine import get_embedder
+
+    chunks, questions = load_corpus(args.pages, args.queries)
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    embedder = get_embedder(backend=backend)
+    embedder.encode(["warm up"], convert_to_numpy=True)
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    chunk_embeddings = embedder.encode(chunks, batch_size=32, convert_to_numpy=True)
+    batch_time = time.perf_counter() - start
+
+    # The search path encodes one query at a time
+    latencies, query_embeddings = [], []
+    for question in questions:
+        query_start = time.perf_counter()
+        query_embeddings.append(embedder.encode([question], convert_to_numpy=True)[0])
+        latencies.append(time.perf_counter() - query_start)
+
+    np.save(os.path.join(args.output_dir, f"{backend}.chunks.npy"), chunk_embeddings)
+    np.save(os.path.join(args.output_dir, f"{backend}.queries.npy"), np.array(query_embeddings))
+    print(json.dumps({
+        "load_s": load_time,
+        "model_rss_mb": current_rss_mb() - rss_before,
+        "memory": process_memory(),
+        "chunks_per_sec": len(chunks) / batch_time,
+        "query": summarize_latencies(latencies)
+    }), flush=True)
+
+def cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+def top_k(queries: np.ndarray, chunks: np.ndarray, k: int) -> np.ndarray:
+    distances = ((queries[:, None, :] - chunks[None, :, :]) ** 2).sum(axis=2)
+    return np.argsort(distances, axis=1)[:, :k]
+
+def parity(output_dir: str, backend: str, k: int) -> dict:
+    load = lambda name, kind: np.load(os.path.join(output_dir, f"{name}.{kind}.npy"))
+    chunk_cos = cosine(load("torch", "chunks"), load(backend, "chunks"))
+    query_cos = cosine(load("torch", "queries"), load(backend, "queries"))
+
+    reference = top_k(load("torch", "queries"), load("torch", "chunks"), k)
+    candidate = top_k(load(backend, "queries"), load(backend, "chunks"), k)
+    overlap = np.mean([len(set(r) & set(c)) / k for r, c in zip(reference, candidate)])
+
+    return {
+        "chunk_cosine_mean": float(chunk_cos.mean()),
+        "chunk_cosine_min": float(chunk_cos.min()),
+        "query_cosine_mean": float(query_cos.mean()),
+        "query_cosine_min": float(query_cos.min()),
+        f"top{k}_overlap": float(overlap)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--output-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args)
+        return
+
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    results = {"pages": args.pages, "queries": args.queries, "backends": {}}
+    failed = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            command = [sys.executable, "-m", "benchmarks.bench_onnx", "--worker", backend, "--output-dir", tmp,
+                       "--pages", str(args.pages), "--queries", str(args.queries)]
+            output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+            report = json.loads(output.strip().splitlines()[-1])
+            if backend != "torch":
+                report["parity"] = parity(tmp, backend, args.k)
+                failed |= min(report["parity"]["chunk_cosine_min"], report["parity"]["query_cosine_min"]) < args.min_cosine
+            results["backends"][backend] = report
+
+            line = (f"{backend:>10}: load {report['load_s']:6.2f} s | model RSS {report['model_rss_mb']:7.1f} MiB | "
+                    f"query p50 {report['query']['p50_ms']:6.2f} ms p95 {report['query']['p95_ms']:6.2f} ms | "
+                    f"{report['chunks_per_sec']:7.1f} chunks/s")
+            if "parity" in report:
+                line += (f" | cosine min {report['parity']['chunk_cosine_min']:.4f} "
+                         f"| top{args.k} overlap {report['parity'][f'top{args.k}_overlap']:.2%}")
+            print(line)
+
+    print(f"Results written to {save_results('onnx', results)}")
+    if failed:
+        sys.exit(f"Parity check failed: cosine below {args.min_cosine}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Offline benchmark of the full RAG pipeline, stage by stage
+
+Generates synthetic PDFs of the requested sizes and times page
+extraction, per-page chunking (and whole-text chunking for comparison),
+indexing, search, prompt building, answer generation (stubbed LLM),
+speech synthesis (stubbed TTS) and page rendering. Results are saved as
+JSON; pass an earlier result file as ``--baseline`` to compare.
+
+    python -m benchmarks.bench_pipeline --pages 10 100 400 --queries 50
+"""
+import argparse
+import io
+import json
+import time
+from benchmarks.common import MemorySampler, save_results, summarize_latencies
+from benchmarks.stubs import StubTTSEngine, StubWatsonxClient
+from benchmarks.synthetic import make_pdf, make_questions
+from config.settings import MODEL_PARAMS
+from utils.document_processor import DocumentProcessor
+from utils.pdf_reader import PDFReader
+from utils.search_engine import SearchEngine
+
+def run_stage(results: dict, name: str, func, items: list = None, unit: str = None, count: int = None):
+    """Run one stage, recording latency, throughput and peak memory
+
+    With ``items`` the function is called once per item and per-call
+    latencies are summarised; otherwise it is called once and ``count``
+    units of work are credited to it.
+    """
+    latencies = []
+    output = None
+
+    with MemorySampler() as memory:
+        start = time.perf_counter()
+        if items is None:
+            output = func()
+            latencies.append(time.perf_counter() - start)
+        else:
+            for item in items:
+                item_start = time.perf_counter()
+                output = func(item)
+                latencies.append(time.perf_counter() - item_start)
+        elapsed = time.perf_counter() - start
+
+    work = len(items) if items is not None else count
+    stage = {
+        "seconds": elapsed,
+        "latency": summarize_latencies(latencies),
+        "peak_rss_mb": memory.peak_mb,
+        "rss_growth_mb": memory.growth_mb
+    }
+    if unit and work:
+        stage[f"{unit}_per_s"] = work / elapsed if elapsed else float("inf")
+    results[name] = stage
+    return output
+
+def benchmark_document(pages: int, args) -> dict:
+    pdf_bytes = make_pdf(pages, seed=pages)
+    questions = make_questions(args.queries, seed=pages)
+    results = {}
+
+    processor = DocumentProcessor()
+    page_texts = run_stage(results, "extract_pages_from_pdf",
+                           lambda: processor.extract_pages_from_pdf(io.BytesIO(pdf_bytes), progress_callback=lambda _: None),
+                           unit="pages", count=pages)
+    # Ingestion chunks page by page; whole-text chunking is kept for comparison
+    chunks, chunk_page_numbers = run_stage(results, "chunk_pages", lambda: processor.chunk_pages(
+        page_texts, MODEL_PARAMS["chunk_size"], MODEL_PARAMS["chunk_overlap"]
+    ))
+    text = "".join(page + "\n" for page in page_texts)
+    text_chunks = run_stage(results, "chunk_text",
+                            lambda: processor.chunk_text(text, MODEL_PARAMS["chunk_size"], MODEL_PARAMS["chunk_overlap"]))
+    for stage, stage_chunks in (("chunk_pages", chunks), ("chunk_text", text_chunks)):
+        results[stage]["chunks"] = len(stage_chunks)
+        results[stage]["chunks_per_s"] = len(stage_chunks) / results[stage]["seconds"]
+
+    engine = SearchEngine()
+    engine.rerank_enabled = not args.no_rerank
+    engine.embedder  # load the model outside the timed stage
+    run_stage(results, "add_documents", lambda: engine.add_documents(chunks, "synthetic.pdf", chunk_page_numbers),
+              unit="chunks", count=len(chunks))
+
+    search_results = run_stage(results, "search", lambda q: engine.search(q, top_k=MODEL_PARAMS["search_results"]),
+                               items=questions, unit="queries")
+
+    client = StubWatsonxClient(latency=args.llm_latency)
+    history = [{"question": q, "answer": "previous answer " * 40} for q in questions[:3]]
+    prompts = run_stage(results, "prompt_build", lambda q: client.build_prompt(
+        q, client.format_context(search_results), client.format_chat_history(history)
+    ), items=questions, unit="prompts")
+    results["prompt_build"]["prompt_characters"] = len(prompts)
+
+    answer = run_stage(results, "generate_answer",
+                       lambda q: client.generate_answer(q, client.format_context(search_results)),
+                       items=questions, unit="answers")
+
+    tts = StubTTSEngine()
+    run_stage(results, "text_to_speech", lambda q: tts.text_to_speech(answer), items=questions, unit="requests")
+
+    reader = PDFReader()
+    reader.load_pdf(io.BytesIO(pdf_bytes))
+    render_pages = list(range(min(pages, args.render_pages)))
+    run_stage(results, "get_page_image", reader.get_page_image, items=render_pages, unit="pages")
+
+    return results
+
+def compare(results: dict, baseline_path: str):
+    """Print p50 latency ratios against an earlier run"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]["documents"]
+
+    print(f"\nCompared with {baseline_path} (ratio < 1 is faster):")
+    for pages, stages in results["documents"].items():
+        for stage, data in stages.items():
+            before = baseline.get(pages, {}).get(stage, {}).get("latency", {}).get("p50_ms")
+            if before:
+                print(f"  {pages:>5} pages {stage:>22}: {data['latency']['p50_ms'] / before:6.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--render-pages", type=int, default=20, help="Pages rendered per document")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Simulated LLM latency in seconds")
+    parser.add_argument("--no-rerank", action="store_true")
+    parser.add_argument("--baseline", help="Earlier pipeline result file to compare against")
+    args = parser.parse_args()
+
+    results = {"settings": vars(args), "documents": {}}
+    for pages in args.pages:
+        stages = benchmark_document(pages, args)
+        results["documents"][str(pages)] = stages
+
+        print(f"\n{pages} pages")
+        for stage, data in stages.items():
+            throughput = next((f"{v:10.1f} {k}" for k, v in data.items() if k.endswith("_per_s")), "")
+            print(f"  {stage:>22}: p50 {data['latency']['p50_ms']:9.2f} ms | p95 {data['latency']['p95_ms']:9.2f} ms | "
+                  f"peak {data['peak_rss_mb']:7.1f} MiB | {throughput}")
+
+    if args.baseline:
+        compare(results, args.baseline)
+    print(f"\nResults written to {save_results('pipeline', results)}")
+
+if __name__ == "__main__":
+    main()
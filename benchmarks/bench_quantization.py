@@ -0,0 +1,89 @@
+"""
+Memory vs recall of the compressed vector representations
+
+Builds every index type supported by ``SearchEngine`` on the same synthetic
+corpus and compares bytes per vector, query latency and recall@k against
+the exact float32 baseline.
+
+    python -m benchmarks.bench_quantization --vectors 100000 --k 3
+"""
+import argparse
+import time
+import numpy as np
+import faiss
+from benchmarks.common import save_results, summarize_latencies
+from utils.search_engine import INDEX_FACTORY, MIN_TRAINING_POINTS, create_index
+
+def synthetic_embeddings(count: int, dimension: int, clusters: int, seed: int) -> np.ndarray:
+    """Unit-norm vectors grouped around topics, like sentence embeddings"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    labels = rng.integers(0, clusters, count)
+    vectors = centers[labels] + 0.6 * rng.standard_normal((count, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+def recall_at_k(found: np.ndarray, expected: np.ndarray) -> float:
+    """Share of the exact top-k neighbours that were returned"""
+    hits = sum(len(set(f) & set(e)) for f, e in zip(found, expected))
+    return hits / expected.size
+
+def benchmark_index(index_type: str, corpus: np.ndarray, queries: np.ndarray,
+                    expected: np.ndarray, k: int, pq_m: int) -> dict:
+    index = create_index(corpus.shape[1], index_type, pq_m)
+
+    train_start = time.perf_counter()
+    if not index.is_trained:
+        sample = corpus[:max(MIN_TRAINING_POINTS.get(index_type, 1), 50000)]
+        index.train(sample)
+    train_time = time.perf_counter() - train_start
+
+    index.add_with_ids(corpus, np.arange(len(corpus), dtype=np.int64))
+
+    latencies = []
+    found = []
+    for query in queries:
+        start = time.perf_counter()
+        _, indices = index.search(query.reshape(1, -1), k)
+        latencies.append(time.perf_counter() - start)
+        found.append(indices[0])
+
+    return {
+        "bytes_per_vector": faiss.serialize_index(index).size / len(corpus),
+        "train_s": train_time,
+        "search": summarize_latencies(latencies),
+        "recall_at_k": recall_at_k(np.array(found), expected)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--pq-m", type=int, default=48, help="PQ sub-quantizers")
+    args = parser.parse_args()
+
+    corpus = synthetic_embeddings(args.vectors, args.dimension, args.clusters, seed=0)
+    # Queries are perturbed corpus vectors so each has meaningful neighbours
+    rng = np.random.default_rng(1)
+    queries = corpus[rng.choice(len(corpus), args.queries, replace=False)]
+    queries = queries + 0.05 * rng.standard_normal(queries.shape).astype(np.float32)
+
+    exact = faiss.IndexFlatL2(args.dimension)
+    exact.add(corpus)
+    _, expected = exact.search(queries, args.k)
+
+    results = {"vectors": args.vectors, "dimension": args.dimension, "k": args.k, "indexes": {}}
+    for index_type in INDEX_FACTORY:
+        r = benchmark_index(index_type, corpus, queries, expected, args.k, args.pq_m)
+        results["indexes"][index_type] = r
+        print(f"{index_type:>8}: {r['bytes_per_vector']:7.1f} B/vector | "
+              f"p50 {r['search']['p50_ms']:7.3f} ms | p95 {r['search']['p95_ms']:7.3f} ms | "
+              f"recall@{args.k} {r['recall_at_k']:.3f}")
+
+    print(f"Results written to {save_results('quantization', results)}")
+
+if __name__ == "__main__":
+    main()
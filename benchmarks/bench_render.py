@@ -0,0 +1,77 @@
+"""
+Page rendering: time and payload size per page for each zoom and format
+
+Renders every page of a synthetic document through LoadedDocument at the
+preview zoom and at the zoom the reader picks for a few viewport widths,
+encoding as PNG (the old output), JPEG and WebP at several qualities.
+``zoom 2.0 png`` is what the reader used to send for every page.
+
+    python -m benchmarks.bench_render --pages 20 --widths 800 1400
+"""
+import argparse
+import time
+from config.settings import RENDER_CONFIG
+from benchmarks.common import save_results
+from benchmarks.synthetic import make_pdf
+
+def webp_available() -> bool:
+    try:
+        from PIL import features
+    except ImportError:
+        return False
+    return features.check("webp")
+
+def render_all(document, zoom: float, image_format: str, quality: int):
+    """Seconds per page and mean bytes per page for one setting"""
+    sizes = []
+    start = time.perf_counter()
+    for page in range(document.page_count):
+        sizes.append(len(document.render_page(page, zoom, image_format, quality)))
+    elapsed = time.perf_counter() - start
+    return {
+        "ms_per_page": 1000 * elapsed / document.page_count,
+        "kb_per_page": sum(sizes) / len(sizes) / 1024
+    }
+
+def main():
+    from utils.loaded_document import LoadedDocument
+    from utils.pdf_reader import PDFReader
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--widths", type=int, nargs="+", default=[800, 1400],
+                        help="Viewport widths in CSS pixels")
+    parser.add_argument("--qualities", type=int, nargs="+", default=[60, 80, 90])
+    args = parser.parse_args()
+
+    document = LoadedDocument(make_pdf(args.pages), "render.pdf")
+    reader = PDFReader()
+    reader.load_pdf(document)
+
+    zooms = {"baseline": 2.0}
+    if RENDER_CONFIG["preview_zoom"]:
+        zooms["preview"] = RENDER_CONFIG["preview_zoom"]
+    for width in args.widths:
+        zooms[f"{width}px"] = reader.fit_zoom(0, width)
+
+    formats = [("png", None)] + [("jpeg", q) for q in args.qualities]
+    if webp_available():
+        formats += [("webp", q) for q in args.qualities]
+    else:
+        print("Pillow with WebP support is not installed; skipping WebP")
+
+    # Warm up PyMuPDF's font and page caches
+    document.render_page(0, 1.0)
+
+    results = {}
+    for label, zoom in zooms.items():
+        for image_format, quality in formats:
+            key = f"{label} zoom {zoom} {image_format}" + (f" q{quality}" if quality else "")
+            results[key] = render_all(document, zoom, image_format, quality or 80)
+            print(f"{key:>32}: {results[key]['ms_per_page']:7.2f} ms/page | "
+                  f"{results[key]['kb_per_page']:8.1f} KiB/page")
+
+    print(f"Results written to {save_results('render', results)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Quality and CPU latency of cross-encoder re-ranking
+
+Indexes a synthetic corpus of fact passages with many near-duplicate
+distractors, then compares bi-encoder retrieval against re-ranking of
+candidate sets of several sizes.
+
+    python -m benchmarks.bench_rerank --entities 300 --budgets 10 20 50
+"""
+import argparse
+import random
+import time
+from benchmarks.common import save_results, summarize_latencies
+from utils.reranker import Reranker
+from utils.search_engine import SearchEngine
+
+ATTRIBUTES = [
+    ("melting point", lambda r: f"{r.randint(200, 3500)} kelvin"),
+    ("discoverer", lambda r: f"Dr. {make_name(r).title()}"),
+    ("year of discovery", lambda r: str(r.randint(1700, 2020))),
+    ("primary industrial use", lambda r: r.choice(["catalysis", "insulation", "pigments", "batteries", "optics"])),
+    ("country of origin", lambda r: make_name(r).title() + "ia")
+]
+
+def make_name(rng: random.Random) -> str:
+    syllables = ["zor", "vat", "kel", "min", "dra", "pho", "lix", "tar", "qen", "bru", "syl", "om"]
+    return "".join(rng.choice(syllables) for _ in range(3))
+
+def build_corpus(entities: int, seed: int):
+    """Fact passages plus (query, relevant passage id) pairs"""
+    rng = random.Random(seed)
+    names = [make_name(rng).title() for _ in range(entities)]
+    passages, queries = [], []
+
+    for name in names:
+        for attribute, value in ATTRIBUTES:
+            # Distractor sentences reuse the entity and attribute vocabulary
+            other = rng.choice(names)
+            other_attribute = rng.choice(ATTRIBUTES)[0]
+            passages.append(
+                f"Researchers have long studied {name} and compared it with {other}. "
+                f"The {other_attribute} of {other} is still debated. "
+                f"The {attribute} of {name} is {value(rng)}. "
+                f"Several reviews discuss the {attribute} of related materials."
+            )
+            queries.append((f"What is the {attribute} of {name}?", len(passages) - 1))
+
+    return passages, queries
+
+def score(ranked_ids, relevant: int, k: int):
+    """Hit@k and reciprocal rank for one query"""
+    if relevant not in ranked_ids:
+        return 0.0, 0.0
+    rank = ranked_ids.index(relevant) + 1
+    return float(rank <= k), 1.0 / rank
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entities", type=int, default=300)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--budgets", type=int, nargs="+", default=[10, 20, 50])
+    args = parser.parse_args()
+
+    passages, queries = build_corpus(args.entities, seed=0)
+    queries = random.Random(1).sample(queries, min(args.queries, len(queries)))
+
+    engine = SearchEngine()
+    engine.add_documents(passages, "synthetic")
+    reranker = Reranker(timeout=float("inf"))
+
+    def chunk_id(result):
+        return result[2]["chunk_index"]
+
+    results = {"passages": len(passages), "queries": len(queries), "k": args.k, "runs": {}}
+    runs = [("bi-encoder", None)] + [(f"rerank@{budget}", budget) for budget in args.budgets]
+
+    for label, budget in runs:
+        hits, reciprocal_ranks, latencies = [], [], []
+        for query, relevant in queries:
+            start = time.perf_counter()
+            candidates = engine.search(query, top_k=budget or args.k, rerank=False)
+            if budget:
+                candidates = reranker.rerank(query, candidates, args.k)
+            latencies.append(time.perf_counter() - start)
+
+            hit, rr = score([chunk_id(r) for r in candidates], relevant, args.k)
+            hits.append(hit)
+            reciprocal_ranks.append(rr)
+
+        run = {
+            f"recall_at_{args.k}": sum(hits) / len(hits),
+            "mrr": sum(reciprocal_ranks) / len(reciprocal_ranks),
+            "latency": summarize_latencies(latencies)
+        }
+        results["runs"][label] = run
+        print(f"{label:>12}: recall@{args.k} {run[f'recall_at_{args.k}']:.3f} | MRR {run['mrr']:.3f} | "
+              f"p50 {run['latency']['p50_ms']:7.1f} ms | p95 {run['latency']['p95_ms']:7.1f} ms")
+
+    print(f"Results written to {save_results('rerank', results)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Cold-start cost: module import time and time-to-first-render per page
+
+Every measurement runs in a fresh interpreter so nothing is already
+imported. Pages are rendered headlessly with Streamlit's AppTest. Run the
+benchmark on two commits with different labels to compare them:
+
+    python -m benchmarks.bench_startup --label after --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from benchmarks.common import save_results
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = {
+    "home": ("pages.main_app", "main_app"),
+    "about": ("pages.about", "about_page"),
+    "team": ("pages.team", "team_page")
+}
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [m for m in ("torch", "sentence_transformers", "faiss", "fitz", "gtts", "pydub", "ibm_watsonx_ai")
+         if m in sys.modules]
+print(json.dumps({{"seconds": elapsed, "heavy_modules": heavy}}))
+"""
+
+RENDER_PROBE = """
+import json, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_string({script!r}, default_timeout=300)
+app.run()
+print(json.dumps({{"seconds": time.perf_counter() - start, "exceptions": [str(e.value) for e in app.exception]}}))
+"""
+
+def run_probe(code: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONPATH": REPO_ROOT}
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def measure(code: str, runs: int) -> dict:
+    samples = [run_probe(code) for _ in range(runs)]
+    seconds = [sample["seconds"] for sample in samples]
+    summary = {"median_s": statistics.median(seconds), "min_s": min(seconds), "max_s": max(seconds)}
+    summary.update({key: value for key, value in samples[-1].items() if key != "seconds"})
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--label", default="current", help="Tag stored with the results, e.g. before/after")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--pages", nargs="+", choices=list(PAGES), default=list(PAGES))
+    args = parser.parse_args()
+
+    results = {"label": args.label, "runs": args.runs, "import": {}, "first_render": {}}
+
+    for page in args.pages:
+        module, function = PAGES[page]
+        results["import"][page] = measure(IMPORT_PROBE.format(module=module), args.runs)
+        script = f"from {module} import {function}\n{function}()\n"
+        results["first_render"][page] = measure(RENDER_PROBE.format(script=script), args.runs)
+
+        imported = results["import"][page]
+        rendered = results["first_render"][page]
+        print(f"{page:>6}: import {imported['median_s'] * 1000:8.1f} ms "
+              f"(heavy: {', '.join(imported['heavy_modules']) or 'none'}) | "
+              f"first render {rendered['median_s'] * 1000:8.1f} ms")
+
+    print(f"Results written to {save_results(f'startup-{args.label}', results)}")
+
+if __name__ == "__main__":
+    main()
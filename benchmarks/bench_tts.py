@@ -0,0 +1,77 @@
+"""
+Text-to-speech latency and throughput per backend on the same texts
+
+Each available backend synthesises the same answer-sized texts one at a
+time (latency) and then all at once from a thread pool (throughput).
+Audio seconds produced per wall-clock second show how far ahead of
+playback a backend can run. Backends that are not installed are skipped.
+
+    python -m benchmarks.bench_tts --texts 10 --concurrency 4 --backends gtts espeak
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.common import save_results, summarize_latencies
+from benchmarks.synthetic import TOPICS, make_paragraph
+from utils.read_ahead import mp3_duration
+from utils.tts_backends import BACKENDS, get_backend, wav_duration
+
+def audio_seconds(audio: bytes) -> float:
+    return wav_duration(audio) or mp3_duration(audio) or 0.0
+
+def run_backend(backend, texts, language: str, concurrency: int) -> dict:
+    # The first call loads voices or opens the connection
+    backend.synthesize(texts[0], language)
+
+    latencies, produced = [], 0.0
+    for text in texts:
+        start = time.perf_counter()
+        produced += audio_seconds(backend.synthesize(text, language))
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda text: backend.synthesize(text, language), texts))
+    parallel = time.perf_counter() - start
+
+    characters = sum(len(text) for text in texts)
+    return {
+        "offline": backend.offline,
+        "latency": summarize_latencies(latencies),
+        "chars_per_sec": characters / sum(latencies),
+        "parallel_chars_per_sec": characters / parallel,
+        "audio_seconds_per_sec": produced / sum(latencies)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--texts", type=int, default=10)
+    parser.add_argument("--sentences", type=int, default=4, help="Sentences per text")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS))
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    texts = [make_paragraph(rng, TOPICS[i % len(TOPICS)], args.sentences) for i in range(args.texts)]
+
+    results = {}
+    for name in args.backends:
+        backend = get_backend(name)
+        if not backend.available():
+            print(f"{name:>8}: not installed, skipped")
+            continue
+        try:
+            results[name] = report = run_backend(backend, texts, args.language, args.concurrency)
+        except Exception as e:
+            print(f"{name:>8}: failed ({e})")
+            continue
+        print(f"{name:>8}: p50 {report['latency']['p50_ms']:7.0f} ms | p95 {report['latency']['p95_ms']:7.0f} ms | "
+              f"{report['chars_per_sec']:7.0f} chars/s | {report['parallel_chars_per_sec']:7.0f} chars/s "
+              f"x{args.concurrency} | {report['audio_seconds_per_sec']:5.1f}x real time")
+
+    print(f"Results written to {save_results('tts', results)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Shared helpers for timing, memory measurement and result reporting
+"""
+import json
+import os
+import platform
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+@contextmanager
+def timed(results: Dict, key: str):
+    """Record the wall time of a block in seconds under ``results[key]``"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        results[key] = time.perf_counter() - start
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+def summarize_latencies(latencies: List[float]) -> Dict:
+    """Summarise a list of latencies in seconds as milliseconds"""
+    if not latencies:
+        return {"count": 0}
+    return {
+        "count": len(latencies),
+        "mean_ms": 1000 * sum(latencies) / len(latencies),
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p95_ms": 1000 * percentile(latencies, 95),
+        "max_ms": 1000 * max(latencies)
+    }
+
+def process_memory(pid="self") -> Dict:
+    """Resident memory of a process in MiB, split into shared and private
+
+    PSS charges shared pages proportionally to each process mapping them,
+    so summing PSS across workers gives the real footprint of the group.
+    """
+    memory = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].rstrip(":") in (
+                    "Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty"
+                ):
+                    memory[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    except OSError:
+        # Not Linux: only the peak RSS of this process is available
+        if pid == "self":
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            scale = 1 if platform.system() == "Darwin" else 1024
+            return {"rss_mb": peak * scale / 2**20}
+        return {}
+
+    return {
+        "rss_mb": memory.get("Rss", 0.0),
+        "pss_mb": memory.get("Pss", 0.0),
+        "shared_mb": memory.get("Shared_Clean", 0.0) + memory.get("Shared_Dirty", 0.0),
+        "private_mb": memory.get("Private_Clean", 0.0) + memory.get("Private_Dirty", 0.0)
+    }
+
+def peak_memory_mb() -> float:
+    """Peak resident memory of this process in MiB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    scale = 1 if platform.system() == "Darwin" else 1024
+    return peak * scale / 2**20
+
+def current_rss_mb() -> float:
+    """Current resident memory of this process in MiB"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return peak_memory_mb()
+
+class MemorySampler:
+    """Tracks the peak RSS of this process while a block runs
+
+    ``ru_maxrss`` only ever grows, so it cannot attribute a peak to one
+    stage; a background thread polling the current RSS can.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.start_mb = 0.0
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+    def __enter__(self):
+        self.start_mb = self.peak_mb = current_rss_mb()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+    @property
+    def growth_mb(self) -> float:
+        return self.peak_mb - self.start_mb
+
+def evict_from_page_cache(path: str):
+    """Ask the OS to drop a file's cached pages so the next read is cold"""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+def save_results(name: str, results: Dict, output_dir: str = RESULTS_DIR) -> str:
+    """Write benchmark results as JSON and return the file path"""
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(output_dir, f"{name}-{stamp}.json")
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "benchmark": name,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "platform": {
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "system": platform.system(),
+                "cpu_count": os.cpu_count()
+            },
+            "results": results
+        }, f, indent=2)
+
+    return path
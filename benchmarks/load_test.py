@@ -0,0 +1,159 @@
+"""
+Load test simulating many concurrent student sessions against the engines
+
+Each simulated session owns the same engine objects as a Streamlit
+session (SearchEngine, WatsonxClient, TTSEngine, PDFReader), uploads a
+document and then loops over ask / search / page-flip actions with think
+time. Streamlit runs sessions as threads of one server process, so the
+sessions here are threads as well. The watsonx and TTS backends are local
+stubs with configurable latency.
+
+    python -m benchmarks.load_test --users 1 5 10 20 --duration 60
+"""
+import argparse
+import gc
+import random
+import threading
+import time
+from collections import defaultdict
+from benchmarks.common import current_rss_mb, save_results, summarize_latencies
+from benchmarks.stubs import StubTTSEngine, StubWatsonxClient
+from benchmarks.synthetic import make_pdf, make_questions
+from config.settings import MODEL_PARAMS
+from utils.document_processor import DocumentProcessor
+from utils.loaded_document import LoadedDocument
+from utils.pdf_reader import PDFReader
+from utils.search_engine import SearchEngine, get_embedder
+
+class SimulatedSession:
+    def __init__(self, session_id: int, pdf_bytes: bytes, args):
+        self.rng = random.Random(session_id)
+        self.pdf_bytes = pdf_bytes
+        self.args = args
+        self.questions = make_questions(50, seed=session_id)
+        self.latencies = defaultdict(list)
+        self.errors = 0
+
+        self.search_engine = SearchEngine()
+        self.search_engine.rerank_enabled = not args.no_rerank
+        self.watsonx_client = StubWatsonxClient(latency=args.llm_latency)
+        self.tts_engine = StubTTSEngine(latency_per_char=args.tts_latency_per_char)
+        self.pdf_reader = PDFReader()
+        self.chat_history = []
+
+    def timed(self, action: str, func):
+        start = time.perf_counter()
+        try:
+            func()
+        except Exception:
+            self.errors += 1
+        self.latencies[action].append(time.perf_counter() - start)
+
+    def upload(self):
+        # One parse shared by the reader and extraction, as in the app
+        processor = DocumentProcessor()
+        document = LoadedDocument(self.pdf_bytes, "lecture.pdf")
+        self.pdf_reader.load_pdf(document)
+        page_texts = processor.extract_pages_from_pdf(document, progress_callback=lambda _: None)
+        chunks, pages = processor.chunk_pages(page_texts, MODEL_PARAMS["chunk_size"], MODEL_PARAMS["chunk_overlap"])
+        self.search_engine.add_documents(chunks, "lecture.pdf", pages)
+
+    def ask(self):
+        question = self.rng.choice(self.questions)
+        results = self.search_engine.search(question, top_k=MODEL_PARAMS["search_results"])
+        answer = self.watsonx_client.generate_answer(
+            question,
+            self.watsonx_client.format_context(results),
+            self.watsonx_client.format_chat_history(self.chat_history)
+        )
+        self.chat_history.append({"question": question, "answer": answer})
+        if self.rng.random() < self.args.tts_share:
+            self.tts_engine.text_to_speech(answer)
+
+    def search(self):
+        self.search_engine.search(self.rng.choice(self.questions), top_k=5)
+
+    def page_flip(self):
+        page = self.rng.randrange(self.pdf_reader.total_pages)
+        self.pdf_reader.get_page_image(page)
+        self.pdf_reader.get_page_text(page)
+
+    def run(self, stop: threading.Event):
+        self.timed("upload", self.upload)
+        actions = [("ask", self.ask), ("search", self.search), ("page_flip", self.page_flip)]
+        weights = [self.args.ask_weight, self.args.search_weight, self.args.flip_weight]
+
+        while not stop.is_set():
+            action, func = self.rng.choices(actions, weights)[0]
+            self.timed(action, func)
+            stop.wait(self.rng.expovariate(1 / self.args.think_time) if self.args.think_time else 0)
+
+def run_level(users: int, documents: list, args) -> dict:
+    gc.collect()
+    baseline_mb = current_rss_mb()
+
+    sessions = [SimulatedSession(i, documents[i % len(documents)], args) for i in range(users)]
+    stop = threading.Event()
+    threads = [threading.Thread(target=s.run, args=(stop,), daemon=True) for s in sessions]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    # Sessions are still referenced here, so their memory is still resident
+    session_mb = (current_rss_mb() - baseline_mb) / users
+
+    by_action = defaultdict(list)
+    for session in sessions:
+        for action, latencies in session.latencies.items():
+            by_action[action].extend(latencies)
+
+    interactive = sum(len(v) for k, v in by_action.items() if k != "upload")
+    return {
+        "users": users,
+        "seconds": elapsed,
+        "actions_per_s": interactive / elapsed,
+        "errors": sum(s.errors for s in sessions),
+        "memory_per_session_mb": session_mb,
+        "latency": {action: summarize_latencies(latencies) for action, latencies in sorted(by_action.items())}
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 5, 10])
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per load level")
+    parser.add_argument("--pages", type=int, default=30, help="Pages per uploaded document")
+    parser.add_argument("--distinct-documents", type=int, default=3)
+    parser.add_argument("--think-time", type=float, default=2.0, help="Mean pause between actions in seconds")
+    parser.add_argument("--ask-weight", type=float, default=0.5)
+    parser.add_argument("--search-weight", type=float, default=0.2)
+    parser.add_argument("--flip-weight", type=float, default=0.3)
+    parser.add_argument("--tts-share", type=float, default=0.2, help="Share of answers read aloud")
+    parser.add_argument("--llm-latency", type=float, default=1.5)
+    parser.add_argument("--tts-latency-per-char", type=float, default=0.0005)
+    parser.add_argument("--no-rerank", action="store_true")
+    args = parser.parse_args()
+
+    documents = [make_pdf(args.pages, seed=i) for i in range(args.distinct_documents)]
+    get_embedder()  # the shared model is loaded once per process, as in the app
+
+    results = {"settings": vars(args), "levels": []}
+    for users in args.users:
+        level = run_level(users, documents, args)
+        results["levels"].append(level)
+
+        ask = level["latency"].get("ask", {})
+        print(f"{users:>4} users: {level['actions_per_s']:7.2f} actions/s | "
+              f"ask p50 {ask.get('p50_ms', 0):8.1f} ms p95 {ask.get('p95_ms', 0):8.1f} ms | "
+              f"upload p95 {level['latency'].get('upload', {}).get('p95_ms', 0):8.1f} ms | "
+              f"{level['memory_per_session_mb']:7.1f} MiB/session | errors {level['errors']}")
+
+    print(f"Results written to {save_results('load_test', results)}")
+
+if __name__ == "__main__":
+    main()
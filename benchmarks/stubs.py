@@ -0,0 +1,48 @@
+"""
+Local stand-ins for the network backends used in benchmarks
+"""
+import io
+import time
+import wave
+from utils.tts_engine import TTSEngine
+from utils.watsonx_client import WatsonxClient
+
+class StubModel:
+    """Mimics ``Model.generate_text`` with a fixed latency and a canned answer"""
+
+    def __init__(self, latency: float = 0.0, answer_words: int = 120):
+        self.latency = latency
+        self.answer = " ".join(["answer"] * answer_words)
+
+    def generate_text(self, prompt: str):
+        time.sleep(self.latency)
+        return self.answer
+
+class StubWatsonxClient(WatsonxClient):
+    """WatsonxClient whose model never leaves the process"""
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.model = StubModel(latency)
+
+class StubTTSEngine(TTSEngine):
+    """TTSEngine producing silent WAV audio of a realistic length"""
+
+    def __init__(self, latency_per_char: float = 0.0, words_per_minute: int = 160):
+        super().__init__()
+        self.latency_per_char = latency_per_char
+        self.words_per_minute = words_per_minute
+
+    def text_to_speech(self, text: str, language: str = 'en', slow: bool = False) -> bytes:
+        if not text.strip():
+            return None
+
+        time.sleep(self.latency_per_char * len(text))
+        seconds = len(text.split()) / self.words_per_minute * 60
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as audio:
+            audio.setnchannels(1)
+            audio.setsampwidth(2)
+            audio.setframerate(16000)
+            audio.writeframes(b"\x00\x00" * int(16000 * seconds))
+        return buffer.getvalue()
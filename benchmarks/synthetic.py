@@ -0,0 +1,62 @@
+"""
+Deterministic synthetic PDFs for benchmarks
+"""
+import random
+from typing import List
+
+TOPICS = [
+    "photosynthesis", "thermodynamics", "linear algebra", "cell division", "supply and demand",
+    "plate tectonics", "neural networks", "organic chemistry", "probability", "the french revolution"
+]
+
+VOCABULARY = (
+    "the a of and to in is that for as with by on energy system process model data theory "
+    "function structure analysis rate change equation result student concept example value "
+    "variable method principle observation experiment reaction network layer matrix vector "
+    "market price force mass velocity population membrane protein enzyme gradient"
+).split()
+
+def make_paragraph(rng: random.Random, topic: str, sentences: int = 5) -> str:
+    out = []
+    for _ in range(sentences):
+        words = [rng.choice(VOCABULARY) for _ in range(rng.randint(10, 22))]
+        words.insert(rng.randint(0, len(words)), topic)
+        out.append(" ".join(words).capitalize() + ".")
+    return " ".join(out)
+
+def make_pdf(pages: int, paragraphs_per_page: int = 4, pages_per_chapter: int = 10, seed: int = 0) -> bytes:
+    """Build a PDF with chapter headings, a table of contents and body text"""
+    import fitz  # PyMuPDF
+
+    rng = random.Random(seed)
+    doc = fitz.open()
+    toc = []
+
+    for page_num in range(pages):
+        page = doc.new_page()
+        y = 72
+        if page_num % pages_per_chapter == 0:
+            chapter = page_num // pages_per_chapter + 1
+            title = f"Chapter {chapter}: {TOPICS[(chapter - 1) % len(TOPICS)].title()}"
+            page.insert_text((72, y), title, fontsize=20)
+            toc.append([1, title, page_num + 1])
+            y += 36
+
+        topic = TOPICS[(page_num // pages_per_chapter) % len(TOPICS)]
+        body = "\n\n".join(make_paragraph(rng, topic) for _ in range(paragraphs_per_page))
+        page.insert_textbox(fitz.Rect(72, y, page.rect.width - 72, page.rect.height - 72), body, fontsize=10)
+
+    doc.set_toc(toc)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+def make_questions(count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    templates = [
+        "What is the role of {} in the model?",
+        "Explain the main principle behind {}.",
+        "How does {} change the rate of the process?",
+        "Give an example of {} from the text."
+    ]
+    return [rng.choice(templates).format(rng.choice(TOPICS)) for _ in range(count)]
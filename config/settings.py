@@ -2,6 +2,7 @@
 Configuration settings for StudyMate Application
 """
 import os
+import tempfile
 
 # Watsonx Configuration
 WATSONX_CONFIG = {
@@ -17,7 +18,195 @@ MODEL_PARAMS = {
     "temperature": 0.2,
     "chunk_size": 500,
     "chunk_overlap": 50,
-    "search_results": 3
+    "search_results": 3,
+    "embedding_model": "all-MiniLM-L6-v2",
+    # "torch" (sentence-transformers), "onnx" or "onnx_int8" (ONNX Runtime,
+    # dynamically quantised weights); the ONNX model is exported once and cached
+    "embedding_backend": "torch",
+    "onnx_cache_dir": os.path.join(os.path.expanduser("~"), ".cache", "studymate", "onnx"),
+    # Load the embedder and LLM client in the background after first render
+    "warmup": True,
+    # Vector storage: "flat" (float32), "sq_fp16", "sq_int8" or "pq"
+    "index_type": "flat",
+    "pq_subquantizers": 48,
+    # Saving drops removed chunks and renumbers the rest once they make up
+    # this share of the index
+    "compact_removed_ratio": 0.25,
+    # Two-stage retrieval: re-rank a wider bi-encoder candidate set
+    "rerank": True,
+    "rerank_model": "cross-encoder/ms-marco-MiniLM-L-6-v2",
+    "rerank_candidates": 20,
+    "rerank_batch_size": 16,
+    "rerank_timeout": 1.0
+}
+
+# Chunk embedding during ingestion
+ENCODER_CONFIG = {
+    # An int, or "auto" to time the candidates on the first large document
+    "batch_size": "auto",
+    "batch_candidates": [16, 32, 64, 128],
+    "default_batch_size": 32,
+    # Intra-op threads (torch or ONNX Runtime) per encode; None shares the cores between the
+    # encodes running at once (all cores when only one is, and for queries)
+    "torch_threads": None,
+    # Worker processes for SentenceTransformer's multi-process pool (0 = off)
+    "pool_processes": 0,
+    # Smaller documents are encoded in-process; starting workers costs more
+    "pool_min_chunks": 2000
+}
+
+# Background ingestion jobs
+JOBS_CONFIG = {
+    "jobs_dir": os.path.join(tempfile.gettempdir(), "studymate_jobs"),
+    "max_workers": 2,
+    "poll_interval": 1.0,
+    # Status files of jobs never collected (e.g. before a restart) are
+    # removed after this long
+    "status_max_age_hours": 24
+}
+
+# Memory budget for documents, indexes and per-session state
+RESOURCE_CONFIG = {
+    "memory_budget_mb": 1024,
+    # Anything unused this long is spilled even under budget
+    "idle_seconds": 900,
+    # Over budget, only resources unused this long are spilled
+    "min_idle_seconds": 30,
+    "reaper_interval": 30,
+    "spill_dir": os.path.join(tempfile.gettempdir(), "studymate_spill"),
+    "max_chat_history": 50
+}
+
+# Text-to-speech backends: "gtts" (online, MP3), "espeak" or "pyttsx3"
+# (offline, WAV)
+TTS_CONFIG = {
+    "default_backend": os.getenv("STUDYMATE_TTS_BACKEND", "gtts"),
+    # Per-language overrides, e.g. {"en": "espeak"}
+    "language_backends": {},
+    # Tried in order when the configured backend is not installed
+    "fallback_order": ["gtts", "espeak", "pyttsx3"],
+    # Speaking rate of the offline backends
+    "wpm": 170,
+    "slow_wpm": 120,
+    "timeout_seconds": 120
+}
+
+# Audio book generation
+AUDIOBOOK_CONFIG = {
+    # Outline levels treated as chapters (1 = top level only)
+    "toc_max_level": 1,
+    "min_chapters": 2,
+    # Heading detection when the PDF has no outline
+    "heading_size_ratio": 1.25,
+    "max_heading_chars": 120,
+    # Part size for documents with neither outline nor headings
+    "pages_per_part": 20,
+    # Text per synthesis request; requests run in parallel
+    "max_chars_per_request": 3000,
+    # Concurrent requests per backend: gTTS is a rate-limited remote service,
+    # espeak runs one local process per request
+    "max_workers": {"gtts": 4, "espeak": os.cpu_count() or 1, "pyttsx3": 1},
+    "default_max_workers": 2,
+    # Each part is retried with exponential backoff before its chapter is skipped
+    "retries": 3,
+    "retry_backoff_seconds": 1.0
+}
+
+# Auto Read Mode speech synthesis
+READ_AHEAD_CONFIG = {
+    # Segments synthesised ahead of the one being read, across pages
+    "lookahead": 4,
+    "max_workers": 4,
+    "cache_mb": 64,
+    # How long a rerun waits for the first clip; later ones are added as they finish
+    "wait_seconds": 10
+}
+
+# Page rendering in the PDF reader
+RENDER_CONFIG = {
+    # "png" (lossless), "jpeg" or "webp" (needs Pillow)
+    "image_format": "jpeg",
+    "quality": 70,
+    # Shown first while the full-resolution image renders; 0 disables it
+    "preview_zoom": 0.5,
+    # Page width in CSS pixels when the viewport is unknown (?vw= overrides)
+    "viewport_width": 1000,
+    "device_pixel_ratio": 1.0,
+    "min_zoom": 0.75,
+    "max_zoom": 3.0
+}
+
+# Page overview sprite sheets, rendered in the background per document
+THUMBNAIL_CONFIG = {
+    # Cell size in pixels; pages are scaled to fit the cell
+    "width": 96,
+    "columns": 10,
+    "pages_per_sheet": 50,
+    "image_format": "jpeg",
+    "quality": 60,
+    "max_workers": min(4, os.cpu_count() or 1),
+    "cache_dir": os.path.join(tempfile.gettempdir(), "studymate_thumbnails"),
+    # Least recently used documents' sheets are removed beyond these limits
+    "cache_max_mb": 1024,
+    "cache_max_age_days": 30
+}
+
+# Session snapshots that survive a server restart
+SESSION_CONFIG = {
+    "snapshot_dir": os.environ.get("STUDYMATE_SESSION_DIR", os.path.join(tempfile.gettempdir(), "studymate_sessions")),
+    # Parsed uploads and their indexes, stored by content hash
+    "artifact_dir": os.environ.get("STUDYMATE_ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), "studymate_artifacts")),
+    # Changes within this window are written as one snapshot
+    "debounce_seconds": 0.5,
+    # Least recently used artefacts and snapshots are removed beyond these limits
+    "artifact_max_mb": 4096,
+    "artifact_max_age_days": 30,
+    "snapshot_max_mb": 100,
+    "snapshot_max_age_days": 30,
+    # Snapshot directories are scanned for eviction at most this often
+    "snapshot_evict_interval": 300
+}
+
+# Question answering: "AI" (LLM), "Quick" (extractive) or "Auto"
+ANSWER_CONFIG = {
+    "default_mode": "AI",
+    # Auto mode asks the LLM and falls back to the extractive answer, if it
+    # scores at least this, when the LLM fails or takes longer than
+    # llm_timeout_seconds
+    "fallback_confidence": 0.35,
+    # Opt-in: Auto mode answers extractively at or above this score without
+    # calling the LLM at all (None always asks the LLM)
+    "direct_confidence": None,
+    "llm_timeout_seconds": 20,
+    "weights": {"semantic": 0.6, "lexical": 0.3, "rank": 0.1},
+    "max_sentences": 2,
+    # A second sentence is included when it scores this close to the best
+    "runner_up_ratio": 0.9,
+    "min_sentence_chars": 20
+}
+
+# Memoisation of per-rerun computations
+CACHE_CONFIG = {
+    "memo_max_entries": 128,
+    "show_rerun_timing": False
+}
+
+# Tracing and profiling
+TELEMETRY_CONFIG = {
+    "enabled": True,
+    # Append every span as a JSON line to this file when set
+    "json_log_path": os.environ.get("STUDYMATE_TRACE_LOG"),
+    # Show the admin debug panel, which covers every session in the process;
+    # only enable it where all users are trusted
+    "admin_debug": False,
+    "profiler_interval": 0.001
+}
+
+# Shared course library built ahead of time with preindex.py
+LIBRARY_CONFIG = {
+    # Index path prefix passed to preindex.py --output; unset disables the library
+    "index_path": os.environ.get("STUDYMATE_LIBRARY_INDEX"),
+    "name": "Course Library"
 }
 
 # UI Configuration
@@ -2,23 +2,47 @@
 Main application page for PDF Q&A
 """
 import streamlit as st
-from utils.document_processor import DocumentProcessor
+import streamlit.components.v1 as components
 from utils.search_engine import SearchEngine
 from utils.watsonx_client import WatsonxClient
 from utils.tts_engine import TTSEngine
 from utils.pdf_reader import PDFReader
+from utils.loaded_document import LoadedDocument
+from utils.errors import DocumentError
+from utils.extractive_qa import ExtractiveAnswerer, answer_with_fallback, highlight_html
+from utils.chapter_segmenter import ChapterSegmenter
+from utils.document_store import get_document_store
+from utils.library import get_library_engine, library_documents
+from utils.memo import MemoCache, RerunTimer
+from utils.read_ahead import get_read_ahead, playlist_html
+from utils.resource_manager import SessionResources, get_resource_manager
+from utils.session_snapshot import get_snapshot_writer, hash_secret, new_session_secret
+from utils.thumbnails import get_thumbnail_cache
+from utils.tts_backends import audio_mime_type
+from utils.streamlit_adapter import StreamlitReporter
+from utils.telemetry import TELEMETRY, RequestProfiler
+from config.settings import (
+    ANSWER_CONFIG, CACHE_CONFIG, JOBS_CONFIG, LIBRARY_CONFIG, READ_AHEAD_CONFIG, RENDER_CONFIG, RESOURCE_CONFIG,
+    TELEMETRY_CONFIG
+)
 import time
 from datetime import datetime
 import json
 import base64
+import hashlib
+import uuid
 
 def init_session_state():
     """Initialize session state variables"""
+    # Engines are UI-agnostic; this reporter shows their progress and errors
+    if 'reporter' not in st.session_state:
+        st.session_state.reporter = StreamlitReporter()
+    
     if 'search_engine' not in st.session_state:
-        st.session_state.search_engine = SearchEngine()
+        st.session_state.search_engine = SearchEngine(reporter=st.session_state.reporter)
     
     if 'watsonx_client' not in st.session_state:
-        st.session_state.watsonx_client = WatsonxClient()
+        st.session_state.watsonx_client = WatsonxClient(reporter=st.session_state.reporter)
     
     if 'chat_history' not in st.session_state:
         st.session_state.chat_history = []
@@ -30,28 +54,215 @@ def init_session_state():
         st.session_state.document_stats = {}
     
     if 'tts_engine' not in st.session_state:
-        st.session_state.tts_engine = TTSEngine()
+        st.session_state.tts_engine = TTSEngine(reporter=st.session_state.reporter)
     
     if 'pdf_reader' not in st.session_state:
-        st.session_state.pdf_reader = PDFReader()
-    
-    if 'current_audio' not in st.session_state:
-        st.session_state.current_audio = None
+        st.session_state.pdf_reader = PDFReader(reporter=st.session_state.reporter)
     
     if 'reading_mode' not in st.session_state:
         st.session_state.reading_mode = False
     
     if 'current_reading_segment' not in st.session_state:
         st.session_state.current_reading_segment = 0
+    
+    # This session's reference to its (possibly shared) uploaded document
+    if 'document_handle' not in st.session_state:
+        st.session_state.document_handle = None
+    
+    if 'ingesting' not in st.session_state:
+        st.session_state.ingesting = False
+    
+    if 'memo' not in st.session_state:
+        st.session_state.memo = MemoCache(CACHE_CONFIG["memo_max_entries"])
+    
+    if 'document_hash' not in st.session_state:
+        st.session_state.document_hash = None
+    
+    if 'upload_id' not in st.session_state:
+        st.session_state.upload_id = None
+    
+    # Bumped on every chat history change so memoised lookups can key on it
+    if 'chat_history_version' not in st.session_state:
+        st.session_state.chat_history_version = 0
+    
+    # Heavy per-session state the resource manager may spill while idle.
+    # The session key and its secret are kept in the URL (?sid=&sk=) so a
+    # reconnect after a restart finds this session's snapshot again; the
+    # key alone does not restore it
+    if 'resources' not in st.session_state:
+        session_key = st.query_params.get("sid")
+        session_secret = st.query_params.get("sk")
+        snapshot = get_snapshot_writer().load(session_key, session_secret) if session_key else None
+        if snapshot is None:
+            session_key = uuid.uuid4().hex
+            session_secret = new_session_secret()
+            st.query_params["sid"] = session_key
+            st.query_params["sk"] = session_secret
+        
+        st.session_state.session_key = session_key
+        st.session_state.secret_hash = hash_secret(session_secret)
+        # Resource names show up in the debug panel, so they never carry the key
+        st.session_state.resource_name = f"session:{hashlib.sha256(session_key.encode()).hexdigest()[:12]}"
+        st.session_state.last_snapshot = None
+        st.session_state.resources = SessionResources(st.session_state.memo)
+        get_resource_manager().register(st.session_state.resource_name, st.session_state.resources)
+        if snapshot:
+            restore_session(snapshot)
+
+def session_snapshot() -> dict:
+    """The small, restorable part of this session's state"""
+    return {
+        "document_hash": st.session_state.document_hash,
+        "current_document": st.session_state.current_document,
+        "chat_history": list(st.session_state.chat_history),
+        "current_page": st.session_state.pdf_reader.current_page,
+        "current_reading_segment": st.session_state.current_reading_segment,
+        "reading_mode": st.session_state.reading_mode,
+        "settings": {"tts_language": st.session_state.get("tts_language")},
+        "secret_hash": st.session_state.secret_hash
+    }
+
+def save_session_snapshot():
+    """Queue a snapshot write if anything restorable changed in this run"""
+    snapshot = session_snapshot()
+    if snapshot != st.session_state.last_snapshot:
+        get_snapshot_writer().schedule(st.session_state.session_key, snapshot)
+        st.session_state.last_snapshot = snapshot
+
+def restore_session(snapshot: dict):
+    """Bring back a session from its snapshot"""
+    with TELEMETRY.span("session.restore"):
+        st.session_state.chat_history = snapshot["chat_history"]
+        st.session_state.reading_mode = snapshot["reading_mode"]
+        if snapshot["settings"].get("tts_language"):
+            st.session_state.tts_language = snapshot["settings"]["tts_language"]
+        
+        document_hash = snapshot["document_hash"]
+        if document_hash and document_hash.startswith("library:"):
+            # The library branch of the sidebar mounts it on this run
+            st.session_state.document_source = "library"
+        elif document_hash:
+            # Shares the stored document and engine; nothing is re-embedded
+            handle = get_document_store().restore(document_hash)
+            if handle is None:
+                return
+            st.session_state.document_handle = handle
+            st.session_state.search_engine = handle.engine
+            st.session_state.document_stats = handle.stats
+            st.session_state.current_document = snapshot["current_document"]
+            st.session_state.document_hash = document_hash
+            st.session_state.pdf_reader.load_pdf(handle.document)
+            get_thumbnail_cache().request(handle.document)
+            st.session_state.pdf_reader.current_page = min(
+                snapshot["current_page"], max(st.session_state.pdf_reader.total_pages - 1, 0)
+            )
+            st.session_state.current_reading_segment = snapshot["current_reading_segment"]
+
+def touch_resources():
+    """Mark this session's tracked resources as in use"""
+    content_hash = st.session_state.document_hash
+    get_resource_manager().touch(
+        st.session_state.resource_name, f"document:{content_hash}", f"engine:{content_hash}"
+    )
+
+def release_document():
+    """Drop this session's reference to its uploaded document"""
+    if st.session_state.document_handle:
+        st.session_state.document_handle.release()
+        st.session_state.document_handle = None
+    st.session_state.ingesting = False
 
-def display_loading_animation(text="Processing..."):
-    """Display loading animation"""
-    placeholder = st.empty()
-    for i in range(3):
-        for dots in range(4):
-            placeholder.info(f"{text}{'.' * dots}")
-            time.sleep(0.5)
-    placeholder.empty()
+def upcoming_segments(memo, page: int, segment: int, count: int):
+    """The next ``count`` reading segments as (page, segment, text), running
+    on into the following pages"""
+    reader = st.session_state.pdf_reader
+    document_hash = st.session_state.document_hash
+    upcoming = []
+    while page < reader.total_pages and len(upcoming) < count:
+        text = memo.get_or_compute("page_text", (document_hash, page), lambda: reader.get_page_text(page))
+        segments = memo.get_or_compute(
+            "reading_segments", (document_hash, page), lambda: reader.get_reading_segments(text)
+        )
+        upcoming.extend((page, i, segments[i]) for i in range(segment, len(segments)))
+        page, segment = page + 1, 0
+    return upcoming[:count]
+
+def render_page_overview(memo):
+    """Clickable grid of page thumbnails; picking one jumps the reader there"""
+    reader = st.session_state.pdf_reader
+    thumbnails = get_thumbnail_cache()
+    status = thumbnails.request(reader.document)
+    if status != "ready":
+        st.caption("Page overview is being prepared..." if status == "building" else "Page overview unavailable.")
+        return
+    
+    layout = thumbnails.layout(reader.document.hash)
+    per_sheet = layout["pages_per_sheet"]
+    sheet_index = reader.current_page // per_sheet
+    if len(layout["sheets"]) > 1:
+        sheet_index = st.selectbox(
+            "Pages",
+            range(len(layout["sheets"])),
+            index=sheet_index,
+            format_func=lambda i: f"{i * per_sheet + 1}-{min((i + 1) * per_sheet, layout['page_count'])}"
+        )
+    
+    crops = memo.get_or_compute(
+        "thumbnails", (reader.document.hash, sheet_index),
+        lambda: thumbnails.thumbnails(reader.document.hash, sheet_index)
+    )
+    for row in range(0, len(crops), layout["columns"]):
+        columns = st.columns(layout["columns"])
+        for column, cell in zip(columns, range(row, min(row + layout["columns"], len(crops)))):
+            page = sheet_index * per_sheet + cell
+            with column:
+                st.image(crops[cell], use_column_width=True)
+                if st.button(f"{page + 1}", key=f"thumbnail_{page}", use_container_width=True,
+                             type="primary" if page == reader.current_page else "secondary"):
+                    reader.current_page = page
+                    st.session_state.current_reading_segment = 0
+                    st.rerun()
+
+def render_debug_panel(timer, memo):
+    """Admin panel with rerun timings, engine metrics and the profiler"""
+    with st.sidebar.expander("🛠️ Debug Panel"):
+        st.markdown("**Rerun timing**")
+        st.table(timer.report())
+        st.caption(f"Memo cache: {len(memo)} entries, {memo.hits} hits, {memo.misses} misses")
+        shared = get_document_store().summary()
+        st.caption(f"Document store: {shared['documents']} documents, {shared['references']} session references")
+        
+        usage = get_resource_manager().usage()
+        st.markdown("**Resources**")
+        if usage:
+            st.table([
+                {"resource": name, "MB": round(entry["bytes"] / 2**20, 2), "idle_s": round(entry["idle_s"])}
+                for name, entry in sorted(usage.items())
+            ])
+        st.caption(f"Budget: {RESOURCE_CONFIG['memory_budget_mb']} MB")
+        
+        snapshot = TELEMETRY.snapshot()
+        st.markdown("**Engine spans**")
+        if snapshot["spans"]:
+            st.table([{"span": name, **summary} for name, summary in snapshot["spans"].items()])
+        else:
+            st.caption("No spans recorded yet.")
+        
+        if snapshot["counters"]:
+            st.markdown("**Counters**")
+            st.table([{"counter": name, "value": value} for name, value in snapshot["counters"].items()])
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("Prometheus", TELEMETRY.to_prometheus(), "studymate_metrics.txt", "text/plain")
+        with col2:
+            st.download_button("JSON", TELEMETRY.to_json(), "studymate_metrics.json", "application/json")
+        
+        if st.button("🔬 Profile Next Run"):
+            st.session_state.profile_next_run = True
+        
+        if st.session_state.get("profile_report"):
+            st.text(st.session_state.profile_report)
 
 def main_app():
     # Custom CSS for modern UI
@@ -116,43 +327,144 @@ def main_app():
     st.markdown('<h1 class="main-title">📚 StudyMate AI</h1>', unsafe_allow_html=True)
     st.markdown('<p class="subtitle">Your intelligent companion for academic document analysis with AI-powered features</p>', unsafe_allow_html=True)
     
+    timer = RerunTimer()
+    
+    # Profile this whole run if it was requested from the debug panel
+    profiler = None
+    if st.session_state.pop("profile_next_run", False):
+        profiler = RequestProfiler()
+        profiler.start()
+    
     init_session_state()
-    processor = DocumentProcessor()
+    memo = st.session_state.memo
+    touch_resources()
     
     # Sidebar for document management
     with st.sidebar:
         st.header("📄 Document Management")
         
-        uploaded_file = st.file_uploader(
-            "Upload your PDF document",
-            type=["pdf"],
-            help="Upload academic papers, textbooks, or study materials"
-        )
+        store = get_document_store()
+        library = get_library_engine()
+        uploaded_file = None
+        
+        # A pre-indexed course library is offered next to uploading
+        source = "upload"
+        if library is not None:
+            source = st.radio(
+                "Document source",
+                ["upload", "library"],
+                format_func=lambda s: "Upload a PDF" if s == "upload" else LIBRARY_CONFIG["name"],
+                horizontal=True,
+                key="document_source"
+            )
+        
+        if source == "library":
+            if st.session_state.search_engine is not library:
+                release_document()
+                
+                # The library is shared and read-only; sessions only search it
+                st.session_state.search_engine = library
+                st.session_state.current_document = LIBRARY_CONFIG["name"]
+                st.session_state.document_hash = f"library:{LIBRARY_CONFIG['index_path']}"
+                st.session_state.document_stats = {}
+                st.session_state.current_reading_segment = 0
+                st.session_state.pdf_reader = PDFReader(reporter=st.session_state.reporter)
+                memo.invalidate()
+            
+            documents = library_documents()
+            st.caption(f"{len(documents)} documents, {library.documents.live_count:,} chunks")
+            with st.expander("📚 Library contents"):
+                for name in documents:
+                    st.write(f"• {name}")
+        else:
+            if st.session_state.search_engine is library:
+                st.session_state.search_engine = SearchEngine(reporter=st.session_state.reporter)
+                st.session_state.current_document = None
+                st.session_state.document_hash = None
+                st.session_state.upload_id = None
+            
+            uploaded_file = st.file_uploader(
+                "Upload your PDF document",
+                type=["pdf"],
+                help="Upload academic papers, textbooks, or study materials"
+            )
         
         if uploaded_file is not None:
-            if st.session_state.current_document != uploaded_file.name:
+            # Each upload gets a new file ID, even when the name is unchanged
+            upload_id = getattr(uploaded_file, "file_id", None) or uploaded_file.name
+            document = None
+            if st.session_state.upload_id != upload_id:
+                # Parsed once here; the reader and the ingestion job share it
+                try:
+                    document = LoadedDocument(uploaded_file.getvalue(), uploaded_file.name)
+                except DocumentError as e:
+                    st.session_state.reporter.error(e)
+            st.session_state.upload_id = upload_id
+            
+            if document and document.hash != st.session_state.document_hash:
+                # A revised version of the current document only re-embeds
+                # what changed; its other vectors are copied from this engine
+                engine = st.session_state.search_engine
+                base_engine = engine if uploaded_file.name in engine.documents.document_names else None
+                
                 st.session_state.current_document = uploaded_file.name
+                st.session_state.document_hash = document.hash
+                st.session_state.current_reading_segment = 0
                 
-                with st.spinner("🔄 Processing your document..."):
-                    # Extract text
-                    text = processor.extract_text_from_pdf(uploaded_file)
-                    
-                    # Load PDF for reader
-                    uploaded_file.seek(0)  # Reset file pointer
-                    st.session_state.pdf_reader.load_pdf(uploaded_file)
+                # Everything memoised for the previous document is now stale
+                memo.invalidate()
+                
+                # Sessions uploading the same file share one parse, one
+                # ingestion job and one engine
+                handle = store.acquire(document, uploaded_file.name, base_engine=base_engine)
+                release_document()
+                st.session_state.document_handle = handle
+                st.session_state.ingesting = True
+                
+                # The reader only needs the parsed PDF, so it is usable right away
+                st.session_state.pdf_reader.load_pdf(handle.document)
+                get_thumbnail_cache().request(handle.document)
+                st.session_state.document_stats = {}
+                if base_engine is None:
+                    st.session_state.search_engine = SearchEngine(reporter=st.session_state.reporter)
+        
+        # Background processing status
+        handle = st.session_state.document_handle
+        if handle and st.session_state.ingesting:
+            status = handle.poll()
+            
+            if status["state"] in ("queued", "running"):
+                st.progress(status["progress"], text=f"🔄 {status['stage']}...")
+                if st.button("✖️ Cancel Processing"):
+                    # Other sessions waiting on the same document keep it going
+                    release_document()
+                    st.info("Document processing was cancelled.")
+            else:
+                st.session_state.ingesting = False
+                
+                if status["state"] == "completed" and handle.engine:
+                    st.session_state.search_engine = handle.engine
+                    touch_resources()
                     
-                    if text.strip():
-                        # Get document statistics
-                        st.session_state.document_stats = processor.get_document_stats(text)
-                        
-                        # Process and index document
-                        chunks = processor.chunk_text(text)
-                        st.session_state.search_engine.clear_index()
-                        st.session_state.search_engine.add_documents(chunks, uploaded_file.name)
-                        
-                        st.success("✅ Document processed successfully!")
+                    # A new engine may have pushed the process over budget;
+                    # freeing memory is best effort and must not fail the upload
+                    try:
+                        get_resource_manager().enforce()
+                    except Exception as e:
+                        st.session_state.reporter.warning(f"Could not free memory after processing: {str(e)}")
+                    st.session_state.document_stats = handle.stats
+                    if "reembedded_chunks" in status:
+                        st.success(
+                            f"✅ Document updated: {status['reembedded_chunks']} of "
+                            f"{handle.engine.documents.live_count} chunks re-embedded "
+                            f"({status['changed_pages']} pages changed)"
+                        )
                     else:
-                        st.error("❌ Could not extract text from the PDF")
+                        st.success("✅ Document processed successfully!")
+                elif status["state"] == "cancelled":
+                    st.info("Document processing was cancelled.")
+                else:
+                    st.error(f"❌ Could not process the PDF: {status.get('error') or 'processing was interrupted'}")
         
         # PDF Reader Controls
         if st.session_state.current_document:
@@ -217,9 +529,14 @@ def main_app():
             
             # Suggested questions
             if st.session_state.chat_history:
-                similar_questions = st.session_state.search_engine.get_similar_questions(
-                    question if question else "", st.session_state.chat_history
-                )
+                with timer.span("similar_questions"):
+                    similar_questions = memo.get_or_compute(
+                        "similar_questions",
+                        (question, st.session_state.chat_history_version),
+                        lambda: st.session_state.search_engine.get_similar_questions(
+                            question if question else "", st.session_state.chat_history
+                        )
+                    )
                 
                 if similar_questions:
                     st.info("💡 Similar questions you've asked before:")
@@ -228,6 +545,17 @@ def main_app():
                             st.session_state.question_input = sq
                             st.rerun()
             
+            answer_modes = ["AI", "Auto", "Quick"]
+            answer_mode = st.radio(
+                "Answer mode",
+                options=answer_modes,
+                index=answer_modes.index(ANSWER_CONFIG["default_mode"]),
+                horizontal=True,
+                key="answer_mode",
+                help="Quick quotes the best matching sentences of the document instantly. "
+                     "Auto asks the AI and quotes them instead if the AI is unavailable or too slow."
+            )
+            
             col1, col2 = st.columns([1, 4])
             
             with col1:
@@ -236,6 +564,8 @@ def main_app():
             with col2:
                 if st.button("🗑️ Clear Chat History", use_container_width=True):
                     st.session_state.chat_history = []
+                    st.session_state.chat_history_version += 1
+                    memo.invalidate("similar_questions")
                     st.success("Chat history cleared!")
             
             # TTS Controls for Q&A
@@ -271,27 +601,56 @@ def main_app():
                     search_results = st.session_state.search_engine.search(question, top_k=3)
                 
                 if search_results:
-                    context = "\n\n".join([result[0] for result in search_results])
+                    context = WatsonxClient.format_context(search_results)
                     
-                    # Generate chat history context
-                    chat_context = ""
-                    if st.session_state.chat_history:
-                        recent_chat = st.session_state.chat_history[-3:]  # Last 3 interactions
-                        chat_context = "\n".join([
-                            f"Q: {item['question']}\nA: {item['answer']}\n"
-                            for item in recent_chat
-                        ])
+                    # Generate chat history context from the last 3 interactions
+                    chat_context = WatsonxClient.format_chat_history(st.session_state.chat_history, last_n=3)
                     
                     # Generate answer
-                    with st.spinner("🤖 Generating answer..."):
-                        answer = st.session_state.watsonx_client.generate_answer(
-                            question, context, chat_context
-                        )
+                    extractive = None
+                    answerer = ExtractiveAnswerer(st.session_state.search_engine)
+                    if answer_mode == "Quick":
+                        extractive = answerer.answer(question, search_results)
+                        answer = extractive["answer"] or "No sentence in the document answers this question."
+                    elif answer_mode == "Auto":
+                        with st.spinner("🤖 Generating answer..."):
+                            result = answer_with_fallback(
+                                st.session_state.watsonx_client, answerer, question, search_results, context, chat_context
+                            )
+                        answer = result["answer"]
+                        if result["mode"] == "extractive":
+                            extractive = result
+                            # The LLM ran on a worker thread; its failure is shown from here
+                            if result["error"]:
+                                st.session_state.reporter.warning(result["error"])
+                    else:
+                        with st.spinner("🤖 Generating answer..."):
+                            answer = st.session_state.watsonx_client.generate_answer(
+                                question, context, chat_context
+                            )
                     
                     # Display answer with enhanced formatting
                     st.markdown("### 💬 Answer")
                     st.markdown(f'<div class="feature-card"><p>{answer}</p></div>', unsafe_allow_html=True)
                     
+                    if extractive and extractive["spans"]:
+                        pages = sorted({span["page"] + 1 for span in extractive["spans"] if span["page"] is not None})
+                        caption = (f"⚡ Quick answer quoted from the document · confidence {extractive['confidence']:.2f}"
+                                   f" · {extractive['elapsed_ms']:.0f} ms")
+                        if pages:
+                            caption += " · p. " + ", ".join(str(page) for page in pages)
+                        if extractive.get("fallback"):
+                            caption += " · the AI model was unavailable" if extractive["fallback"] == "error" else " · the AI model was too slow"
+                        st.caption(caption)
+                        
+                        with st.expander("🔎 Where this comes from"):
+                            for span in extractive["spans"]:
+                                location = span["document"] or "Document"
+                                if span["page"] is not None:
+                                    location += f", page {span['page'] + 1}"
+                                st.markdown(f"**{location}** (score {span['score']:.2f})")
+                                st.markdown(highlight_html(span["chunk"], span["text"]), unsafe_allow_html=True)
+                    
                     # TTS for Answer
                     st.markdown('<div class="audio-controls">', unsafe_allow_html=True)
                     col1, col2 = st.columns(2)
@@ -300,6 +659,8 @@ def main_app():
                         if st.button("🔊 Read Answer Aloud", key="read_answer"):
                             audio_bytes = st.session_state.tts_engine.text_to_speech(answer, tts_language, tts_speed)
                             if audio_bytes:
+                                st.session_state.resources.audio = audio_bytes
+                                st.session_state.audio_title = "Answer"
                                 audio_html = st.session_state.tts_engine.get_audio_player_html(audio_bytes, autoplay=True)
                                 st.markdown(audio_html, unsafe_allow_html=True)
                     
@@ -330,8 +691,12 @@ def main_app():
                         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                         "question": question,
                         "answer": answer,
-                        "sources": len(search_results)
+                        "sources": len(search_results),
+                        "mode": "Quick" if extractive else "AI"
                     })
+                    # Older turns are only ever shown as the last few entries
+                    del st.session_state.chat_history[:-RESOURCE_CONFIG["max_chat_history"]]
+                    st.session_state.chat_history_version += 1
                     
                 else:
                     st.warning("⚠️ No relevant context found for your question. Try rephrasing it.")
@@ -344,7 +709,7 @@ def main_app():
                     with st.expander(f"💭 {chat['question'][:60]}... ({chat['timestamp']})"):
                         st.markdown(f"**Q:** {chat['question']}")
                         st.markdown(f"**A:** {chat['answer']}")
-                        st.caption(f"Sources used: {chat['sources']}")
+                        st.caption(f"Sources used: {chat['sources']} · {chat.get('mode', 'AI')} answer")
         
         with tab2:
             st.markdown('<div class="feature-card">', unsafe_allow_html=True)
@@ -415,24 +780,67 @@ def main_app():
                 with col4:
                     st.metric("Total Pages", st.session_state.pdf_reader.total_pages)
                 
+                # Jumping through the overview needs no render of skipped pages
+                with st.expander("🗂️ Page Overview"):
+                    with timer.span("page_overview"):
+                        render_page_overview(memo)
+                
                 # Text highlighting
                 highlight_text = st.text_input("🎯 Highlight text in PDF", placeholder="Enter text to highlight...")
                 
+                # Render just sharp enough for the width the page is shown at;
+                # embedding pages can pass the viewport width as ?vw=
+                requested_width = st.query_params.get("vw", "")
+                default_width = int(requested_width) if requested_width.isdigit() else RENDER_CONFIG["viewport_width"]
+                viewport_width = st.select_slider(
+                    "Page width (px)",
+                    options=sorted({600, 800, 1000, 1400, 2000, default_width}),
+                    value=default_width,
+                    key="page_width"
+                )
+                
                 # Display current page
                 current_page = st.session_state.pdf_reader.current_page
+                document_hash = st.session_state.document_hash
+                zoom = st.session_state.pdf_reader.fit_zoom(current_page, viewport_width)
+                image_key = (document_hash, current_page, highlight_text or None, zoom)
                 
-                if highlight_text:
-                    img_data = st.session_state.pdf_reader.highlight_text_in_page(current_page, highlight_text)
-                else:
-                    img_data = st.session_state.pdf_reader.get_page_image(current_page)
+                st.markdown('<div class="pdf-viewer-container">', unsafe_allow_html=True)
+                page_placeholder = st.empty()
+                st.markdown('</div>', unsafe_allow_html=True)
+                
+                with timer.span("page_image"):
+                    img_data = memo.peek("page_image", image_key)
+                    if img_data is None:
+                        # A quick low-resolution preview goes to the browser
+                        # first and is replaced once the full image is ready
+                        preview = memo.get_or_compute(
+                            "page_preview", (document_hash, current_page),
+                            lambda: st.session_state.pdf_reader.get_page_preview(current_page)
+                        )
+                        if preview:
+                            page_placeholder.image(preview, use_column_width=True)
+                        
+                        if highlight_text:
+                            img_data = memo.get_or_compute(
+                                "page_image", image_key,
+                                lambda: st.session_state.pdf_reader.highlight_text_in_page(current_page, highlight_text, zoom)
+                            )
+                        else:
+                            img_data = memo.get_or_compute(
+                                "page_image", image_key,
+                                lambda: st.session_state.pdf_reader.get_page_image(current_page, zoom)
+                            )
                 
                 if img_data:
-                    st.markdown('<div class="pdf-viewer-container">', unsafe_allow_html=True)
-                    st.image(img_data, use_column_width=True)
-                    st.markdown('</div>', unsafe_allow_html=True)
+                    page_placeholder.image(img_data, use_column_width=True)
                 
                 # Page text and reading features
-                page_text = st.session_state.pdf_reader.get_page_text(current_page)
+                with timer.span("page_text"):
+                    page_text = memo.get_or_compute(
+                        "page_text", (document_hash, current_page),
+                        lambda: st.session_state.pdf_reader.get_page_text(current_page)
+                    )
                 
                 if page_text:
                     with st.expander("📄 Page Text Content"):
@@ -443,10 +851,148 @@ def main_app():
                         st.markdown('<div class="reading-highlight">', unsafe_allow_html=True)
                         st.subheader("🎯 Auto Reading Mode Active")
                         
-                        segments = st.session_state.pdf_reader.get_reading_segments(page_text)
+                        with timer.span("reading_segments"):
+                            segments = memo.get_or_compute(
+                                "reading_segments", (document_hash, current_page),
+                                lambda: st.session_state.pdf_reader.get_reading_segments(page_text)
+                            )
                         
                         if segments:
                             current_segment = st.session_state.current_reading_segment
                             if current_segment < len(segments):
                                 st.markdown(f"**Reading Segment {current_segment + 1}/{len(segments)}:**")
-                                st.markdown(f'<div style="background: #fff3cd; padding: 1rem; border-radius: 8px; font-size: 1.1rem;">{segments[curren
+                                st.markdown(f'<div style="background: #fff3cd; padding: 1rem; border-radius: 8px; font-size: 1.1rem;">{segments[current_segment]}</div>', unsafe_allow_html=True)
+                                
+                                seg_col1, seg_col2 = st.columns(2)
+                                with seg_col1:
+                                    if st.button("⏮️ Previous Segment") and current_segment > 0:
+                                        st.session_state.current_reading_segment -= 1
+                                        st.rerun()
+                                
+                                with seg_col2:
+                                    if st.button("⏭️ Next Segment"):
+                                        st.session_state.current_reading_segment += 1
+                                        st.rerun()
+                            else:
+                                st.success("✅ Finished reading this page")
+                                if st.button("🔁 Restart Page"):
+                                    st.session_state.current_reading_segment = 0
+                                    st.rerun()
+                        
+                        # Spoken reading: the next segments are synthesised
+                        # ahead and played back to back in the browser
+                        if st.checkbox("🔊 Read Aloud", key="read_aloud"):
+                            lookahead = READ_AHEAD_CONFIG["lookahead"]
+                            upcoming = upcoming_segments(
+                                memo, current_page, st.session_state.current_reading_segment, 2 * (lookahead + 1)
+                            )
+                            read_ahead = get_read_ahead()
+                            language = st.session_state.get("tts_language", "en")
+                            
+                            with timer.span("read_ahead"):
+                                items = read_ahead.playlist([text for *_, text in upcoming[:lookahead + 1]], language)
+                                # The following batch is synthesised while this one plays
+                                read_ahead.prefetch([text for *_, text in upcoming[len(items):]], language)
+                            
+                            if items:
+                                components.html(playlist_html(items), height=100 + 90 * len(items), scrolling=True)
+                                if len(upcoming) > len(items) and st.button("⏩ Continue Reading"):
+                                    next_page, next_segment, _ = upcoming[len(items)]
+                                    st.session_state.pdf_reader.current_page = next_page
+                                    st.session_state.current_reading_segment = next_segment
+                                    st.rerun()
+                            elif upcoming:
+                                st.warning("⚠️ Speech is not ready yet. Try again in a moment.")
+                        
+                        st.markdown('</div>', unsafe_allow_html=True)
+            else:
+                st.info("Upload a PDF to use the interactive reader.")
+            
+            st.markdown('</div>', unsafe_allow_html=True)
+        
+        with tab4:
+            st.subheader("🎙️ Audio Features")
+            
+            document = st.session_state.pdf_reader.document
+            if document:
+                with st.expander("📚 Audio Book", expanded=st.session_state.get("show_audiobook_generator", False)):
+                    # Chapters come from the PDF outline, else from its headings
+                    with timer.span("chapters"):
+                        chapters = memo.get_or_compute(
+                            "chapters", document.hash, lambda: ChapterSegmenter().segment(document)
+                        )
+                    
+                    st.table([
+                        {"chapter": chapter["title"], "pages": f"{chapter['start_page'] + 1}-{chapter['end_page']}"}
+                        for chapter in chapters
+                    ])
+                    selected = st.multiselect(
+                        "Chapters to include",
+                        range(len(chapters)),
+                        default=list(range(len(chapters))),
+                        format_func=lambda i: chapters[i]["title"]
+                    )
+                    book_language = st.selectbox(
+                        "Narration language",
+                        options=list(st.session_state.tts_engine.supported_languages.keys()),
+                        format_func=lambda x: st.session_state.tts_engine.supported_languages[x]
+                    )
+                    
+                    if st.button("🎙️ Generate Audio Book", type="primary") and selected:
+                        with st.spinner("Generating audio book..."):
+                            audio_bytes = st.session_state.tts_engine.create_audio_book(
+                                [chapters[i] for i in selected], book_language
+                            )
+                        if audio_bytes:
+                            st.session_state.resources.audio = audio_bytes
+                            st.session_state.audio_title = f"Audio book: {st.session_state.current_document}"
+                
+                audio_bytes = st.session_state.resources.audio
+                if audio_bytes:
+                    st.markdown(f"**{st.session_state.get('audio_title', 'Last audio')}**")
+                    st.audio(audio_bytes, format=audio_mime_type(audio_bytes))
+                    st.markdown(
+                        st.session_state.tts_engine.create_download_link(audio_bytes, f"studymate_{int(time.time())}.mp3"),
+                        unsafe_allow_html=True
+                    )
+            else:
+                st.info("Upload a PDF to generate an audio book.")
+        
+        with tab5:
+            st.subheader("📈 Document Insights")
+            
+            document = st.session_state.pdf_reader.document
+            layout = get_thumbnail_cache().layout(document.hash) if document else None
+            if layout:
+                st.markdown("**Page overview**")
+                per_sheet = layout["pages_per_sheet"]
+                for i in range(len(layout["sheets"])):
+                    st.image(
+                        get_thumbnail_cache().sheet(document.hash, i),
+                        caption=f"Pages {i * per_sheet + 1}-{min((i + 1) * per_sheet, layout['page_count'])}"
+                    )
+            elif document:
+                st.caption("Page overview is being prepared...")
+            else:
+                st.info("Upload a PDF to see its page overview.")
+    
+    else:
+        st.info("👈 Upload a PDF document in the sidebar to get started.")
+    
+    if profiler:
+        st.session_state.profile_report = f"{profiler.kind} report\n\n{profiler.stop()}"
+    
+    # Per-rerun timing report and admin metrics
+    # Not unlockable from the URL: the panel shows every session's resources
+    if TELEMETRY_CONFIG["admin_debug"]:
+        render_debug_panel(timer, memo)
+    elif CACHE_CONFIG["show_rerun_timing"]:
+        with st.sidebar.expander("⏱️ Rerun Timing"):
+            st.table(timer.report())
+    
+    save_session_snapshot()
+    
+    # Keep polling while this session has an upload processing in the background
+    if st.session_state.ingesting:
+        time.sleep(JOBS_CONFIG["poll_interval"])
+        st.rerun()
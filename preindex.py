@@ -0,0 +1,198 @@
+"""
+Bulk pre-indexing of a course library for StudyMate
+
+Walks a directory of PDFs, extracts and chunks them in parallel worker
+processes, embeds the chunks and writes one shared search index. Progress
+is checkpointed to a manifest, so an interrupted run picks up where it
+stopped. Rerunning over a library re-embeds only the changed chunks of
+revised PDFs and drops the chunks of deleted ones. Point LIBRARY_CONFIG["index_path"] (or STUDYMATE_LIBRARY_INDEX)
+at the output and the app mounts it read-only at startup.
+
+    python preindex.py /srv/courses/cs101 --output /srv/studymate/cs101
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from config.settings import MODEL_PARAMS
+from utils.document_processor import DocumentProcessor
+from utils.errors import StudyMateError
+from utils.reporting import RaisingReporter
+from utils.search_engine import MIN_TRAINING_POINTS, SearchEngine
+
+def find_pdfs(root: str):
+    """Relative paths of every PDF below ``root``, in a stable order"""
+    found = []
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if name.lower().endswith(".pdf"):
+                found.append(os.path.relpath(os.path.join(directory, name), root))
+    return sorted(found)
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def file_signature(path: str) -> dict:
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+def is_changed(root: str, relative_path: str, entry: dict) -> bool:
+    """Whether a file differs from its manifest entry, hashing only when the
+    size or modification time suggests it might"""
+    path = os.path.join(root, relative_path)
+    signature = file_signature(path)
+    if all(entry.get(key) == value for key, value in signature.items()):
+        return False
+    return file_hash(path) != entry.get("sha256")
+
+def extract_and_chunk(root: str, relative_path: str, chunk_size: int, overlap: int):
+    """Worker: parse one PDF and split it into per-page chunks"""
+    path = os.path.join(root, relative_path)
+    processor = DocumentProcessor(reporter=RaisingReporter())
+    with open(path, "rb") as f:
+        page_texts = processor.extract_pages_from_pdf(f, progress_callback=lambda _: None)
+    chunks, pages = processor.chunk_pages(page_texts, chunk_size, overlap)
+    return relative_path, file_hash(path), chunks, pages
+
+def load_manifest(output: str) -> dict:
+    path = f"{output}.manifest.json"
+    if not os.path.exists(path):
+        return {"files": {}, "failed": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_checkpoint(engine: SearchEngine, manifest: dict, output: str):
+    """Save the index first and the manifest second, so the manifest never
+    lists files that are missing from the saved index"""
+    if not engine.save_index(output):
+        raise StudyMateError(f"Could not save index to {output}")
+
+    tmp_path = f"{output}.manifest.json.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, f"{output}.manifest.json")
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-index a directory of PDFs into a shared StudyMate library")
+    parser.add_argument("source", help="Directory containing the course PDFs")
+    parser.add_argument("--output", required=True, help="Index path prefix, e.g. /srv/studymate/cs101")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Parallel extraction processes")
+    parser.add_argument("--checkpoint-every", type=int, default=10, help="Save progress every N documents")
+    parser.add_argument("--index-type", default=MODEL_PARAMS["index_type"], help="flat, sq_fp16, sq_int8 or pq")
+    parser.add_argument("--training-sample", type=int, default=10000,
+                        help="Chunks used to train a quantised index")
+    parser.add_argument("--restart", action="store_true", help="Ignore existing progress and rebuild")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    engine = SearchEngine(index_type=args.index_type, reporter=RaisingReporter())
+    manifest = {"files": {}, "failed": {}}
+
+    if not args.restart and os.path.exists(f"{args.output}.manifest.json"):
+        manifest = load_manifest(args.output)
+        # Carrying on without the index would drop every file the manifest lists
+        try:
+            loaded = engine.load_index(args.output)
+        except StudyMateError as e:
+            sys.exit(f"Could not load the existing index at {args.output}: {e.message}; rerun with --restart")
+        if not loaded:
+            sys.exit(f"The existing index at {args.output} is missing or incomplete; rerun with --restart")
+
+    settings = {"chunk_size": MODEL_PARAMS["chunk_size"], "chunk_overlap": MODEL_PARAMS["chunk_overlap"],
+                "embedding_model": MODEL_PARAMS["embedding_model"], "chunking": "per_page"}
+    if manifest.get("settings", settings) != settings:
+        sys.exit("Existing index was built with different settings; rerun with --restart")
+    manifest["settings"] = settings
+
+    sources = find_pdfs(args.source)
+    changed = [p for p in sources if p in manifest["files"] and is_changed(args.source, p, manifest["files"][p])]
+    deleted = [p for p in manifest["files"] if p not in sources]
+    pending = [p for p in sources if p not in manifest["files"]] + changed
+    print(f"{len(manifest['files'])} documents already indexed, {len(pending)} to go "
+          f"({len(changed)} changed, {len(deleted)} deleted)")
+    
+    for path in deleted:
+        engine.update_document([], path)
+        del manifest["files"][path]
+    if not pending:
+        if deleted:
+            save_checkpoint(engine, manifest, args.output)
+        return
+
+    start = time.perf_counter()
+    since_checkpoint = 0
+    manifest["failed"] = {}
+    
+    # Quantised indexes are trained once on a sample spanning several
+    # documents, so early documents wait until there are enough chunks
+    untrained = []
+    training_points = MIN_TRAINING_POINTS.get(args.index_type, 1) if not engine.index.is_trained else 0
+
+    def record(path, digest, chunks):
+        manifest["files"][path] = {"sha256": digest, "chunks": len(chunks),
+                                   **file_signature(os.path.join(args.source, path))}
+
+    def add_document(path, digest, chunks, pages):
+        if path in manifest["files"]:
+            diff = engine.update_document(chunks, path, pages)
+            record(path, digest, chunks)
+            return f"{len(diff['embed'])} of {len(chunks)} chunks re-embedded"
+        
+        if training_points and not engine.index.is_trained:
+            untrained.append((path, digest, chunks, pages))
+            if sum(len(c) for _, _, c, _ in untrained) >= max(training_points, args.training_sample):
+                flush_untrained()
+            return f"{len(chunks)} chunks"
+        
+        engine.add_documents(chunks, path, pages)
+        record(path, digest, chunks)
+        return f"{len(chunks)} chunks"
+
+    def flush_untrained():
+        encoded = [(path, chunks, pages, engine.encode_chunks(chunks)) for path, _, chunks, pages in untrained if chunks]
+        if encoded:
+            engine.train_index(np.vstack([embeddings for *_, embeddings in encoded]))
+        for path, digest, chunks, _ in untrained:
+            record(path, digest, chunks)
+        for path, chunks, pages, embeddings in encoded:
+            engine.add_embeddings(chunks, embeddings, path, pages)
+        untrained.clear()
+
+    # Workers parse PDFs while this process embeds finished ones
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(extract_and_chunk, args.source, path, settings["chunk_size"], settings["chunk_overlap"]): path
+            for path in pending
+        }
+
+        for done, future in enumerate(as_completed(futures), start=1):
+            path = futures[future]
+            try:
+                _, digest, chunks, pages = future.result()
+                summary = add_document(path, digest, chunks, pages)
+                print(f"[{done}/{len(pending)}] {path}: {summary}")
+            except Exception as e:
+                manifest["failed"][path] = str(e)
+                print(f"[{done}/{len(pending)}] {path}: FAILED ({e})", file=sys.stderr)
+
+            since_checkpoint += 1
+            if since_checkpoint >= args.checkpoint_every and not untrained:
+                save_checkpoint(engine, manifest, args.output)
+                since_checkpoint = 0
+
+    flush_untrained()
+    save_checkpoint(engine, manifest, args.output)
+    elapsed = time.perf_counter() - start
+    print(f"Indexed {len(pending) - len(manifest['failed'])} documents in {elapsed:.1f}s "
+          f"({engine.documents.live_count} chunks total, {len(manifest['failed'])} failed)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Splits a PDF into chapters for audio books
+"""
+from collections import Counter
+from typing import Dict, List, Tuple
+from config.settings import AUDIOBOOK_CONFIG
+from utils.loaded_document import LoadedDocument
+from utils.telemetry import traced
+
+class ChapterSegmenter:
+    """Derives chapters with page ranges from a document.
+
+    The PDF's outline (table of contents) is used when it has enough
+    top-level entries. Otherwise headings are detected as lines set in a
+    clearly larger font than the body text. Documents with neither are cut
+    into parts of a fixed number of pages. Chapter text is taken from the
+    document's already-extracted page texts.
+    """
+
+    def __init__(self, config: Dict = None):
+        self.config = config or AUDIOBOOK_CONFIG
+
+    @traced("chapter_segmenter.segment")
+    def segment(self, document: LoadedDocument) -> List[Dict]:
+        """Chapters as dicts with title, start_page, end_page (exclusive),
+        source and content"""
+        starts = self.toc_starts(document)
+        source = "toc"
+        if len(starts) < self.config["min_chapters"]:
+            starts = self.heading_starts(document)
+            source = "headings"
+        if len(starts) < self.config["min_chapters"]:
+            size = self.config["pages_per_part"]
+            starts = [
+                (page, f"Pages {page + 1}-{min(page + size, document.page_count)}")
+                for page in range(0, document.page_count, size)
+            ]
+            source = "pages"
+
+        # Text before the first chapter (title page, preface) is kept too
+        if starts and starts[0][0] > 0:
+            starts.insert(0, (0, "Front matter"))
+
+        page_texts = document.page_texts()
+        chapters = []
+        for i, (start, title) in enumerate(starts):
+            end = starts[i + 1][0] if i + 1 < len(starts) else document.page_count
+            content = "\n".join(page_texts[start:end]).strip()
+            if content:
+                chapters.append({
+                    "title": title,
+                    "start_page": start,
+                    "end_page": end,
+                    "source": source,
+                    "content": content
+                })
+        return chapters
+
+    def toc_starts(self, document: LoadedDocument) -> List[Tuple[int, str]]:
+        """First page and title of each top-level outline entry"""
+        with document.lock:
+            toc = document.doc.get_toc(simple=True)
+
+        starts = {}
+        for level, title, page in toc:
+            # Outline pages are 1-based; entries without a target use -1
+            if level <= self.config["toc_max_level"] and 1 <= page <= document.page_count:
+                starts.setdefault(page - 1, title.strip())
+        return sorted(starts.items())
+
+    def heading_starts(self, document: LoadedDocument) -> List[Tuple[int, str]]:
+        """Pages carrying a heading in the largest font that is used for
+        headings on at least ``min_chapters`` pages"""
+        body_sizes = Counter()
+        page_headings = []
+        for page_num in range(document.page_count):
+            with document.lock:
+                blocks = document.doc[page_num].get_text("dict")["blocks"]
+
+            largest = None
+            for block in blocks:
+                for line in block.get("lines", []):
+                    text = "".join(span["text"] for span in line["spans"]).strip()
+                    if not text:
+                        continue
+                    size = round(max(span["size"] for span in line["spans"]), 1)
+                    body_sizes[size] += len(text)
+                    if len(text) <= self.config["max_heading_chars"] and (largest is None or size > largest[0]):
+                        largest = (size, text)
+            page_headings.append(largest)
+
+        if not body_sizes:
+            return []
+        body_size = body_sizes.most_common(1)[0][0]
+        threshold = body_size * self.config["heading_size_ratio"]
+
+        # Chapter headings are the biggest size that recurs; smaller ones are sections
+        sizes = sorted({h[0] for h in page_headings if h and h[0] >= threshold}, reverse=True)
+        for size in sizes:
+            starts = [(page, h[1]) for page, h in enumerate(page_headings) if h and h[0] >= size]
+            if len(starts) >= self.config["min_chapters"]:
+                return starts
+        return []
@@ -0,0 +1,263 @@
+"""
+Columnar on-disk storage for document chunks and their metadata
+"""
+import hashlib
+import json
+import os
+import pickle
+import numpy as np
+from typing import Dict, Iterator, List
+
+FORMAT_VERSION = 2
+
+def chunk_hash(text: str) -> int:
+    """64-bit content hash of a chunk, stored in the ``hash`` column"""
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+class ChunkStore:
+    """Chunk texts and typed metadata columns, read lazily by chunk ID.
+
+    On disk a store is a UTF-8 text blob plus an offsets array, one ``.npy``
+    array per metadata column and a small JSON manifest. Loaded stores
+    memory-map those files, so only the chunks that are actually read are
+    decoded. Chunks added after loading live in memory until the next save.
+
+    Chunk IDs are positions and only change when the store is compacted.
+    Removed chunks are tombstoned rather than deleted, so IDs held by the
+    search index stay valid; their text is still stored but they are no
+    longer live until ``save`` is given only the live IDs.
+    """
+
+    # Typed metadata columns stored alongside each chunk
+    COLUMNS = {
+        "doc_id": np.int32,
+        "chunk_index": np.int32,
+        # 0-based page the chunk came from, -1 when unknown
+        "page": np.int32,
+        "hash": np.int64,
+    }
+
+    # Values for columns missing from stores written by older versions
+    DEFAULTS = {
+        "page": -1,
+        "hash": 0,
+    }
+
+    def __init__(self):
+        self.document_names = []
+        self._disk_count = 0
+        self._offsets = None
+        self._blob = None
+        self._columns = {name: None for name in self.COLUMNS}
+        self._texts = []
+        self._tail = {name: [] for name in self.COLUMNS}
+        self.removed = set()
+
+    def __len__(self) -> int:
+        return self._disk_count + len(self._texts)
+
+    def __getitem__(self, idx: int) -> str:
+        """Return the text of a chunk by ID"""
+        idx = self._check_index(idx)
+        if idx < self._disk_count:
+            start, end = int(self._offsets[idx]), int(self._offsets[idx + 1])
+            return bytes(self._blob[start:end]).decode("utf-8")
+        return self._texts[idx - self._disk_count]
+
+    def __iter__(self) -> Iterator[str]:
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def _check_index(self, idx: int) -> int:
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(f"chunk id {idx} out of range")
+        return idx
+
+    def _column_value(self, name: str, idx: int):
+        if idx < self._disk_count:
+            return self._columns[name][idx].item()
+        return self._tail[name][idx - self._disk_count]
+
+    def _set_column_value(self, name: str, idx: int, value):
+        if idx < self._disk_count:
+            # Memory-mapped columns are read-only; copy on first write
+            if not self._columns[name].flags.writeable:
+                self._columns[name] = np.array(self._columns[name])
+            self._columns[name][idx] = value
+        else:
+            self._tail[name][idx - self._disk_count] = value
+
+    def memory_bytes(self) -> int:
+        """Approximate heap memory of chunks added since the last load"""
+        columns = sum(len(values) for values in self._tail.values()) * 8
+        return sum(len(text) for text in self._texts) + columns
+
+    @property
+    def live_count(self) -> int:
+        return len(self) - len(self.removed)
+
+    def get_metadata(self, idx: int) -> Dict:
+        """Return the metadata dict for a chunk by ID"""
+        idx = self._check_index(idx)
+        chunk = self[idx]
+        page = self._column_value("page", idx)
+        return {
+            "document_name": self.document_names[self._column_value("doc_id", idx)],
+            "chunk_index": self._column_value("chunk_index", idx),
+            "page": page if page >= 0 else None,
+            "text_preview": chunk[:100] + "..." if len(chunk) > 100 else chunk
+        }
+
+    def document_chunks(self, document_name: str) -> Dict[int, int]:
+        """Map each live chunk ID of a document to its content hash"""
+        if document_name not in self.document_names:
+            return {}
+
+        doc_id = self.document_names.index(document_name)
+        ids = np.nonzero(self._column_array("doc_id") == doc_id)[0]
+        hashes = self._column_array("hash")
+        return {int(idx): int(hashes[idx]) for idx in ids if int(idx) not in self.removed}
+
+    def remove(self, ids: List[int]):
+        """Tombstone chunks so they are no longer live"""
+        for idx in ids:
+            self.removed.add(self._check_index(idx))
+
+    def relocate(self, idx: int, chunk_index: int, page: int):
+        """Update the position of a kept chunk within a revised document"""
+        idx = self._check_index(idx)
+        self._set_column_value("chunk_index", idx, chunk_index)
+        self._set_column_value("page", idx, page)
+
+    def _document_id(self, document_name: str) -> int:
+        if document_name not in self.document_names:
+            self.document_names.append(document_name)
+        return self.document_names.index(document_name)
+
+    def extend(self, chunks: List[str], document_name: str = "", pages: List[int] = None,
+               chunk_indexes: List[int] = None):
+        """Append chunks belonging to one document
+
+        ``pages`` and ``chunk_indexes`` give each chunk's page and position
+        in the document; positions default to the order given.
+        """
+        doc_id = self._document_id(document_name)
+        for i, chunk in enumerate(chunks):
+            self._texts.append(chunk)
+            self._tail["doc_id"].append(doc_id)
+            self._tail["chunk_index"].append(chunk_indexes[i] if chunk_indexes else i)
+            self._tail["page"].append(pages[i] if pages else -1)
+            self._tail["hash"].append(chunk_hash(chunk))
+
+    def _column_array(self, name: str) -> np.ndarray:
+        tail = np.asarray(self._tail[name], dtype=self.COLUMNS[name])
+        if self._disk_count:
+            return np.concatenate([np.asarray(self._columns[name]), tail])
+        return tail
+
+    def live_ids(self) -> np.ndarray:
+        """IDs of the chunks that are not tombstoned, in order"""
+        ids = np.arange(len(self), dtype=np.int64)
+        if self.removed:
+            ids = ids[~np.isin(ids, np.fromiter(self.removed, dtype=np.int64))]
+        return ids
+
+    def save(self, filepath: str, ids: np.ndarray = None):
+        """Write the store next to ``filepath`` in the columnar format
+
+        With ``ids`` only those chunks are written, renumbered from 0 in
+        the order given; this is how tombstoned chunks are compacted away.
+        """
+        compacted = ids is not None
+        ids = ids if compacted else np.arange(len(self), dtype=np.int64)
+        offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+
+        # Stream the text blob so large stores are never fully in memory
+        with open(f"{filepath}.chunks.bin.tmp", "wb") as f:
+            position = 0
+            for new_idx, idx in enumerate(ids):
+                data = self[int(idx)].encode("utf-8")
+                f.write(data)
+                position += len(data)
+                offsets[new_idx + 1] = position
+
+        with open(f"{filepath}.offsets.npy.tmp", "wb") as f:
+            np.save(f, offsets)
+        for name in self.COLUMNS:
+            with open(f"{filepath}.{name}.npy.tmp", "wb") as f:
+                column = self._column_array(name)
+                np.save(f, column[ids] if compacted else column)
+
+        # Replace files only once everything is written; memory maps held by
+        # a previous load keep pointing at the old files until released
+        os.replace(f"{filepath}.chunks.bin.tmp", f"{filepath}.chunks.bin")
+        os.replace(f"{filepath}.offsets.npy.tmp", f"{filepath}.offsets.npy")
+        for name in self.COLUMNS:
+            os.replace(f"{filepath}.{name}.npy.tmp", f"{filepath}.{name}.npy")
+
+        # The manifest is written last and marks the store as complete
+        with open(f"{filepath}.meta.json.tmp", "w", encoding="utf-8") as f:
+            json.dump({
+                "version": FORMAT_VERSION,
+                "count": len(ids),
+                "document_names": self.document_names,
+                "columns": list(self.COLUMNS),
+                "removed": [] if compacted else sorted(self.removed)
+            }, f)
+        os.replace(f"{filepath}.meta.json.tmp", f"{filepath}.meta.json")
+
+    @staticmethod
+    def exists(filepath: str) -> bool:
+        """Check whether a complete store exists at ``filepath``"""
+        return os.path.exists(f"{filepath}.meta.json")
+
+    @staticmethod
+    def legacy_exists(filepath: str) -> bool:
+        """Check whether ``filepath`` holds only the old pickled chunk list"""
+        return os.path.exists(f"{filepath}.pkl") and not ChunkStore.exists(filepath)
+
+    @classmethod
+    def from_legacy(cls, filepath: str) -> "ChunkStore":
+        """Read the ``.pkl`` chunk list written before the columnar format
+
+        Only files this application wrote itself should be imported:
+        unpickling runs arbitrary code.
+        """
+        with open(f"{filepath}.pkl", "rb") as f:
+            data = pickle.load(f)
+
+        store = cls()
+        for chunk, metadata in zip(data["documents"], data["metadata"]):
+            store.extend([chunk], metadata.get("document_name", ""), chunk_indexes=[metadata.get("chunk_index", 0)])
+        return store
+
+    @classmethod
+    def load(cls, filepath: str) -> "ChunkStore":
+        """Memory-map a store previously written with ``save``"""
+        with open(f"{filepath}.meta.json", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        if manifest.get("version") not in (1, FORMAT_VERSION):
+            raise ValueError(f"Unsupported chunk store version: {manifest.get('version')}")
+
+        store = cls()
+        store.document_names = manifest["document_names"]
+        store._disk_count = manifest["count"]
+        store.removed = set(manifest.get("removed", []))
+        store._offsets = np.load(f"{filepath}.offsets.npy", mmap_mode="r")
+        for name, dtype in cls.COLUMNS.items():
+            if name in manifest["columns"]:
+                store._columns[name] = np.load(f"{filepath}.{name}.npy", mmap_mode="r")
+            else:
+                store._columns[name] = np.full(store._disk_count, cls.DEFAULTS[name], dtype=dtype)
+
+        # np.memmap cannot map an empty file
+        if os.path.getsize(f"{filepath}.chunks.bin"):
+            store._blob = np.memmap(f"{filepath}.chunks.bin", dtype=np.uint8, mode="r")
+        else:
+            store._blob = np.zeros(0, dtype=np.uint8)
+
+        return store
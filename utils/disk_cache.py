@@ -0,0 +1,94 @@
+"""
+Size- and age-bounded eviction for the on-disk caches
+
+Document artefacts, session snapshots and thumbnail sprites are stored
+under a content hash or session ID: a group of files sharing that prefix,
+or a directory named after it. ``evict`` removes whole groups, least
+recently used first, until a directory is within its limits. Use is the
+newest modification time in a group; readers ``touch`` entries they serve.
+"""
+import os
+import shutil
+import time
+from typing import Dict, Iterable, List
+from utils.reporting import logger
+from utils.telemetry import TELEMETRY
+
+def _path_bytes(path: str) -> int:
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def cache_entries(directory: str) -> Dict[str, Dict]:
+    """Groups of a cache directory by key, with their paths, size and last use"""
+    entries = {}
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return entries
+    for name in names:
+        path = os.path.join(directory, name)
+        try:
+            size, used = _path_bytes(path), os.path.getmtime(path)
+        except OSError:
+            continue
+        entry = entries.setdefault(name.split(".", 1)[0], {"paths": [], "bytes": 0, "used": 0.0})
+        entry["paths"].append(path)
+        entry["bytes"] += size
+        entry["used"] = max(entry["used"], used)
+    return entries
+
+def touch(path: str):
+    """Mark a cache entry as used now"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+def _remove(paths: List[str]):
+    # JSON files mark an entry as complete in these caches, so they go first
+    for path in sorted(paths, key=lambda p: not p.endswith(".json")):
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        except OSError as e:
+            logger.warning("Could not evict %s: %s", path, e)
+
+def evict(directory: str, max_bytes: int = None, max_age_seconds: float = None,
+          protected: Iterable[str] = ()) -> List[str]:
+    """Remove entries unused for ``max_age_seconds``, then the least recently
+    used ones until the directory holds at most ``max_bytes``
+
+    Keys in ``protected`` (entries in use or being written) are kept.
+    Returns the evicted keys.
+    """
+    protected = set(protected)
+    entries = cache_entries(directory)
+    total = sum(entry["bytes"] for entry in entries.values())
+    now = time.time()
+
+    evicted = []
+    for key, entry in sorted(entries.items(), key=lambda item: item[1]["used"]):
+        expired = max_age_seconds is not None and now - entry["used"] > max_age_seconds
+        over_budget = max_bytes is not None and total > max_bytes
+        if not (expired or over_budget):
+            break
+        if key in protected:
+            continue
+        _remove(entry["paths"])
+        total -= entry["bytes"]
+        evicted.append(key)
+
+    if evicted:
+        TELEMETRY.increment("disk_cache.evicted", len(evicted))
+        logger.info("Evicted %d entries from %s", len(evicted), directory)
+    return evicted
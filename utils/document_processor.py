@@ -1,34 +1,50 @@
 """
 Document processing utilities for PDF handling and text extraction
 """
-import fitz  # PyMuPDF
-import streamlit as st
-from typing import List, Tuple
+from concurrent.futures import CancelledError
+from typing import Callable, List, Tuple
+from utils.errors import DocumentError
+from utils.loaded_document import LoadedDocument
+from utils.reporting import Reporter
+from utils.telemetry import TELEMETRY, traced
 
 class DocumentProcessor:
-    def __init__(self):
+    def __init__(self, reporter: Reporter = None):
         self.supported_formats = ["pdf"]
+        self.reporter = reporter or Reporter()
     
-    def extract_text_from_pdf(self, pdf_file) -> str:
-        """Extract text from PDF file"""
+    @traced("document_processor.extract_text_from_pdf")
+    def extract_text_from_pdf(self, pdf_file, progress_callback: Callable[[float], None] = None) -> str:
+        """Extract text from PDF file
+
+        Progress goes to ``progress_callback`` when given and to the
+        reporter otherwise.
+        """
+        return "".join(page + "\n" for page in self.extract_pages_from_pdf(pdf_file, progress_callback))
+    
+    @traced("document_processor.extract_pages_from_pdf")
+    def extract_pages_from_pdf(self, pdf_file, progress_callback: Callable[[float], None] = None) -> List[str]:
+        """Extract the text of each page of a PDF file
+
+        ``pdf_file`` may be an already ``LoadedDocument``, whose parsed pages
+        and cached texts are then reused instead of parsing the bytes again.
+        """
         try:
-            text = ""
-            doc = fitz.open(stream=pdf_file.read(), filetype="pdf")
-            
-            # Create progress bar
-            progress_bar = st.progress(0)
-            total_pages = len(doc)
+            document = LoadedDocument.from_file(pdf_file)
             
-            for i, page in enumerate(doc):
-                text += page.get_text("text") + "\n"
-                progress_bar.progress((i + 1) / total_pages)
+            report_progress = progress_callback or (
+                lambda fraction: self.reporter.progress("extract_text", fraction)
+            )
+            TELEMETRY.increment("document_processor.pages", document.page_count)
             
-            progress_bar.empty()
-            return text
+            return document.page_texts(report_progress)
+        except CancelledError:
+            raise
         except Exception as e:
-            st.error(f"Error extracting text from PDF: {str(e)}")
-            return ""
+            self.reporter.error(DocumentError(f"Error extracting text from PDF: {str(e)}", e))
+            return []
     
+    @traced("document_processor.chunk_text")
     def chunk_text(self, text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
         """Split text into overlapping chunks"""
         if not text.strip():
@@ -44,6 +60,20 @@ class DocumentProcessor:
         
         return chunks
     
+    def chunk_pages(self, pages: List[str], chunk_size: int = 500, overlap: int = 50) -> Tuple[List[str], List[int]]:
+        """Chunk each page separately and return the chunks with their page numbers
+
+        Chunks never span a page break, so editing one page of a document
+        only changes the chunks of that page.
+        """
+        chunks, page_numbers = [], []
+        for page_num, page_text in enumerate(pages):
+            page_chunks = self.chunk_text(page_text, chunk_size, overlap)
+            chunks.extend(page_chunks)
+            page_numbers.extend([page_num] * len(page_chunks))
+        
+        return chunks, page_numbers
+    
     def get_document_stats(self, text: str) -> dict:
         """Get statistics about the document"""
         if not text:
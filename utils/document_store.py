@@ -0,0 +1,292 @@
+"""
+Process-wide store of uploaded documents, shared between sessions
+
+Documents are keyed by content hash. The first session to upload a file
+starts its ingestion job; sessions uploading the same bytes while it runs
+(or after it finished) attach to that entry instead of parsing and
+embedding again. The parsed document and the finished search engine are
+shared read-only, and an entry is dropped once no session holds it.
+
+Finished documents are also written to disk under their hash, so a
+session restored after a server restart gets them back without
+re-embedding.
+"""
+import json
+import os
+import threading
+import time
+import weakref
+from typing import Dict, Optional
+from config.settings import SESSION_CONFIG
+from utils.disk_cache import evict, touch
+from utils.ingestion_jobs import ACTIVE_STATES, get_job_manager
+from utils.loaded_document import LoadedDocument
+from utils.reporting import logger
+from utils.resource_manager import get_resource_manager
+from utils.search_engine import SearchEngine
+from utils.telemetry import TELEMETRY
+
+class DocumentHandle:
+    """A session's reference to a stored document.
+
+    Dropping the last reference to a handle (e.g. when its session ends)
+    releases it; ``release`` does so immediately.
+    """
+
+    def __init__(self, store: "DocumentStore", content_hash: str):
+        self.store = store
+        self.hash = content_hash
+        self._finalizer = weakref.finalize(self, store._release, content_hash)
+
+    @property
+    def document(self) -> LoadedDocument:
+        return self.store._entries[self.hash]["document"]
+
+    @property
+    def name(self) -> str:
+        return self.store._entries[self.hash]["name"]
+
+    def poll(self) -> Dict:
+        """Ingestion status; once completed the shared engine is ready"""
+        return self.store.poll(self.hash)
+
+    @property
+    def engine(self) -> Optional[SearchEngine]:
+        return self.store._entries[self.hash]["engine"]
+
+    @property
+    def stats(self) -> Dict:
+        return self.store._entries[self.hash]["stats"]
+
+    @property
+    def released(self) -> bool:
+        return not self._finalizer.alive
+
+    def release(self):
+        self._finalizer()
+
+class DocumentStore:
+    """Single-flight ingestion and reference-counted sharing of documents"""
+
+    def __init__(self, job_manager=None, artifact_dir: str = None):
+        self.job_manager = job_manager or get_job_manager()
+        self.artifact_dir = artifact_dir or SESSION_CONFIG["artifact_dir"]
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.evict_artifacts()
+
+    def acquire(self, document: LoadedDocument, name: str, base_engine: SearchEngine = None) -> DocumentHandle:
+        """Share the stored copy of ``document``, ingesting it if it is new
+
+        ``base_engine`` holds an earlier version of the same document; only
+        chunks that changed since then are embedded, the rest of the vectors
+        are copied from it.
+        """
+        with self._lock:
+            entry = self._entries.get(document.hash)
+            
+            # A failed or cancelled ingestion is retried by the next upload
+            if entry is not None and entry["status"] is not None and entry["engine"] is None:
+                entry["status"] = None
+                entry["job_id"] = self.job_manager.submit(entry["document"], entry["name"], SearchEngine())
+            
+            # Stored by an earlier server process: nothing to ingest
+            if entry is None and os.path.exists(f"{self._artifact_path(document.hash)}.json"):
+                entry = self._load_entry(document.hash, document)
+                if entry is not None:
+                    self._entries[document.hash] = entry
+            
+            if entry is None:
+                incremental = base_engine is not None and name in base_engine.documents.document_names
+                entry = {
+                    "document": document,
+                    "name": name,
+                    "refs": 0,
+                    "lock": threading.Lock(),
+                    "base_engine": base_engine if incremental else None,
+                    "engine": None,
+                    "stats": {},
+                    "status": None,
+                    "created": time.time()
+                }
+                # The job only uses the engine to diff and encode
+                entry["job_id"] = self.job_manager.submit(
+                    document, name, base_engine if incremental else SearchEngine(), incremental=incremental
+                )
+                self._entries[document.hash] = entry
+                get_resource_manager().register(f"document:{document.hash}", document)
+            else:
+                TELEMETRY.increment("document_store.shared_uploads")
+            entry["refs"] += 1
+            return DocumentHandle(self, document.hash)
+
+    def restore(self, content_hash: str) -> Optional[DocumentHandle]:
+        """Share a finished document by hash, loading it from disk if no
+        session holds it; None if it was never stored"""
+        prefix = self._artifact_path(content_hash)
+        with self._lock:
+            entry = self._entries.get(content_hash)
+            if entry is None:
+                if not os.path.exists(f"{prefix}.json"):
+                    return None
+                entry = self._load_entry(content_hash)
+                if entry is None:
+                    return None
+                self._entries[content_hash] = entry
+            entry["refs"] += 1
+            return DocumentHandle(self, content_hash)
+
+    def _artifact_path(self, content_hash: str) -> str:
+        return os.path.join(self.artifact_dir, content_hash)
+
+    def evict_artifacts(self):
+        """Keep the stored documents within SESSION_CONFIG's size and age
+        limits; documents held by a session are kept"""
+        with self._lock:
+            in_use = set(self._entries)
+        evict(
+            self.artifact_dir,
+            max_bytes=SESSION_CONFIG["artifact_max_mb"] * 2**20,
+            max_age_seconds=SESSION_CONFIG["artifact_max_age_days"] * 24 * 3600,
+            protected=in_use
+        )
+
+    def _load_entry(self, content_hash: str, document: LoadedDocument = None) -> Optional[Dict]:
+        prefix = self._artifact_path(content_hash)
+        try:
+            with open(f"{prefix}.json", encoding="utf-8") as f:
+                info = json.load(f)
+            document = document or LoadedDocument.from_path(f"{prefix}.pdf", info["name"], content_hash)
+            touch(f"{prefix}.json")
+            
+            # Memory-mapped, so restoring costs no copy of the index
+            engine = SearchEngine()
+            if not engine.load_index(prefix, mmap=True):
+                return None
+        except Exception as e:
+            logger.warning("Could not restore document %s: %s", content_hash, e)
+            return None
+        
+        manager = get_resource_manager()
+        manager.register(f"document:{content_hash}", document)
+        manager.register(f"engine:{content_hash}", engine)
+        TELEMETRY.increment("document_store.restored")
+        return {
+            "document": document,
+            "name": info["name"],
+            "refs": 0,
+            "lock": threading.Lock(),
+            "base_engine": None,
+            "engine": engine,
+            "stats": info["stats"],
+            "status": {"state": "completed", "stage": "Restored", "progress": 1.0},
+            "job_id": None,
+            "created": time.time()
+        }
+
+    def _persist(self, content_hash: str, entry: Dict):
+        """Write a finished document to disk; the JSON file, written last,
+        marks it as complete"""
+        prefix = self._artifact_path(content_hash)
+        if os.path.exists(f"{prefix}.json"):
+            return
+        try:
+            with open(f"{prefix}.pdf.tmp", "wb") as f:
+                f.write(entry["document"].data)
+            os.replace(f"{prefix}.pdf.tmp", f"{prefix}.pdf")
+            if not entry["engine"].save_index(prefix):
+                return
+            with open(f"{prefix}.json.tmp", "w", encoding="utf-8") as f:
+                json.dump({"name": entry["name"], "stats": entry["stats"]}, f)
+            os.replace(f"{prefix}.json.tmp", f"{prefix}.json")
+        except Exception as e:
+            logger.warning("Could not store document %s: %s", content_hash, e)
+            return
+        self.evict_artifacts()
+
+    def poll(self, content_hash: str) -> Dict:
+        """Job status of an entry, building its shared engine on completion"""
+        entry = self._entries[content_hash]
+        
+        # One session finalises; the others wait on the entry lock and then
+        # see the stored status
+        with entry["lock"]:
+            if entry["status"] is not None:
+                return entry["status"]
+            
+            status = self.job_manager.status(entry["job_id"])
+            if status is None or status["state"] in ACTIVE_STATES:
+                return status or {"state": "queued", "stage": "Starting", "progress": 0.0}
+            
+            result = self.job_manager.result(entry["job_id"])
+            if status["state"] == "completed" and result:
+                entry["engine"] = self._build_engine(entry, result)
+                get_resource_manager().register(f"engine:{content_hash}", entry["engine"])
+                entry["stats"] = result["stats"]
+                if result["diff"] is not None:
+                    status["reembedded_chunks"] = len(result["diff"]["embed"])
+                    status["changed_pages"] = len({result["pages"][i] for i in result["diff"]["embed"]})
+                
+                # Written in the background; the engine is read-only from here on
+                threading.Thread(
+                    target=self._persist, args=(content_hash, entry), name="studymate-persist", daemon=True
+                ).start()
+            entry["base_engine"] = None
+            entry["status"] = status
+            return status
+
+    @staticmethod
+    def _build_engine(entry: Dict, result: Dict) -> SearchEngine:
+        embeddings = result["embeddings"]
+        if result["diff"] is not None:
+            embeddings = entry["base_engine"].assemble_embeddings(
+                result["diff"], embeddings, len(result["chunks"])
+            )
+        
+        engine = SearchEngine()
+        engine.add_embeddings(result["chunks"], embeddings, entry["name"], result["pages"])
+        
+        # Shared between sessions: a session uploading something else gets
+        # a new engine rather than clearing this one
+        engine.read_only = True
+        return engine
+
+    def _release(self, content_hash: str):
+        with self._lock:
+            entry = self._entries.get(content_hash)
+            if entry is None:
+                return
+            entry["refs"] -= 1
+            if entry["refs"] > 0:
+                return
+            del self._entries[content_hash]
+        
+        # Its last use, for evicting stored documents
+        touch(f"{self._artifact_path(content_hash)}.json")
+        
+        # Nobody is waiting for it any more; cancel first so a job finishing
+        # right now cannot store a result after the check below
+        if entry["status"] is None:
+            self.job_manager.cancel(entry["job_id"])
+            status = self.job_manager.status(entry["job_id"])
+            if status is None or status["state"] not in ACTIVE_STATES:
+                self.job_manager.result(entry["job_id"])
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {
+                "documents": len(self._entries),
+                "references": sum(entry["refs"] for entry in self._entries.values())
+            }
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_document_store() -> DocumentStore:
+    """Process-wide document store shared by every session"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DocumentStore()
+        return _store
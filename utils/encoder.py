@@ -0,0 +1,218 @@
+"""
+Chunk encoding for ingestion: batch-size autotuning, torch thread limits
+and an optional multi-process pool
+
+torch is only touched once something is encoded, and never for an ONNX
+embedder or when it is not installed; ONNX embedders get their thread
+share through a session created for it.
+"""
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+from typing import Callable, Dict, List
+from config.settings import ENCODER_CONFIG, JOBS_CONFIG
+from utils.telemetry import TELEMETRY
+
+_active_encodes = 0
+_threads_lock = threading.Lock()
+
+def default_threads(concurrent: int = 1) -> int:
+    """Intra-op threads for each of ``concurrent`` encodes running at once
+
+    The cores are divided between them, since the runtime would otherwise
+    give every one of them all cores. A single encode, a query or a
+    re-ranking call gets every core.
+    """
+    concurrent = min(max(1, concurrent), JOBS_CONFIG["max_workers"])
+    return max(1, (os.cpu_count() or 1) // concurrent)
+
+def _set_torch_threads(threads: int):
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+@contextmanager
+def torch_thread_share(threads: int = None, set_torch: bool = True):
+    """Limit torch intra-op threads while a chunk encode runs
+
+    torch's thread count is process-wide, so it is recomputed whenever an
+    encode starts or ends: concurrent ingestion jobs share the cores, and
+    once none is running, query encoding and re-ranking get all of them
+    again. ``threads`` pins the count during the encode instead.
+
+    Encodes that don't run on torch pass ``set_torch=False``: they are
+    counted and given their share, which they apply themselves.
+    """
+    global _active_encodes
+    
+    with _threads_lock:
+        _active_encodes += 1
+        active = threads or default_threads(_active_encodes)
+        if set_torch:
+            _set_torch_threads(active)
+    try:
+        yield active
+    finally:
+        with _threads_lock:
+            _active_encodes -= 1
+            if set_torch:
+                _set_torch_threads(default_threads(_active_encodes))
+
+class EncodeEngine:
+    """Encodes chunk batches with a tuned batch size, in-process or on a pool.
+
+    One engine is shared by every session; the tuned batch size and the
+    worker pool are per process.
+    """
+
+    def __init__(self, config: Dict = None):
+        self.config = dict(ENCODER_CONFIG, **(config or {}))
+        self._lock = threading.Lock()
+        self._tuned = {}
+        self._pool = None
+        self._pool_model = None
+        self.last_run = {}
+
+    def batch_size(self, embedder) -> int:
+        """Configured or already tuned batch size for ``embedder``"""
+        if self.config["batch_size"] != "auto":
+            return int(self.config["batch_size"])
+        return self._tuned.get(id(embedder), self.config["default_batch_size"])
+
+    def _autotune(self, embedder, chunks: List[str], progress: Callable[[int], None]):
+        """Time each candidate batch size on consecutive slices of ``chunks``
+
+        Each slice is real work whose embeddings are kept, so tuning costs
+        nothing beyond encoding the first chunks with slower settings.
+        """
+        embeddings, rates = [], {}
+        position = 0
+        for batch_size in self.config["batch_candidates"]:
+            # A few batches per candidate smooths out the first-call overhead
+            sample = chunks[position:position + batch_size * 4]
+            start = time.perf_counter()
+            embeddings.append(embedder.encode(sample, batch_size=batch_size, convert_to_numpy=True))
+            rates[batch_size] = len(sample) / max(time.perf_counter() - start, 1e-9)
+            position += len(sample)
+            progress(position)
+
+        best = max(rates, key=rates.get)
+        self._tuned[id(embedder)] = best
+        TELEMETRY.increment("encoder.autotune_runs")
+        return embeddings, position, rates
+
+    def _tuning_size(self) -> int:
+        return sum(size * 4 for size in self.config["batch_candidates"])
+
+    def _get_pool(self, embedder):
+        """Start SentenceTransformer's multi-process pool on first use"""
+        with self._lock:
+            if self._pool is not None and self._pool_model is not embedder:
+                self._stop_pool()
+            if self._pool is None:
+                processes = self.config["pool_processes"]
+                
+                # Workers are spawned with this environment, so each gets its
+                # share of the cores instead of all of them
+                previous = os.environ.get("OMP_NUM_THREADS")
+                os.environ["OMP_NUM_THREADS"] = str(max(1, (os.cpu_count() or 1) // processes))
+                try:
+                    self._pool = embedder.start_multi_process_pool(target_devices=["cpu"] * processes)
+                finally:
+                    if previous is None:
+                        os.environ.pop("OMP_NUM_THREADS")
+                    else:
+                        os.environ["OMP_NUM_THREADS"] = previous
+                self._pool_model = embedder
+                atexit.register(self.close)
+            return self._pool
+
+    def _stop_pool(self):
+        if self._pool is not None:
+            self._pool_model.stop_multi_process_pool(self._pool)
+            self._pool = None
+            self._pool_model = None
+
+    def close(self):
+        """Stop the worker pool, if one was started"""
+        with self._lock:
+            self._stop_pool()
+
+    def use_pool(self, embedder, count: int) -> bool:
+        return (
+            self.config["pool_processes"] > 1
+            and count >= self.config["pool_min_chunks"]
+            and hasattr(embedder, "start_multi_process_pool")
+        )
+
+    def encode(self, embedder, chunks: List[str], progress_callback: Callable[[float], None] = None,
+               batch_size: int = None) -> np.ndarray:
+        """Embed ``chunks``, reporting the fraction done after each batch"""
+        if not chunks:
+            return np.zeros((0, embedder.get_sentence_embedding_dimension()), dtype=np.float32)
+        
+        # ONNX Runtime sessions take their thread count per embedder instead
+        # of from torch
+        onnx = hasattr(embedder, "with_threads")
+        with torch_thread_share(self.config.get("torch_threads"), set_torch=not onnx) as threads:
+            limited = embedder.with_threads(threads) if onnx else embedder
+            return self._encode(limited, chunks, threads, progress_callback, batch_size)
+    
+    def _encode(self, embedder, chunks: List[str], threads: int, progress_callback, batch_size: int) -> np.ndarray:
+        report = (lambda done: progress_callback(done / len(chunks))) if progress_callback else (lambda done: None)
+        start = time.perf_counter()
+        embeddings, position, rates = [], 0, None
+        
+        if (batch_size is None and self.config["batch_size"] == "auto"
+                and id(embedder) not in self._tuned and len(chunks) >= self._tuning_size()):
+            embeddings, position, rates = self._autotune(embedder, chunks, report)
+        
+        batch_size = batch_size or self.batch_size(embedder)
+        pooled = self.use_pool(embedder, len(chunks) - position)
+        
+        if pooled:
+            pool = self._get_pool(embedder)
+            processes = self.config["pool_processes"]
+            
+            # Hand the pool a few batches per worker at a time so progress
+            # (and cancellation) is reported between blocks
+            block = batch_size * processes * 4
+            for i in range(position, len(chunks), block):
+                embeddings.append(embedder.encode_multi_process(
+                    chunks[i:i + block], pool, batch_size=batch_size, chunk_size=batch_size * 2
+                ))
+                report(min(i + block, len(chunks)))
+        else:
+            for i in range(position, len(chunks), batch_size):
+                embeddings.append(embedder.encode(
+                    chunks[i:i + batch_size], batch_size=batch_size, convert_to_numpy=True
+                ))
+                report(min(i + batch_size, len(chunks)))
+        
+        elapsed = time.perf_counter() - start
+        self.last_run = {
+            "chunks": len(chunks),
+            "seconds": elapsed,
+            "chunks_per_sec": len(chunks) / max(elapsed, 1e-9),
+            "batch_size": batch_size,
+            "processes": self.config["pool_processes"] if pooled else 1,
+            "torch_threads": threads,
+            "autotune": rates
+        }
+        return np.vstack(embeddings)
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_encode_engine() -> EncodeEngine:
+    """Process-wide encode engine shared by all sessions"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = EncodeEngine()
+        return _engine
@@ -0,0 +1,37 @@
+"""
+Structured exceptions raised or reported by the StudyMate engines
+"""
+
+class StudyMateError(Exception):
+    """Base class for engine errors.
+
+    ``message`` is suitable for showing to a student; ``cause`` keeps the
+    underlying exception and ``context`` any identifiers (page number,
+    file path, ...) useful for logging.
+    """
+
+    def __init__(self, message: str, cause: Exception = None, **context):
+        super().__init__(message)
+        self.message = message
+        self.cause = cause
+        self.context = context
+
+    def to_dict(self) -> dict:
+        return {
+            "type": type(self).__name__,
+            "message": self.message,
+            "cause": repr(self.cause) if self.cause else None,
+            "context": self.context
+        }
+
+class DocumentError(StudyMateError):
+    """A PDF could not be opened, read or rendered"""
+
+class SearchIndexError(StudyMateError):
+    """The search index could not be built, modified, saved or loaded"""
+
+class ModelError(StudyMateError):
+    """A language or embedding model could not be loaded or called"""
+
+class SpeechError(StudyMateError):
+    """Speech synthesis failed"""
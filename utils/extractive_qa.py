@@ -0,0 +1,142 @@
+"""
+Extractive answers: the best matching sentences of the retrieved chunks
+
+A fast path next to the LLM. Sentences of the chunks returned by search
+are scored against the question by embedding similarity and word
+overlap, and the best ones are returned verbatim with their page, in
+milliseconds and without a model call. The score doubles as a
+confidence, so callers can decide when an extractive answer is enough.
+"""
+import html
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Dict, List, Tuple
+import numpy as np
+from config.settings import ANSWER_CONFIG
+from utils.errors import ModelError
+from utils.telemetry import TELEMETRY, traced
+
+STOPWORDS = set((
+    "a an and are as at be by can could did do does for from had has have how i in is it its "
+    "me my of on or so than that the their them there these they this to was we were what when "
+    "where which who whom why will with would you your explain describe define tell about"
+).split())
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9"(])')
+
+def content_words(text: str) -> set:
+    return {word for word in re.findall(r"[a-z0-9]+", text.lower()) if word not in STOPWORDS and len(word) > 1}
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence.strip() for sentence in _SENTENCE_END.split(" ".join(text.split())) if sentence.strip()]
+
+class ExtractiveAnswerer:
+    """Answers questions from search results without calling the LLM"""
+
+    def __init__(self, search_engine, config: Dict = None):
+        self.search_engine = search_engine
+        self.config = config or ANSWER_CONFIG
+
+    def _semantic_scores(self, question: str, sentences: List[str]) -> np.ndarray:
+        """Cosine similarity of each sentence to the question, mapped to 0..1"""
+        vectors = self.search_engine.embedder.encode([question] + sentences, convert_to_numpy=True)
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return np.clip(vectors[1:] @ vectors[0], 0.0, 1.0)
+
+    @traced("extractive_qa.answer")
+    def answer(self, question: str, search_results: List[Tuple[str, float, dict]]) -> Dict:
+        """Best sentences for ``question`` with their page and score
+
+        Returns ``answer`` (the best sentences in document order),
+        ``confidence`` (0..1), ``spans`` and ``elapsed_ms``.
+        """
+        start = time.perf_counter()
+        candidates = []
+        for rank, (chunk, _, metadata) in enumerate(search_results):
+            for sentence in split_sentences(chunk):
+                if len(sentence) >= self.config["min_sentence_chars"]:
+                    candidates.append({
+                        "text": sentence,
+                        "chunk": chunk,
+                        "rank": rank,
+                        "page": metadata.get("page"),
+                        "document": metadata.get("document_name")
+                    })
+
+        if not candidates:
+            return {"answer": "", "confidence": 0.0, "spans": [], "elapsed_ms": 0.0}
+
+        question_words = content_words(question)
+        lexical = np.array([
+            len(question_words & content_words(c["text"])) / len(question_words) if question_words else 0.0
+            for c in candidates
+        ])
+        semantic = self._semantic_scores(question, [c["text"] for c in candidates])
+        # Sentences from better-ranked chunks win ties
+        rank_bonus = np.array([1.0 / (1 + c["rank"]) for c in candidates])
+
+        weights = self.config["weights"]
+        scores = (weights["semantic"] * semantic + weights["lexical"] * lexical
+                  + weights["rank"] * rank_bonus) / sum(weights.values())
+        order = np.argsort(-scores)
+
+        spans = []
+        for i in order[:self.config["max_sentences"]]:
+            # Runners-up only make it in when nearly as good as the best
+            if spans and scores[i] < scores[order[0]] * self.config["runner_up_ratio"]:
+                break
+            spans.append({**candidates[i], "score": float(scores[i]), "position": int(i)})
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        TELEMETRY.increment("extractive_qa.answers")
+        return {
+            "answer": " ".join(span["text"] for span in sorted(spans, key=lambda span: span["position"])),
+            "confidence": float(scores[order[0]]),
+            "spans": spans,
+            "elapsed_ms": elapsed_ms
+        }
+
+def highlight_html(chunk: str, sentence: str) -> str:
+    """A chunk as HTML with ``sentence`` marked"""
+    text = html.escape(" ".join(chunk.split()))
+    marked = html.escape(sentence)
+    return text.replace(marked, f'<mark style="background: #fff3cd;">{marked}</mark>', 1)
+
+def answer_with_fallback(client, answerer: ExtractiveAnswerer, question: str, search_results,
+                         context: str, chat_context: str = "") -> Dict:
+    """Auto mode: the LLM's answer, or the extractive one if the LLM fails
+    or is slow and the extractive answer is confident enough
+
+    With ANSWER_CONFIG["direct_confidence"] set, a sufficiently confident
+    extractive answer is returned without calling the LLM.
+
+    Returns the extractive result dict with ``mode`` set to "extractive",
+    or ``{"mode": "llm", "answer": ...}``. Both carry ``fallback`` ("error",
+    "timeout" or False) and ``error``: the LLM's failure message, or None.
+    The LLM runs on a worker thread, so reporting it is left to the caller.
+    """
+    extractive = answerer.answer(question, search_results)
+    direct_confidence = ANSWER_CONFIG["direct_confidence"]
+    if direct_confidence is not None and extractive["confidence"] >= direct_confidence:
+        return {**extractive, "mode": "extractive", "fallback": False, "error": None}
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(client.generate_answer_or_raise, question, context, chat_context)
+    # A slow request is abandoned, not waited for
+    executor.shutdown(wait=False)
+    try:
+        answer = future.result(timeout=ANSWER_CONFIG["llm_timeout_seconds"])
+        return {"mode": "llm", "answer": answer, "fallback": False, "error": None}
+    except TimeoutError:
+        TELEMETRY.increment("extractive_qa.llm_timeouts")
+        reason = "timeout"
+        error = f"The AI model did not answer within {ANSWER_CONFIG['llm_timeout_seconds']} seconds."
+    except ModelError as e:
+        TELEMETRY.increment("extractive_qa.llm_failures")
+        reason = "error"
+        error = e.message
+
+    if extractive["confidence"] >= ANSWER_CONFIG["fallback_confidence"]:
+        return {**extractive, "mode": "extractive", "fallback": reason, "error": error}
+    return {"mode": "llm", "answer": error, "fallback": False, "error": error}
@@ -0,0 +1,229 @@
+"""
+Background ingestion jobs so uploads don't block the Streamlit script thread
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from typing import Dict, Optional
+from config.settings import JOBS_CONFIG, MODEL_PARAMS
+from utils.disk_cache import evict
+from utils.document_processor import DocumentProcessor
+from utils.errors import DocumentError, StudyMateError
+from utils.loaded_document import LoadedDocument
+from utils.reporting import RaisingReporter
+
+ACTIVE_STATES = ("queued", "running")
+
+class IngestionJobManager:
+    """Runs extraction, chunking and embedding of uploads on a thread pool.
+
+    Job status is mirrored to a JSON file per job so it survives reruns and
+    can be inspected after a restart; results stay in memory until the
+    owning session collects them. A job and its file are forgotten once
+    its result is collected or, for cancelled jobs, once its worker stops;
+    files left by earlier processes are removed after
+    ``JOBS_CONFIG["status_max_age_hours"]``.
+    """
+
+    def __init__(self, jobs_dir: str = None, max_workers: int = None):
+        self.jobs_dir = jobs_dir or JOBS_CONFIG["jobs_dir"]
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        evict(self.jobs_dir, max_age_seconds=JOBS_CONFIG["status_max_age_hours"] * 3600)
+
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or JOBS_CONFIG["max_workers"],
+            thread_name_prefix="studymate-ingest"
+        )
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._cancel_events = {}
+        self._results = {}
+
+    def submit(self, document: LoadedDocument, file_name: str, search_engine, incremental: bool = False) -> str:
+        """Queue an upload for processing and return its job ID
+
+        ``document`` is the session's parsed upload; the job extracts text
+        from it rather than parsing the file again. With ``incremental`` the
+        upload is a new version of a document already in ``search_engine``
+        and only its changed chunks are embedded.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+
+        with self._lock:
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "file_name": file_name,
+                "state": "queued",
+                "stage": "Waiting for a free worker",
+                "progress": 0.0,
+                "error": None,
+                "created": now,
+                "updated": now
+            }
+            self._cancel_events[job_id] = threading.Event()
+        self._persist(job_id)
+
+        self.executor.submit(self._run, job_id, document, file_name, search_engine, incremental)
+        return job_id
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        """Return a snapshot of a job's status"""
+        with self._lock:
+            if job_id in self._jobs:
+                return dict(self._jobs[job_id])
+
+        # Jobs from a previous server process only exist on disk
+        path = self._status_path(job_id)
+        if not os.path.exists(path):
+            return None
+
+        with open(path, encoding="utf-8") as f:
+            status = json.load(f)
+        if status["state"] in ACTIVE_STATES:
+            status["state"] = "interrupted"
+        return status
+
+    def result(self, job_id: str) -> Optional[Dict]:
+        """Hand over the result of a completed job and forget it"""
+        return self._forget(job_id)
+
+    def cancel(self, job_id: str):
+        """Ask a queued or running job to stop at the next checkpoint
+
+        The job is forgotten when its worker stops.
+        """
+        with self._lock:
+            event = self._cancel_events.get(job_id)
+        if event:
+            event.set()
+
+    def active_jobs(self) -> int:
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job["state"] in ACTIVE_STATES)
+
+    def _status_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _remove_status_file(self, job_id: str):
+        try:
+            os.remove(self._status_path(job_id))
+        except FileNotFoundError:
+            pass
+
+    def _forget(self, job_id: str) -> Optional[Dict]:
+        """Drop a job, its status file and its result, which is returned"""
+        with self._lock:
+            self._cancel_events.pop(job_id, None)
+            self._jobs.pop(job_id, None)
+            result = self._results.pop(job_id, None)
+        self._remove_status_file(job_id)
+        return result
+
+    def _persist(self, job_id: str):
+        with self._lock:
+            if job_id not in self._jobs:
+                return
+            status = dict(self._jobs[job_id])
+
+        tmp_path = self._status_path(job_id) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(status, f)
+        os.replace(tmp_path, self._status_path(job_id))
+
+        # Forgotten while being written: don't leave the file behind
+        with self._lock:
+            forgotten = job_id not in self._jobs
+        if forgotten:
+            self._remove_status_file(job_id)
+
+    def _update(self, job_id: str, persist: bool = True, **fields):
+        with self._lock:
+            if job_id not in self._jobs:
+                return
+            self._jobs[job_id].update(fields, updated=time.time())
+        if persist:
+            self._persist(job_id)
+
+    def _progress_callback(self, job_id: str, start: float, end: float):
+        """Map a stage's own 0..1 progress onto the job's overall range"""
+        with self._lock:
+            event = self._cancel_events[job_id]
+
+        def report(fraction: float):
+            if event.is_set():
+                raise CancelledError()
+            self._update(job_id, persist=False, progress=start + (end - start) * fraction)
+
+        return report
+
+    def _run(self, job_id: str, document: LoadedDocument, file_name: str, search_engine, incremental: bool):
+        # Errors surface as structured exceptions and end up in the job status
+        processor = DocumentProcessor(reporter=RaisingReporter())
+        with self._lock:
+            event = self._cancel_events.get(job_id)
+        if event is None:
+            return
+
+        try:
+            if event.is_set():
+                raise CancelledError()
+
+            self._update(job_id, state="running", stage="Extracting text")
+            page_texts = processor.extract_pages_from_pdf(
+                document, progress_callback=self._progress_callback(job_id, 0.0, 0.3)
+            )
+            text = "".join(page + "\n" for page in page_texts)
+            if not text.strip():
+                raise DocumentError("Could not extract text from the PDF")
+
+            self._update(job_id, stage="Chunking text", progress=0.3)
+            stats = processor.get_document_stats(text)
+            chunks, pages = processor.chunk_pages(page_texts, MODEL_PARAMS["chunk_size"], MODEL_PARAMS["chunk_overlap"])
+
+            # Only chunks whose content changed since the indexed version need embedding
+            diff = search_engine.diff_document(chunks, file_name) if incremental else None
+            to_embed = [chunks[i] for i in diff["embed"]] if diff else chunks
+
+            self._update(job_id, stage="Creating embeddings", progress=0.35)
+            encode_start = time.perf_counter()
+            embeddings = search_engine.encode_chunks(
+                to_embed, progress_callback=self._progress_callback(job_id, 0.35, 1.0)
+            ) if to_embed else None
+            chunks_per_sec = len(to_embed) / max(time.perf_counter() - encode_start, 1e-9)
+
+            # A job cancelled after its last checkpoint must not leave a result behind
+            if event.is_set():
+                raise CancelledError()
+
+            with self._lock:
+                self._results[job_id] = {
+                    "file_name": file_name,
+                    "stats": stats,
+                    "chunks": chunks,
+                    "pages": pages,
+                    "diff": diff,
+                    "embeddings": embeddings
+                }
+            self._update(job_id, state="completed", stage="Done", progress=1.0, chunks_per_sec=chunks_per_sec)
+        except CancelledError:
+            # Nobody collects a cancelled job's result
+            self._forget(job_id)
+        except StudyMateError as e:
+            self._update(job_id, state="failed", stage="Failed", error=e.message, error_detail=e.to_dict())
+        except Exception as e:
+            self._update(job_id, state="failed", stage="Failed", error=str(e))
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_job_manager() -> IngestionJobManager:
+    """Process-wide job manager shared by every session"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = IngestionJobManager()
+        return _manager
@@ -0,0 +1,42 @@
+"""
+Read-only course library index shared by every session in the process
+"""
+import json
+import os
+import threading
+from typing import Optional
+from config.settings import LIBRARY_CONFIG
+from utils.reporting import Reporter
+from utils.search_engine import SearchEngine
+
+_engine = None
+_loaded = False
+_lock = threading.Lock()
+
+def get_library_engine() -> Optional[SearchEngine]:
+    """Memory-map the pre-built library index once per process.
+
+    Returns None when no library is configured or it cannot be loaded.
+    The engine is read-only, so sessions can search it concurrently but
+    must never add to or clear it.
+    """
+    global _engine, _loaded
+
+    with _lock:
+        if not _loaded:
+            _loaded = True
+            path = LIBRARY_CONFIG.get("index_path")
+            if path:
+                engine = SearchEngine(reporter=Reporter())
+                if engine.load_index(path, mmap=True):
+                    _engine = engine
+        return _engine
+
+def library_documents() -> list:
+    """Names of the documents in the library, from the preindex manifest"""
+    path = LIBRARY_CONFIG.get("index_path")
+    if not path or not os.path.exists(f"{path}.manifest.json"):
+        return []
+
+    with open(f"{path}.manifest.json", encoding="utf-8") as f:
+        return sorted(json.load(f).get("files", {}))
@@ -0,0 +1,146 @@
+"""
+One parsed PDF shared by text extraction, chunking, rendering and metadata
+"""
+import hashlib
+import threading
+from typing import Callable, Dict, List, Optional
+from utils.errors import DocumentError
+from utils.resource_manager import Spillable
+from utils.telemetry import TELEMETRY
+
+def encode_pixmap(pix, image_format: str = "png", quality: int = 80) -> bytes:
+    """Encode a rendered page as PNG, JPEG (``quality`` 1-100) or WebP"""
+    image_format = image_format.lower()
+    if image_format == "png":
+        return pix.tobytes("png")
+    if image_format in ("jpeg", "jpg"):
+        return pix.tobytes("jpeg", jpg_quality=quality)
+    if image_format == "webp":
+        # PyMuPDF has no WebP writer; Pillow comes with Streamlit
+        return pix.pil_tobytes(format="WEBP", quality=quality)
+    raise ValueError(f"Unsupported image format: {image_format}")
+
+class LoadedDocument(Spillable):
+    """An uploaded PDF, parsed once.
+
+    Holds the single copy of the file's bytes and the open PyMuPDF
+    document. Page texts are extracted at most once and then served from
+    memory. PyMuPDF documents must not be used from two threads at a time,
+    so every access goes through ``lock``; the ingestion job and the
+    script thread can share one instance safely.
+
+    Under memory pressure the resource manager may ``spill`` the document:
+    the bytes go to a file, which is reopened (file-backed) on next use.
+    """
+
+    def __init__(self, data: bytes, name: str = "", path: str = None, content_hash: str = None):
+        import fitz  # PyMuPDF
+        
+        self._data = data
+        self._path = path
+        self.name = name
+        self.lock = threading.RLock()
+        self.hash = content_hash or hashlib.sha256(self.data).hexdigest()
+        
+        try:
+            self._doc = fitz.open(stream=data, filetype="pdf") if data is not None else fitz.open(path)
+        except Exception as e:
+            raise DocumentError(f"Error loading PDF: {str(e)}", e, document=name)
+        
+        self.page_count = len(self._doc)
+        self._page_texts: List[Optional[str]] = [None] * self.page_count
+        TELEMETRY.increment("loaded_document.opened")
+    
+    @classmethod
+    def from_file(cls, pdf_file, name: str = "") -> "LoadedDocument":
+        """Load from a binary file-like object (an upload, an open file)"""
+        if isinstance(pdf_file, cls):
+            return pdf_file
+        data = pdf_file.getvalue() if hasattr(pdf_file, "getvalue") else pdf_file.read()
+        return cls(data, name or getattr(pdf_file, "name", ""))
+    
+    @classmethod
+    def from_path(cls, path: str, name: str = "", content_hash: str = None) -> "LoadedDocument":
+        """Open a PDF stored on disk file-backed, as if already spilled"""
+        return cls(None, name, path=path, content_hash=content_hash)
+    
+    @property
+    def doc(self):
+        """The open PyMuPDF document, reopened from disk after a spill"""
+        import fitz  # PyMuPDF
+        
+        with self.lock:
+            if self._doc is None:
+                self._doc = fitz.open(self._path)
+                TELEMETRY.increment("loaded_document.rehydrated")
+            return self._doc
+    
+    @property
+    def data(self) -> bytes:
+        with self.lock:
+            if self._data is not None:
+                return self._data
+            with open(self._path, "rb") as f:
+                return f.read()
+    
+    def memory_bytes(self) -> int:
+        """Approximate memory held: the bytes, PyMuPDF's parse and page texts"""
+        held = 2 * len(self._data) if self._data is not None else 0
+        return held + sum(len(text) for text in self._page_texts if text)
+    
+    def spill(self, path: str):
+        """Write the bytes to ``path.pdf`` and drop everything in memory"""
+        with self.lock:
+            if self._path is None:
+                with open(f"{path}.pdf", "wb") as f:
+                    f.write(self._data)
+                self._path = f"{path}.pdf"
+            if self._doc is not None:
+                self._doc.close()
+            self._doc = None
+            self._data = None
+            self._page_texts = [None] * self.page_count
+    
+    def page_text(self, page_num: int) -> str:
+        """Text of one page, extracted on first request"""
+        with self.lock:
+            if self._page_texts[page_num] is None:
+                self._page_texts[page_num] = self.doc[page_num].get_text("text")
+            return self._page_texts[page_num]
+    
+    def page_texts(self, progress_callback: Callable[[float], None] = None) -> List[str]:
+        """Text of every page, reporting the fraction done after each page"""
+        texts = []
+        for page_num in range(self.page_count):
+            texts.append(self.page_text(page_num))
+            if progress_callback:
+                progress_callback((page_num + 1) / self.page_count)
+        return texts
+    
+    @property
+    def text(self) -> str:
+        return "".join(page + "\n" for page in self.page_texts())
+    
+    def page_width(self, page_num: int) -> float:
+        """Width of a page in points"""
+        with self.lock:
+            return self.doc[page_num].rect.width
+    
+    def render_page(self, page_num: int, zoom: float = 2.0, image_format: str = "png",
+                    quality: int = 80) -> bytes:
+        """Rasterise one page"""
+        import fitz  # PyMuPDF
+        
+        with self.lock:
+            pix = self.doc[page_num].get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+        return encode_pixmap(pix, image_format, quality)
+    
+    @property
+    def metadata(self) -> Dict:
+        with self.lock:
+            return dict(self.doc.metadata or {})
+    
+    def close(self):
+        with self.lock:
+            if self._doc is not None:
+                self._doc.close()
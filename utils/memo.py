@@ -0,0 +1,103 @@
+"""
+Memoisation of expensive per-session computations across Streamlit reruns
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Hashable, List
+
+class MemoCache:
+    """LRU cache of computed values grouped by namespace.
+
+    Keys must capture every real input of the computation (document hash,
+    page number, query, chat history version, ...) so a hit is always
+    valid; namespaces allow dropping a whole group of entries when one of
+    those inputs is replaced, e.g. on a new upload.
+
+    Thread-safe: the resource manager's reaper sizes and invalidates the
+    cache while the script thread uses it.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by invalidate, so values computed across it are not stored
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, namespace: str, key: Hashable, compute: Callable):
+        """Return the cached value for ``key`` or compute and store it"""
+        entry_key = (namespace, key)
+        with self._lock:
+            if entry_key in self._entries:
+                self._entries.move_to_end(entry_key)
+                self.hits += 1
+                return self._entries[entry_key]
+            self.misses += 1
+            generation = self._generation
+
+        # Computed outside the lock; it may be slow or use the cache itself
+        value = compute()
+        with self._lock:
+            if generation == self._generation:
+                self._entries[entry_key] = value
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def peek(self, namespace: str, key: Hashable):
+        """Return the cached value for ``key`` without computing it, or None"""
+        with self._lock:
+            return self._entries.get((namespace, key))
+
+    def invalidate(self, namespace: str = None):
+        """Drop every entry in a namespace, or everything"""
+        with self._lock:
+            self._generation += 1
+            if namespace is None:
+                self._entries.clear()
+                return
+            for entry_key in [k for k in self._entries if k[0] == namespace]:
+                del self._entries[entry_key]
+
+    def approx_bytes(self) -> int:
+        """Rough size of the cached values, counting bytes, text and arrays"""
+        with self._lock:
+            values = list(self._entries.values())
+        total = 0
+        for value in values:
+            if isinstance(value, (bytes, str)):
+                total += len(value)
+            elif hasattr(value, "nbytes"):
+                total += value.nbytes
+            else:
+                total += sys.getsizeof(value)
+        return total
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class RerunTimer:
+    """Collects named timings for one Streamlit script run"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.timings = []
+
+    @contextmanager
+    def span(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings.append((name, time.perf_counter() - start))
+
+    def report(self) -> List[Dict]:
+        """Timings in milliseconds, plus the total for the run so far"""
+        rows = [{"step": name, "ms": round(seconds * 1000, 2)} for name, seconds in self.timings]
+        rows.append({"step": "total", "ms": round((time.perf_counter() - self.start) * 1000, 2)})
+        return rows
@@ -0,0 +1,185 @@
+"""
+Sentence embeddings through ONNX Runtime, optionally int8-quantised
+
+The sentence-transformers model is exported to ONNX once (this step needs
+torch and sentence-transformers) and cached together with its tokenizer
+and pooling settings. After that only onnxruntime and tokenizers are
+needed, so a cache exported on a build machine can be shipped to servers
+without torch.
+"""
+import copy
+import json
+import os
+import threading
+import numpy as np
+from typing import List, Union
+from utils.encoder import default_threads
+
+CONFIG_FILE = "studymate_onnx.json"
+_export_lock = threading.Lock()
+
+def export_model(model_name: str, directory: str):
+    """Export ``model_name`` to ONNX, with an int8 copy, into ``directory``"""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+    
+    os.makedirs(directory, exist_ok=True)
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0]
+    tokenizer = transformer.tokenizer
+    pooling = next(module for module in model if type(module).__name__ == "Pooling")
+    
+    # Writes tokenizer.json, which the runtime reads without transformers
+    tokenizer.save_pretrained(directory)
+    
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids")
+                   if name in tokenizer.model_input_names]
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    axes = {0: "batch", 1: "sequence"}
+    
+    auto_model = transformer.auto_model.eval()
+    auto_model.config.return_dict = False
+    with torch.no_grad():
+        torch.onnx.export(
+            auto_model,
+            tuple(sample[name] for name in input_names),
+            os.path.join(directory, "model.onnx"),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={**{name: axes for name in input_names}, "last_hidden_state": axes},
+            opset_version=14
+        )
+    
+    # Dynamic quantisation: int8 weights, activations quantised per batch
+    quantize_dynamic(
+        os.path.join(directory, "model.onnx"),
+        os.path.join(directory, "model.int8.onnx"),
+        weight_type=QuantType.QInt8
+    )
+    
+    if pooling.pooling_mode_cls_token:
+        mode = "cls"
+    elif pooling.pooling_mode_max_tokens:
+        mode = "max"
+    else:
+        mode = "mean"
+    
+    config = {
+        "model_name": model_name,
+        "input_names": input_names,
+        "pooling": mode,
+        "normalize": any(type(module).__name__ == "Normalize" for module in model),
+        "max_seq_length": model.max_seq_length,
+        "dimension": model.get_sentence_embedding_dimension(),
+        "pad_token": tokenizer.pad_token,
+        "pad_id": tokenizer.pad_token_id
+    }
+    
+    # Written last: its presence marks a complete export
+    with open(os.path.join(directory, CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+
+class OnnxEmbedder:
+    """Drop-in replacement for the parts of SentenceTransformer StudyMate uses"""
+
+    def __init__(self, model_name: str, cache_dir: str, quantized: bool = True, threads: int = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+        
+        self.directory = os.path.join(cache_dir, model_name.replace("/", "__"))
+        with _export_lock:
+            if not os.path.exists(os.path.join(self.directory, CONFIG_FILE)):
+                export_model(model_name, self.directory)
+        
+        with open(os.path.join(self.directory, CONFIG_FILE), encoding="utf-8") as f:
+            self.config = json.load(f)
+        
+        self.tokenizer = Tokenizer.from_file(os.path.join(self.directory, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_id"], pad_token=self.config["pad_token"])
+        
+        self.quantized = quantized
+        self.threads = threads or default_threads()
+        self._sessions = {}
+        self._limited = {}
+        self._sessions_lock = threading.Lock()
+        self.session = self._session(self.threads)
+    
+    def _session(self, threads: int):
+        """Inference session with ``threads`` intra-op threads, created once per count"""
+        import onnxruntime as ort
+        
+        with self._sessions_lock:
+            if threads not in self._sessions:
+                options = ort.SessionOptions()
+                options.intra_op_num_threads = threads
+                options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+                model_file = "model.int8.onnx" if self.quantized else "model.onnx"
+                self._sessions[threads] = ort.InferenceSession(
+                    os.path.join(self.directory, model_file), options, providers=["CPUExecutionProvider"]
+                )
+            return self._sessions[threads]
+    
+    def with_threads(self, threads: int) -> "OnnxEmbedder":
+        """This embedder running on ``threads`` intra-op threads
+
+        ONNX Runtime fixes the thread count when a session is created, so
+        each count gets its own session; the tokenizer is shared.
+        """
+        if threads == self.threads:
+            return self
+        # Kept, so an embedder's identity (and its tuned batch size) is stable
+        with self._sessions_lock:
+            limited = self._limited.get(threads)
+        if limited is None:
+            limited = copy.copy(self)
+            limited.threads = threads
+            limited.session = self._session(threads)
+            with self._sessions_lock:
+                limited = self._limited.setdefault(threads, limited)
+        return limited
+    
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config["dimension"]
+    
+    def _pool(self, hidden: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        if self.config["pooling"] == "cls":
+            return hidden[:, 0]
+        if self.config["pooling"] == "max":
+            return np.where(mask[..., None] > 0, hidden, -np.inf).max(axis=1)
+        weights = mask[..., None].astype(np.float32)
+        return (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+    
+    def _encode_batch(self, sentences: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(sentences)
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64)
+        }
+        feed = {name: inputs[name] for name in self.config["input_names"]}
+        hidden = self.session.run(["last_hidden_state"], feed)[0]
+        return self._pool(hidden, inputs["attention_mask"])
+    
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        """Embed sentences; same call and output shape as SentenceTransformer.encode"""
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+        if not sentences:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+        
+        # Batch similar lengths together to minimise padding, as
+        # sentence-transformers does
+        order = np.argsort([-len(s) for s in sentences], kind="stable")
+        embeddings = np.empty((len(sentences), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        for i in range(0, len(sentences), batch_size):
+            batch = order[i:i + batch_size]
+            embeddings[batch] = self._encode_batch([sentences[j] for j in batch])
+        
+        if self.config["normalize"] or normalize_embeddings:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        
+        return embeddings[0] if single else embeddings
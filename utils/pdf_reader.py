@@ -1,83 +1,123 @@
 """
 Advanced PDF reader with highlighting and automation
 """
-import streamlit as st
-import fitz  # PyMuPDF
 import base64
 from typing import List, Tuple, Dict
 import time
 import re
+from config.settings import RENDER_CONFIG
+from utils.errors import DocumentError
+from utils.loaded_document import LoadedDocument, encode_pixmap
+from utils.reporting import Reporter
+from utils.telemetry import traced
 
 class PDFReader:
-    def __init__(self):
-        self.current_pdf = None
+    def __init__(self, reporter: Reporter = None):
+        self.reporter = reporter or Reporter()
+        self.document = None
         self.current_page = 0
         self.total_pages = 0
         self.reading_speed = 200  # words per minute
+        self.image_format = RENDER_CONFIG["image_format"]
+        self.image_quality = RENDER_CONFIG["quality"]
         
+    @property
+    def current_pdf(self):
+        """The open PyMuPDF document, or None"""
+        return self.document.doc if self.document else None
+    
+    @traced("pdf_reader.load_pdf")
     def load_pdf(self, pdf_file) -> bool:
-        """Load PDF file"""
+        """Load PDF file
+
+        Pass a ``LoadedDocument`` to share one parse with text extraction.
+        """
         try:
-            self.current_pdf = fitz.open(stream=pdf_file.read(), filetype="pdf")
-            self.total_pages = len(self.current_pdf)
+            self.document = LoadedDocument.from_file(pdf_file)
+            self.total_pages = self.document.page_count
             self.current_page = 0
             return True
+        except DocumentError as e:
+            self.reporter.error(e)
+            return False
         except Exception as e:
-            st.error(f"Error loading PDF: {str(e)}")
+            self.reporter.error(DocumentError(f"Error loading PDF: {str(e)}", e))
             return False
     
+    @traced("pdf_reader.get_page_text")
     def get_page_text(self, page_num: int) -> str:
         """Get text from specific page"""
-        if not self.current_pdf or page_num >= self.total_pages:
+        if not self.document or page_num >= self.total_pages:
             return ""
         
         try:
-            page = self.current_pdf[page_num]
-            return page.get_text("text")
+            return self.document.page_text(page_num)
         except Exception as e:
-            st.error(f"Error extracting text from page {page_num}: {str(e)}")
+            self.reporter.error(DocumentError(f"Error extracting text from page {page_num}: {str(e)}", e, page=page_num))
             return ""
     
+    def fit_zoom(self, page_num: int, viewport_width: int = None) -> float:
+        """Zoom at which a page fills ``viewport_width`` CSS pixels sharply"""
+        if not self.document or page_num >= self.total_pages:
+            return 1.0
+        
+        target = (viewport_width or RENDER_CONFIG["viewport_width"]) * RENDER_CONFIG["device_pixel_ratio"]
+        zoom = target / self.document.page_width(page_num)
+        return round(min(max(zoom, RENDER_CONFIG["min_zoom"]), RENDER_CONFIG["max_zoom"]), 2)
+    
+    @traced("pdf_reader.get_page_image")
     def get_page_image(self, page_num: int, zoom: float = 2.0) -> bytes:
-        """Get page as image"""
-        if not self.current_pdf or page_num >= self.total_pages:
+        """Get page as image, in the reader's image format"""
+        if not self.document or page_num >= self.total_pages:
             return None
         
         try:
-            page = self.current_pdf[page_num]
-            mat = fitz.Matrix(zoom, zoom)
-            pix = page.get_pixmap(matrix=mat)
-            img_data = pix.tobytes("png")
-            return img_data
+            return self.document.render_page(page_num, zoom, self.image_format, self.image_quality)
         except Exception as e:
-            st.error(f"Error rendering page {page_num}: {str(e)}")
+            self.reporter.error(DocumentError(f"Error rendering page {page_num}: {str(e)}", e, page=page_num))
             return None
     
-    def highlight_text_in_page(self, page_num: int, text_to_highlight: str) -> bytes:
+    def get_page_preview(self, page_num: int) -> bytes:
+        """Fast low-resolution rendering shown until the full image is ready"""
+        if not RENDER_CONFIG["preview_zoom"]:
+            return None
+        return self.get_page_image(page_num, RENDER_CONFIG["preview_zoom"])
+    
+    @traced("pdf_reader.highlight_text_in_page")
+    def highlight_text_in_page(self, page_num: int, text_to_highlight: str, zoom: float = 2.0) -> bytes:
         """Highlight specific text in page and return as image"""
-        if not self.current_pdf or page_num >= self.total_pages:
+        import fitz  # PyMuPDF
+        
+        if not self.document or page_num >= self.total_pages:
             return None
         
         try:
-            page = self.current_pdf[page_num]
-            
-            # Search for text
-            text_instances = page.search_for(text_to_highlight)
-            
-            # Highlight found text
-            for inst in text_instances:
-                highlight = page.add_highlight_annot(inst)
-                highlight.set_colors(stroke=[1, 1, 0])  # Yellow highlight
-                highlight.update()
-            
-            # Render page with highlights
-            mat = fitz.Matrix(2.0, 2.0)
-            pix = page.get_pixmap(matrix=mat)
-            img_data = pix.tobytes("png")
+            with self.document.lock:
+                page = self.current_pdf[page_num]
+                
+                # Search for text
+                text_instances = page.search_for(text_to_highlight)
+                
+                # Highlight found text
+                highlights = []
+                for inst in text_instances:
+                    highlight = page.add_highlight_annot(inst)
+                    highlight.set_colors(stroke=[1, 1, 0])  # Yellow highlight
+                    highlight.update()
+                    highlights.append(highlight)
+                
+                # Render page with highlights, then remove them again: the
+                # document is shared with other sessions and later renders
+                try:
+                    mat = fitz.Matrix(zoom, zoom)
+                    pix = page.get_pixmap(matrix=mat)
+                finally:
+                    for highlight in highlights:
+                        page.delete_annot(highlight)
             
-            return img_data
+            return encode_pixmap(pix, self.image_format, self.image_quality)
         except Exception as e:
-            st.error(f"Error highlighting text: {str(e)}")
+            self.reporter.error(DocumentError(f"Error highlighting text: {str(e)}", e, page=page_num))
             return None
     
     def get_reading_segments(self, text: str, words_per_segment: int = 50) -> List[str]:
@@ -112,10 +152,10 @@ class PDFReader:
     
     def get_pdf_metadata(self) -> Dict:
         """Get PDF metadata"""
-        if not self.current_pdf:
+        if not self.document:
             return {}
         
-        metadata = self.current_pdf.metadata
+        metadata = self.document.metadata
         return {
             "title": metadata.get("title", "Unknown"),
             "author": metadata.get("author", "Unknown"),
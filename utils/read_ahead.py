@@ -0,0 +1,208 @@
+"""
+Look-ahead speech synthesis for Auto Read Mode
+
+While one segment is being read, the next few are synthesised in the
+background, so playback never waits for the TTS service. Audio is cached
+by a hash of its text (shared by every session reading the same page)
+and carries its duration, which drives the segment highlighting.
+"""
+import base64
+import hashlib
+import html
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+from config.settings import READ_AHEAD_CONFIG
+from utils.reporting import logger
+from utils.telemetry import TELEMETRY
+from utils.tts_backends import audio_mime_type, wav_duration
+from utils.tts_engine import TTSEngine
+
+# MPEG audio layer III tables, indexed by the header's version bits
+_BITRATES = {
+    3: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+def mp3_duration(data: bytes) -> Optional[float]:
+    """Duration in seconds of an MP3 clip, by walking its frame headers;
+    None if ``data`` is not layer III audio"""
+    offset = 0
+    # Skip an ID3v2 tag; its size is stored as four 7-bit bytes
+    if data[:3] == b"ID3" and len(data) >= 10:
+        offset = 10 + ((data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9])
+
+    seconds = 0.0
+    frames = 0
+    while offset + 4 <= len(data):
+        b1, b2 = data[offset + 1], data[offset + 2]
+        version, layer = (b1 >> 3) & 3, (b1 >> 1) & 3
+        bitrate_index, rate_index = b2 >> 4, (b2 >> 2) & 3
+        if (data[offset] != 0xFF or b1 & 0xE0 != 0xE0 or version == 1 or layer != 1
+                or bitrate_index in (0, 15) or rate_index == 3):
+            # Not a frame header: resynchronise on the next byte
+            offset += 1
+            continue
+
+        bitrate = _BITRATES[3 if version == 3 else 2][bitrate_index] * 1000
+        sample_rate = _SAMPLE_RATES[version][rate_index]
+        samples = 1152 if version == 3 else 576
+        offset += samples // 8 * bitrate // sample_rate + ((b2 >> 1) & 1)
+        seconds += samples / sample_rate
+        frames += 1
+    return seconds if frames else None
+
+def text_key(text: str, language: str, slow: bool = False) -> str:
+    return hashlib.sha1(f"{language}|{int(slow)}|{text}".encode("utf-8")).hexdigest()
+
+class AudioCache:
+    """Thread-safe LRU of synthesised clips, bounded by total size"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        return None
+
+    def put(self, key: str, clip: Dict):
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = clip
+            self._bytes += len(clip["audio"])
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted["audio"])
+
+class ReadAhead:
+    """Synthesises upcoming reading segments ahead of playback"""
+
+    def __init__(self, tts_engine: TTSEngine = None, cache: AudioCache = None, max_workers: int = None):
+        self.tts_engine = tts_engine or TTSEngine()
+        self.cache = cache or AudioCache(READ_AHEAD_CONFIG["cache_mb"] * 2**20)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or READ_AHEAD_CONFIG["max_workers"],
+            thread_name_prefix="studymate-read-ahead"
+        )
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def _synthesize(self, key: str, text: str, language: str, slow: bool) -> Dict:
+        try:
+            audio = self.tts_engine._synthesize(text, language, slow)
+            # Fall back to the reading speed estimate for unparseable audio
+            duration = wav_duration(audio) or mp3_duration(audio) or len(text.split()) / 150 * 60
+            clip = {"audio": audio, "duration": duration}
+            self.cache.put(key, clip)
+            TELEMETRY.increment("read_ahead.synthesised")
+            return clip
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def _submit(self, text: str, language: str, slow: bool):
+        """Cached clip, or the future synthesising it"""
+        key = text_key(text, language, slow)
+        clip = self.cache.get(key)
+        if clip is not None:
+            return clip
+        with self._lock:
+            if key not in self._pending:
+                self._pending[key] = self.executor.submit(self._synthesize, key, text, language, slow)
+            return self._pending[key]
+
+    def prefetch(self, texts: List[str], language: str = "en", slow: bool = False):
+        """Start synthesising every text not cached or already in flight"""
+        for text in texts:
+            if text.strip():
+                self._submit(text, language, slow)
+
+    def playlist(self, texts: List[str], language: str = "en", slow: bool = False,
+                 timeout: float = None) -> List[Dict]:
+        """Clips for ``texts`` in order, each with its text and duration
+
+        Every text is submitted, but only the first clip is waited for (up
+        to ``timeout``); the playlist then runs on through the clips that are
+        already done and stops at the first one that is not, so playback
+        starts as soon as possible and never has gaps. The rest keep
+        synthesising in the background and are cached for the next call.
+        """
+        pending = [self._submit(text, language, slow) for text in texts]
+        if pending and not isinstance(pending[0], dict):
+            wait([pending[0]], timeout=READ_AHEAD_CONFIG["wait_seconds"] if timeout is None else timeout)
+
+        items = []
+        for text, item in zip(texts, pending):
+            if not isinstance(item, dict):
+                if not item.done():
+                    break
+                try:
+                    item = item.result()
+                except Exception as e:
+                    logger.warning("Read-ahead synthesis failed: %s", e)
+                    break
+            items.append({"text": text, **item})
+        return items
+
+def playlist_html(items: List[Dict], autoplay: bool = True) -> str:
+    """Player that plays clips back to back and highlights the segment being read"""
+    clips = [
+        {
+            "src": f"data:{audio_mime_type(item['audio'])};base64," + base64.b64encode(item["audio"]).decode(),
+            "duration": item["duration"]
+        }
+        for item in items
+    ]
+    segments = "".join(
+        f'<p id="segment-{i}" class="segment">{html.escape(item["text"])}</p>' for i, item in enumerate(items)
+    )
+    total = sum(item["duration"] for item in items)
+    return f"""
+    <style>
+        .segment {{ padding: 0.5rem; border-radius: 8px; font-family: sans-serif; color: #555; }}
+        .segment.active {{ background: #fff3cd; color: #000; font-size: 1.05rem; }}
+    </style>
+    <audio id="player" controls style="width: 100%;"></audio>
+    <div style="font-family: sans-serif; font-size: 0.8rem; color: #888;">
+        {len(items)} segments, {total:.0f}s
+    </div>
+    {segments}
+    <script>
+        const clips = {json.dumps(clips)};
+        const player = document.getElementById("player");
+        let current = 0;
+        function play(index) {{
+            document.querySelectorAll(".segment").forEach(el => el.classList.remove("active"));
+            if (index >= clips.length) return;
+            current = index;
+            document.getElementById("segment-" + index).classList.add("active");
+            player.src = clips[index].src;
+            player.play().catch(() => {{}});
+        }}
+        // The next clip is already loaded in the page, so it starts immediately
+        player.addEventListener("ended", () => play(current + 1));
+        document.querySelectorAll(".segment").forEach((el, i) => el.addEventListener("click", () => play(i)));
+        {"play(0);" if autoplay else ""}
+    </script>
+    """
+
+_read_ahead = None
+_read_ahead_lock = threading.Lock()
+
+def get_read_ahead() -> ReadAhead:
+    """Process-wide read-ahead pipeline; its cache is shared by every session"""
+    global _read_ahead
+    with _read_ahead_lock:
+        if _read_ahead is None:
+            _read_ahead = ReadAhead()
+        return _read_ahead
@@ -0,0 +1,59 @@
+"""
+UI-agnostic progress and error reporting for the engines
+
+Engines never talk to a UI directly; they report to a ``Reporter``. The
+default one logs, ``RaisingReporter`` turns reported errors into
+exceptions for batch jobs and workers, and the Streamlit adapter in
+``utils.streamlit_adapter`` renders everything in the app.
+"""
+import logging
+from contextlib import contextmanager
+from typing import Callable
+from utils.errors import StudyMateError
+
+logger = logging.getLogger("studymate")
+
+class Reporter:
+    """Receives progress, status messages and errors from the engines"""
+
+    def progress(self, task: str, fraction: float):
+        """``task`` has completed ``fraction`` (0..1) of its work"""
+
+    @contextmanager
+    def status(self, message: str):
+        """A long-running step is in progress for the duration of the block"""
+        logger.debug(message)
+        yield
+
+    def info(self, message: str):
+        logger.info(message)
+
+    def warning(self, message: str):
+        logger.warning(message)
+
+    def error(self, error: StudyMateError):
+        logger.error("%s", error.message, exc_info=error.cause)
+
+class RaisingReporter(Reporter):
+    """Raises reported errors instead of letting the engine carry on"""
+
+    def error(self, error: StudyMateError):
+        raise error
+
+class CallbackReporter(Reporter):
+    """Forwards progress and errors to plain callables"""
+
+    def __init__(self, on_progress: Callable[[str, float], None] = None,
+                 on_error: Callable[[StudyMateError], None] = None):
+        self.on_progress = on_progress
+        self.on_error = on_error
+
+    def progress(self, task: str, fraction: float):
+        if self.on_progress:
+            self.on_progress(task, fraction)
+
+    def error(self, error: StudyMateError):
+        if self.on_error:
+            self.on_error(error)
+        else:
+            super().error(error)
@@ -0,0 +1,67 @@
+"""
+Cross-encoder re-ranking of search candidates
+"""
+import threading
+import time
+import numpy as np
+from config.settings import MODEL_PARAMS
+from typing import List, Tuple
+from utils.telemetry import TELEMETRY, traced
+
+_cross_encoders = {}
+_cross_encoders_lock = threading.Lock()
+
+def get_cross_encoder(model_name: str = None):
+    """Process-wide cross-encoder, loaded once and shared by all engines"""
+    model_name = model_name or MODEL_PARAMS["rerank_model"]
+    
+    # Concurrent callers wait for the one load in progress instead of repeating it
+    with _cross_encoders_lock:
+        if model_name not in _cross_encoders:
+            from sentence_transformers import CrossEncoder
+            _cross_encoders[model_name] = CrossEncoder(model_name, device="cpu")
+        return _cross_encoders[model_name]
+
+class Reranker:
+    def __init__(self, model_name: str = None, batch_size: int = None, timeout: float = None):
+        self.model = get_cross_encoder(model_name)
+        self.batch_size = batch_size or MODEL_PARAMS["rerank_batch_size"]
+        self.timeout = timeout if timeout is not None else MODEL_PARAMS["rerank_timeout"]
+
+    @traced("reranker.rerank")
+    def rerank(self, query: str, candidates: List[Tuple[str, float, dict]], top_k: int = 3) -> List[Tuple[str, float, dict]]:
+        """Re-order bi-encoder candidates by cross-encoder relevance
+
+        Pairs are scored in batches. A batch is only started if, judging by
+        the previous one, it will finish within the time budget; otherwise
+        the candidates scored so far are re-ordered and the rest follow in
+        bi-encoder order.
+        """
+        if len(candidates) <= 1:
+            return candidates[:top_k]
+
+        start = time.perf_counter()
+        batch_seconds = 0.0
+        scores = []
+
+        for i in range(0, len(candidates), self.batch_size):
+            if scores and time.perf_counter() - start + batch_seconds > self.timeout:
+                TELEMETRY.increment("reranker.timeouts")
+                break
+            batch = candidates[i:i + self.batch_size]
+            batch_start = time.perf_counter()
+            scores.extend(self.model.predict(
+                [(query, text) for text, _, _ in batch],
+                batch_size=self.batch_size,
+                show_progress_bar=False
+            ))
+            batch_seconds = time.perf_counter() - batch_start
+
+        order = np.argsort(scores)[::-1][:top_k]
+
+        results = []
+        for i in order:
+            text, distance, metadata = candidates[i]
+            results.append((text, distance, {**metadata, "rerank_score": float(scores[i])}))
+
+        return results + candidates[len(scores):len(scores) + top_k - len(results)]
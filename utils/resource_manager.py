@@ -0,0 +1,187 @@
+"""
+Global memory budget: tracks heavy objects and spills idle ones to disk
+
+Resources register under a name and report their in-memory size. When
+the total exceeds the budget, the least recently used ones are spilled;
+anything idle for long enough is spilled regardless. Spilling keeps the
+object itself, so whoever holds it (a session, the document store) keeps
+a valid reference and the data comes back transparently on next use.
+"""
+import glob
+import os
+import re
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from typing import Dict, List
+from config.settings import RESOURCE_CONFIG
+from utils.reporting import logger
+from utils.telemetry import TELEMETRY
+
+class Spillable(ABC):
+    """Interface of objects the resource manager can spill"""
+
+    @abstractmethod
+    def memory_bytes(self) -> int:
+        """Approximate memory held that spilling would release"""
+
+    @abstractmethod
+    def spill(self, path: str):
+        """Move the heavy parts to files starting with ``path``"""
+
+def _remove_spill_files(path: str):
+    for filename in glob.glob(glob.escape(path) + "*"):
+        try:
+            os.remove(filename)
+        except OSError:
+            pass
+
+class ResourceManager:
+    def __init__(self, budget_mb: float = None, idle_seconds: float = None, spill_dir: str = None):
+        self.budget_bytes = (budget_mb or RESOURCE_CONFIG["memory_budget_mb"]) * 2**20
+        self.idle_seconds = idle_seconds or RESOURCE_CONFIG["idle_seconds"]
+        self.min_idle_seconds = RESOURCE_CONFIG["min_idle_seconds"]
+        self.spill_dir = spill_dir or RESOURCE_CONFIG["spill_dir"]
+        os.makedirs(self.spill_dir, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._resources = weakref.WeakValueDictionary()
+        self._last_used = {}
+        self._paths = {}
+        self._reaper = None
+
+    def register(self, name: str, resource: Spillable):
+        """Track ``resource``; it is forgotten and its spill files removed
+        once nothing else references it"""
+        if not isinstance(resource, Spillable):
+            raise TypeError(f"{type(resource).__name__} does not implement Spillable")
+        # Unique per object, so a replaced resource's files never clash
+        safe_name = re.sub(r"[^\w.-]", "_", name)
+        path = os.path.join(self.spill_dir, f"{safe_name}-{id(resource):x}")
+        with self._lock:
+            self._resources[name] = resource
+            self._last_used[name] = time.time()
+            self._paths[name] = path
+        weakref.finalize(resource, _remove_spill_files, path)
+
+    def touch(self, *names: str):
+        """Mark resources as in use now"""
+        now = time.time()
+        with self._lock:
+            for name in names:
+                if name in self._resources:
+                    self._last_used[name] = now
+
+    def usage(self) -> Dict[str, Dict]:
+        """In-memory size and idle time of every tracked resource"""
+        now = time.time()
+        with self._lock:
+            items = list(self._resources.items())
+            # Drop bookkeeping for resources that have been collected
+            for name in set(self._last_used) - {name for name, _ in items}:
+                self._last_used.pop(name)
+                self._paths.pop(name, None)
+            last_used = dict(self._last_used)
+        return {
+            name: {"bytes": resource.memory_bytes(), "idle_s": now - last_used.get(name, now)}
+            for name, resource in items
+        }
+
+    def enforce(self) -> List[str]:
+        """Spill idle resources, then LRU ones until under budget"""
+        usage = self.usage()
+        total = sum(entry["bytes"] for entry in usage.values())
+        spilled = []
+        
+        for name, entry in sorted(usage.items(), key=lambda item: -item[1]["idle_s"]):
+            if entry["bytes"] == 0 or entry["idle_s"] < self.min_idle_seconds:
+                continue
+            if entry["idle_s"] < self.idle_seconds and total <= self.budget_bytes:
+                break
+            
+            resource = self._resources.get(name)
+            if resource is None:
+                continue
+            try:
+                resource.spill(self._paths[name])
+            except Exception as e:
+                logger.warning("Could not spill %s: %s", name, e)
+                continue
+            total -= entry["bytes"]
+            spilled.append(name)
+            TELEMETRY.increment("resource_manager.spills")
+        
+        return spilled
+
+    def start_reaper(self, interval: float = None):
+        """Enforce the budget periodically on a daemon thread"""
+        with self._lock:
+            if self._reaper is not None:
+                return
+            self._reaper = threading.Thread(
+                target=self._reap, args=(interval or RESOURCE_CONFIG["reaper_interval"],),
+                name="studymate-reaper", daemon=True
+            )
+        self._reaper.start()
+
+    def _reap(self, interval: float):
+        while True:
+            time.sleep(interval)
+            try:
+                self.enforce()
+            except Exception as e:
+                logger.warning("Resource reaper failed: %s", e)
+
+class SessionResources(Spillable):
+    """Per-session state the manager may drop or spill while a session is idle
+
+    Holds the session's last audio clip and its memo cache; cached values
+    are simply dropped and recomputed on the next run.
+    """
+
+    def __init__(self, memo=None):
+        self.memo = memo
+        self._audio = None
+        self._audio_path = None
+        self._lock = threading.Lock()
+
+    @property
+    def audio(self):
+        with self._lock:
+            if self._audio is None and self._audio_path:
+                with open(self._audio_path, "rb") as f:
+                    self._audio = f.read()
+            return self._audio
+
+    @audio.setter
+    def audio(self, value):
+        with self._lock:
+            self._audio = value
+            self._audio_path = None
+
+    def memory_bytes(self) -> int:
+        audio = len(self._audio) if self._audio else 0
+        return audio + (self.memo.approx_bytes() if self.memo else 0)
+
+    def spill(self, path: str):
+        with self._lock:
+            if self._audio is not None:
+                with open(f"{path}.audio", "wb") as f:
+                    f.write(self._audio)
+                self._audio_path = f"{path}.audio"
+                self._audio = None
+        if self.memo:
+            self.memo.invalidate()
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_resource_manager() -> ResourceManager:
+    """Process-wide resource manager, with its reaper running"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ResourceManager()
+            _manager.start_reaper()
+        return _manager
@@ -1,59 +1,338 @@
 """
 Semantic search engine using FAISS and sentence transformers
+
+faiss and sentence_transformers (which pulls in torch) are imported on
+first use so that pages which never search don't pay for them.
 """
-import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
-import streamlit as st
-from typing import List, Tuple
-import pickle
+from typing import Callable, Dict, List, Tuple
 import os
+import threading
+from config.settings import MODEL_PARAMS
+from utils.chunk_store import ChunkStore, chunk_hash
+from utils.encoder import get_encode_engine
+from utils.errors import SearchIndexError
+from utils.reporting import Reporter
+from utils.reranker import Reranker
+from utils.resource_manager import Spillable
+from utils.telemetry import TELEMETRY, traced
+
+# FAISS factory strings for the supported vector representations
+INDEX_FACTORY = {
+    "flat": "Flat",
+    "sq_fp16": "SQfp16",
+    "sq_int8": "SQ8",
+    "pq": "PQ{pq_m}"
+}
+
+# PQ trains 256 centroids per sub-quantizer and needs at least that many points
+MIN_TRAINING_POINTS = {
+    "sq_int8": 1,
+    "pq": 256
+}
+
+_embedders = {}
+_embedders_lock = threading.Lock()
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx_int8")
+
+def get_embedder(model_name: str = None, backend: str = None):
+    """Process-wide sentence embedder, loaded once and shared by all sessions
+
+    ``backend`` (default ``MODEL_PARAMS["embedding_backend"]``) selects
+    sentence-transformers on PyTorch or the same model on ONNX Runtime;
+    both expose the same ``encode`` interface.
+    """
+    model_name = model_name or MODEL_PARAMS["embedding_model"]
+    backend = backend or MODEL_PARAMS.get("embedding_backend", "torch")
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend}")
+    
+    # Holding the lock while loading makes concurrent callers wait for the
+    # one load in progress (e.g. the background warm-up) instead of repeating it
+    with _embedders_lock:
+        if (backend, model_name) not in _embedders:
+            if backend == "torch":
+                from sentence_transformers import SentenceTransformer
+                embedder = SentenceTransformer(model_name)
+            else:
+                from utils.onnx_embedder import OnnxEmbedder
+                embedder = OnnxEmbedder(
+                    model_name, MODEL_PARAMS["onnx_cache_dir"], quantized=backend == "onnx_int8"
+                )
+            _embedders[(backend, model_name)] = embedder
+        return _embedders[(backend, model_name)]
+
+def create_index(dimension: int, index_type: str = "flat", pq_m: int = 48):
+    """Create an empty L2 index storing vectors in the given representation
+
+    Vectors are added under explicit IDs (their chunk IDs), so individual
+    chunks can be removed without renumbering the rest.
+    """
+    import faiss
+    
+    if index_type not in INDEX_FACTORY:
+        raise ValueError(f"Unknown index type: {index_type}")
+    description = "IDMap2," + INDEX_FACTORY[index_type].format(pq_m=pq_m)
+    return faiss.index_factory(dimension, description, faiss.METRIC_L2)
+
+def index_type_of(index) -> str:
+    """The INDEX_FACTORY key matching the vector storage of an index"""
+    import faiss
+    
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(inner, faiss.IndexPQ):
+        return "pq"
+    if isinstance(inner, faiss.IndexScalarQuantizer):
+        return "sq_int8" if inner.sq.qtype == faiss.ScalarQuantizer.QT_8bit else "sq_fp16"
+    return "flat"
+
+def read_faiss_index(filepath: str, mmap: bool = False):
+    """Read a FAISS index, optionally memory-mapped and read-only"""
+    import faiss
+    
+    if mmap:
+        # Map flat codes and inverted lists straight from the file instead of
+        # copying them into the heap, so processes share the page cache
+        flags = (
+            getattr(faiss, "IO_FLAG_MMAP", 0)
+            | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+            | faiss.IO_FLAG_READ_ONLY
+        )
+        return faiss.read_index(filepath, flags)
+    return faiss.read_index(filepath)
+
+class SearchEngine(Spillable):
+    def __init__(self, index_type: str = None, reporter: Reporter = None):
+        self.reporter = reporter or Reporter()
+        self._embedder = None
+        self._index = None
+        # The configured representation; index_type is the one actually in use
+        self.configured_index_type = index_type or MODEL_PARAMS.get("index_type", "flat")
+        self.index_type = self.configured_index_type
+        self.documents = ChunkStore()
+        self.read_only = False
+        self.mmapped = False
+        self.reranker = None
+        self.rerank_enabled = MODEL_PARAMS.get("rerank", False)
+        self._reranker_failed = False
+    
+    @property
+    def embedder(self):
+        """Sentence embedder, loaded on first use"""
+        if self._embedder is None:
+            self._embedder = get_embedder()
+        return self._embedder
+    
+    @property
+    def dimension(self) -> int:
+        return self.embedder.get_sentence_embedding_dimension()
+    
+    @property
+    def index(self):
+        """FAISS index, created on first use"""
+        if self._index is None:
+            self._index = self._new_index()
+        return self._index
+    
+    @index.setter
+    def index(self, value):
+        self._index = value
+    
+    def _get_reranker(self):
+        """Re-ranker over the shared cross-encoder (loaded on first use);
+        None if it cannot be loaded"""
+        if self.reranker is None and not self._reranker_failed:
+            try:
+                self.reranker = Reranker()
+            except Exception as e:
+                self.reporter.warning(f"Re-ranking disabled, could not load cross-encoder: {str(e)}")
+                self._reranker_failed = True
+        return self.reranker
+    
+    def _new_index(self):
+        """Create an empty index of the configured type"""
+        return create_index(self.dimension, self.index_type, MODEL_PARAMS.get("pq_subquantizers", 48))
+    
+    def train_index(self, embeddings: np.ndarray):
+        """Train a quantised index on the first batch of embeddings"""
+        if self.index.is_trained:
+            return
+        
+        # Too few vectors to fit the quantiser: keep exact float32 vectors
+        if len(embeddings) < MIN_TRAINING_POINTS.get(self.index_type, 1):
+            self.reporter.info(
+                f"Only {len(embeddings)} chunks, too few to train a '{self.index_type}' index; "
+                f"storing exact vectors instead."
+            )
+            self.index_type = "flat"
+            self.index = create_index(self.dimension, "flat")
+            return
+        
+        self.index.train(embeddings)
+    
+    def _ensure_id_map(self):
+        """Migrate an index saved before chunk IDs were stored in it"""
+        import faiss
+        
+        if isinstance(self.index, faiss.IndexIDMap):
+            return
+        
+        # Positions were the chunk IDs; re-add the decoded vectors under them,
+        # reusing the emptied index so a trained quantiser is kept
+        vectors = self.index.reconstruct_n(0, self.index.ntotal)
+        inner = self.index
+        inner.reset()
+        self.index = faiss.IndexIDMap2(inner)
+        self.index.add_with_ids(vectors, np.arange(len(vectors), dtype=np.int64))
+    
+    def _check_writable(self) -> bool:
+        """Report an error if the index cannot be modified"""
+        # Memory-mapped indexes abort the process if FAISS tries to grow them
+        if self.read_only:
+            self.reporter.error(SearchIndexError("This search index is read-only and cannot be modified."))
+            return False
+        return True
+    
+    @traced("search_engine.encode_chunks")
+    def encode_chunks(self, chunks: List[str], progress_callback: Callable[[float], None] = None,
+                      batch_size: int = None) -> np.ndarray:
+        """Embed chunks, reporting the fraction done after each batch
 
-class SearchEngine:
-    def __init__(self):
-        self.embedder = SentenceTransformer("all-MiniLM-L6-v2")
-        self.dimension = self.embedder.get_sentence_embedding_dimension()
-        self.index = faiss.IndexFlatL2(self.dimension)
-        self.documents = []
-        self.document_metadata = []
+        Batch size, torch threads and the optional multi-process pool come
+        from the shared encode engine (see ``ENCODER_CONFIG``).
+        """
+        TELEMETRY.increment("search_engine.chunks_embedded", len(chunks))
+        return get_encode_engine().encode(self.embedder, chunks, progress_callback, batch_size)
+    
+    @traced("search_engine.add_embeddings")
+    def add_embeddings(self, chunks: List[str], embeddings: np.ndarray, document_name: str = "",
+                       pages: List[int] = None, chunk_indexes: List[int] = None):
+        """Add chunks whose embeddings were computed ahead of time"""
+        if not chunks or not self._check_writable():
+            return
+        
+        self.train_index(embeddings)
+        self._ensure_id_map()
+        ids = np.arange(len(self.documents), len(self.documents) + len(chunks), dtype=np.int64)
+        self.index.add_with_ids(embeddings, ids)
+        self.documents.extend(chunks, document_name, pages, chunk_indexes)
     
-    def add_documents(self, chunks: List[str], document_name: str = ""):
+    def add_documents(self, chunks: List[str], document_name: str = "", pages: List[int] = None):
         """Add document chunks to the search index"""
-        if not chunks:
+        if not chunks or not self._check_writable():
             return
         
-        with st.spinner("🔍 Creating embeddings..."):
-            embeddings = self.embedder.encode(chunks, convert_to_numpy=True)
-            self.index.add(embeddings)
-            self.documents.extend(chunks)
+        with self.reporter.status("🔍 Creating embeddings..."):
+            embeddings = self.encode_chunks(chunks)
+            self.add_embeddings(chunks, embeddings, document_name, pages)
+    
+    def diff_document(self, chunks: List[str], document_name: str) -> Dict:
+        """Compare a new version of a document with the indexed one
+
+        Chunks are matched on content hash. Returns the positions of the
+        new chunks that must be embedded (``embed``), the new position of
+        every reused chunk ID (``keep``) and the IDs of stale chunks
+        (``remove``).
+        """
+        stored = {}
+        for idx, digest in self.documents.document_chunks(document_name).items():
+            stored.setdefault(digest, []).append(idx)
+        
+        embed, keep = [], {}
+        for position, chunk in enumerate(chunks):
+            candidates = stored.get(chunk_hash(chunk))
+            if candidates:
+                keep[candidates.pop(0)] = position
+            else:
+                embed.append(position)
+        
+        remove = sorted(idx for ids in stored.values() for idx in ids)
+        return {"embed": embed, "keep": keep, "remove": remove}
+    
+    @traced("search_engine.apply_document_update")
+    def apply_document_update(self, chunks: List[str], embeddings: np.ndarray, document_name: str,
+                              diff: Dict, pages: List[int] = None):
+        """Apply a ``diff_document`` result; ``embeddings`` are those of ``diff["embed"]``"""
+        if not self._check_writable():
+            return
+        
+        try:
+            if diff["remove"]:
+                self._ensure_id_map()
+                self.index.remove_ids(np.asarray(diff["remove"], dtype=np.int64))
+                self.documents.remove(diff["remove"])
             
-            # Store metadata for each chunk
-            for i, chunk in enumerate(chunks):
-                self.document_metadata.append({
-                    "document_name": document_name,
-                    "chunk_index": i,
-                    "text_preview": chunk[:100] + "..." if len(chunk) > 100 else chunk
-                })
-    
-    def search(self, query: str, top_k: int = 3) -> List[Tuple[str, float, dict]]:
-        """Search for relevant documents"""
-        if not self.documents:
+            for idx, position in diff["keep"].items():
+                self.documents.relocate(idx, position, pages[position] if pages else -1)
+        except Exception as e:
+            self.reporter.error(SearchIndexError(f"Error updating index: {str(e)}", e, document=document_name))
+            return
+        
+        if diff["embed"]:
+            self.add_embeddings(
+                [chunks[i] for i in diff["embed"]],
+                embeddings,
+                document_name,
+                [pages[i] for i in diff["embed"]] if pages else None,
+                diff["embed"]
+            )
+    
+    def assemble_embeddings(self, diff: Dict, embeddings: np.ndarray, count: int) -> np.ndarray:
+        """Embeddings for all ``count`` chunks of a new version of a document,
+        copying the vectors of kept chunks from this index"""
+        full = np.empty((count, self.index.d), dtype=np.float32)
+        for idx, position in diff["keep"].items():
+            full[position] = self.index.reconstruct(int(idx))
+        if diff["embed"]:
+            full[diff["embed"]] = embeddings
+        return full
+    
+    def update_document(self, chunks: List[str], document_name: str, pages: List[int] = None) -> Dict:
+        """Re-index a revised document, embedding only its changed chunks"""
+        if not self._check_writable():
+            return {}
+        
+        diff = self.diff_document(chunks, document_name)
+        with self.reporter.status(f"🔍 Re-embedding {len(diff['embed'])} changed chunks..."):
+            embeddings = self.encode_chunks([chunks[i] for i in diff["embed"]]) if diff["embed"] else None
+            self.apply_document_update(chunks, embeddings, document_name, diff, pages)
+        
+        return diff
+    
+    @traced("search_engine.search")
+    def search(self, query: str, top_k: int = 3, rerank: bool = None) -> List[Tuple[str, float, dict]]:
+        """Search for relevant documents
+
+        When re-ranking is enabled a wider candidate set is fetched from the
+        index and re-ordered by the cross-encoder.
+        """
+        if not self.documents.live_count:
             return []
         
+        use_rerank = self.rerank_enabled if rerank is None else rerank
+        reranker = self._get_reranker() if use_rerank else None
+        candidates = max(top_k, MODEL_PARAMS.get("rerank_candidates", top_k)) if reranker else top_k
+        
         query_vec = self.embedder.encode([query], convert_to_numpy=True)
-        distances, indices = self.index.search(query_vec, top_k)
+        distances, indices = self.index.search(query_vec, candidates)
         
         results = []
         for distance, idx in zip(distances[0], indices[0]):
-            if idx < len(self.documents):
+            # FAISS pads missing results with -1
+            if 0 <= idx < len(self.documents) and idx not in self.documents.removed:
                 results.append((
                     self.documents[idx],
                     float(distance),
-                    self.document_metadata[idx]
+                    self.documents.get_metadata(idx)
                 ))
         
+        if reranker:
+            return reranker.rerank(query, results, top_k)
+        
         return results
     
+    @traced("search_engine.get_similar_questions")
     def get_similar_questions(self, current_question: str, chat_history: List[dict], top_k: int = 3) -> List[str]:
         """Find similar previously asked questions"""
         if not chat_history:
@@ -77,45 +356,130 @@ class SearchEngine:
         
         return similar_questions
     
+    def _needs_compaction(self) -> bool:
+        """Whether removed chunks make up enough of a writable index to drop them"""
+        total = len(self.documents)
+        return (
+            not self.read_only and total > 0
+            and len(self.documents.removed) / total >= MODEL_PARAMS.get("compact_removed_ratio", 0.25)
+        )
+    
+    def _compacted_index(self, live_ids: np.ndarray):
+        """Copy of the index with every chunk ID renumbered to its position
+        among ``live_ids``"""
+        import faiss
+        
+        self._ensure_id_map()
+        index = faiss.clone_index(self.index)
+        stale = np.setdiff1d(faiss.vector_to_array(index.id_map), live_ids)
+        if len(stale):
+            index.remove_ids(stale)
+        
+        # Vectors keep their codes; only the ID map is rewritten
+        new_ids = np.searchsorted(live_ids, faiss.vector_to_array(index.id_map)).astype(np.int64)
+        index.id_map.resize(0)
+        faiss.copy_array_to_vector(new_ids, index.id_map)
+        index.construct_rev_map()
+        return index
+    
+    @traced("search_engine.save_index")
     def save_index(self, filepath: str):
-        """Save the search index to disk"""
+        """Save the search index to disk
+
+        Once enough chunks are removed (see
+        ``MODEL_PARAMS["compact_removed_ratio"]``) they are dropped from the
+        saved files and the remaining chunk IDs renumbered.
+        """
+        import faiss
+        
         try:
-            # Save FAISS index
-            faiss.write_index(self.index, f"{filepath}.index")
+            compact = self._needs_compaction()
+            live_ids = self.documents.live_ids() if compact else None
+            index = self._compacted_index(live_ids) if compact else self.index
+            
+            # Save FAISS index; write aside and swap so a memory-mapped copy
+            # of the old file is never truncated underneath a reader
+            faiss.write_index(index, f"{filepath}.index.tmp")
+            os.replace(f"{filepath}.index.tmp", f"{filepath}.index")
             
-            # Save documents and metadata
-            with open(f"{filepath}.pkl", "wb") as f:
-                pickle.dump({
-                    "documents": self.documents,
-                    "metadata": self.document_metadata
-                }, f)
+            # Save chunk texts and metadata in the columnar format
+            self.documents.save(filepath, live_ids)
+            
+            if compact:
+                # Continue from the compacted files so IDs match what is saved
+                self.index = index
+                self.documents = ChunkStore.load(filepath)
+                TELEMETRY.increment("search_engine.compactions")
             
             return True
         except Exception as e:
-            st.error(f"Error saving index: {str(e)}")
+            self.reporter.error(SearchIndexError(f"Error saving index: {str(e)}", e, path=filepath))
             return False
     
-    def load_index(self, filepath: str):
-        """Load the search index from disk"""
+    def _migrate_legacy(self, filepath: str):
+        """Convert an index saved with pickled chunks to the current format, once"""
+        import faiss
+        
+        self.documents = ChunkStore.from_legacy(filepath)
+        self.index = faiss.read_index(f"{filepath}.index")
+        self._ensure_id_map()
+        self.documents.save(filepath)
+        faiss.write_index(self.index, f"{filepath}.index.tmp")
+        os.replace(f"{filepath}.index.tmp", f"{filepath}.index")
+        self.reporter.info(f"Converted the saved index at {filepath} to the current format.")
+    
+    @traced("search_engine.load_index")
+    def load_index(self, filepath: str, mmap: bool = False):
+        """Load the search index from disk
+
+        With ``mmap=True`` the index is mapped read-only, so worker processes
+        serving the same library share one copy through the OS page cache.
+        """
         try:
-            if os.path.exists(f"{filepath}.index") and os.path.exists(f"{filepath}.pkl"):
+            if os.path.exists(f"{filepath}.index") and ChunkStore.legacy_exists(filepath):
+                self._migrate_legacy(filepath)
+            
+            if os.path.exists(f"{filepath}.index") and ChunkStore.exists(filepath):
                 # Load FAISS index
-                self.index = faiss.read_index(f"{filepath}.index")
+                self.index = read_faiss_index(f"{filepath}.index", mmap=mmap)
+                self.index_type = index_type_of(self.index)
+                self.read_only = mmap
+                self.mmapped = mmap
                 
-                # Load documents and metadata
-                with open(f"{filepath}.pkl", "rb") as f:
-                    data = pickle.load(f)
-                    self.documents = data["documents"]
-                    self.document_metadata = data["metadata"]
+                # Memory-map chunks; texts are decoded only when read
+                self.documents = ChunkStore.load(filepath)
                 
                 return True
         except Exception as e:
-            st.error(f"Error loading index: {str(e)}")
+            self.reporter.error(SearchIndexError(f"Error loading index: {str(e)}", e, path=filepath))
         
         return False
     
     def clear_index(self):
         """Clear the search index"""
-        self.index = faiss.IndexFlatL2(self.dimension)
-        self.documents = []
-        self.document_metadata = []
+        self._index = None
+        self.index_type = self.configured_index_type
+        self.documents = ChunkStore()
+        self.read_only = False
+        self.mmapped = False
+    
+    def memory_bytes(self) -> int:
+        """Approximate heap memory held by the index codes and chunk store"""
+        import faiss
+        
+        index_bytes = 0
+        if self._index is not None and not self.mmapped:
+            try:
+                code_size = faiss.downcast_index(self._index.index).code_size
+            except AttributeError:
+                code_size = self._index.d * 4
+            # Codes plus the ID map entry of each vector
+            index_bytes = self._index.ntotal * (code_size + 16)
+        return index_bytes + self.documents.memory_bytes()
+    
+    def spill(self, path: str):
+        """Write a shared engine to disk and keep serving it memory-mapped"""
+        if not self.read_only or self.mmapped or self._index is None:
+            return
+        if self.save_index(path):
+            self.load_index(path, mmap=True)
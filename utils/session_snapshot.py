@@ -0,0 +1,162 @@
+"""
+Per-session snapshots so a student's session survives a server restart
+
+A snapshot is a small JSON file per session ID: the document it had open
+(by content hash, see ``DocumentStore.restore``), its chat history, the
+reader position and a few settings. Nothing heavy is stored in it, so
+writing is cheap and restoring takes milliseconds.
+
+The session ID in the URL only names the snapshot. Restoring it also
+needs the session's secret, of which the snapshot keeps just a hash.
+"""
+import hashlib
+import hmac
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from typing import Dict, Optional
+from config.settings import SESSION_CONFIG
+from utils.disk_cache import evict
+from utils.reporting import logger
+from utils.telemetry import TELEMETRY
+
+# Version 1 snapshots had no secret and are not restored
+SNAPSHOT_VERSION = 2
+
+# Session IDs come from the URL, so only plain hex IDs map to files
+_SESSION_ID = re.compile(r"^[0-9a-f]{32}$")
+
+def is_session_id(value) -> bool:
+    return isinstance(value, str) and bool(_SESSION_ID.match(value))
+
+def new_session_secret() -> str:
+    return secrets.token_urlsafe(32)
+
+def hash_secret(secret: str) -> str:
+    """Stored in the snapshot in place of the secret itself"""
+    return hashlib.sha256(secret.encode("utf-8")).hexdigest()
+
+class SnapshotWriter:
+    """Writes snapshots on a background thread.
+
+    ``schedule`` only records the latest snapshot of a session and returns;
+    the writer thread waits ``debounce_seconds`` so a burst of changes
+    (one rerun after another) becomes a single write.
+    """
+
+    def __init__(self, snapshot_dir: str = None, debounce_seconds: float = None):
+        self.snapshot_dir = snapshot_dir or SESSION_CONFIG["snapshot_dir"]
+        self.debounce_seconds = SESSION_CONFIG["debounce_seconds"] if debounce_seconds is None else debounce_seconds
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+
+        self._condition = threading.Condition()
+        self._pending = {}
+        self._writing = False
+        self._last_evicted = 0.0
+        self._thread = threading.Thread(target=self._run, name="studymate-snapshots", daemon=True)
+        self._thread.start()
+
+    def _path(self, session_id: str) -> str:
+        return os.path.join(self.snapshot_dir, f"{session_id}.json")
+
+    def schedule(self, session_id: str, snapshot: Dict):
+        """Queue the current state of a session for writing"""
+        if not is_session_id(session_id):
+            raise ValueError(f"Invalid session id: {session_id!r}")
+        with self._condition:
+            self._pending[session_id] = snapshot
+            self._condition.notify()
+
+    def load(self, session_id: str, secret: str) -> Optional[Dict]:
+        """The latest snapshot of a session, or None unless ``secret``
+        matches the ``secret_hash`` it was saved with"""
+        if not is_session_id(session_id) or not isinstance(secret, str):
+            return None
+
+        # A snapshot still waiting to be written is newer than the file
+        with self._condition:
+            snapshot = self._pending.get(session_id)
+
+        if snapshot is None:
+            try:
+                with open(self._path(session_id), encoding="utf-8") as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                return None
+            if snapshot.get("version") != SNAPSHOT_VERSION:
+                return None
+
+        if not hmac.compare_digest(str(snapshot.get("secret_hash", "")), hash_secret(secret)):
+            TELEMETRY.increment("session_snapshot.rejected")
+            return None
+        return snapshot
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until every scheduled snapshot is on disk"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._condition.notify()
+            while self._pending or self._writing:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+
+            time.sleep(self.debounce_seconds)
+            with self._condition:
+                batch, self._pending = self._pending, {}
+                self._writing = True
+
+            try:
+                for session_id, snapshot in batch.items():
+                    self._write(session_id, snapshot)
+                if time.monotonic() - self._last_evicted >= SESSION_CONFIG["snapshot_evict_interval"]:
+                    self._last_evicted = time.monotonic()
+                    self.evict()
+            finally:
+                with self._condition:
+                    self._writing = False
+                    self._condition.notify_all()
+
+    def evict(self):
+        """Remove the snapshots of sessions that have not been saved for
+        longest beyond SESSION_CONFIG's size and age limits"""
+        with self._condition:
+            pending = set(self._pending)
+        evict(
+            self.snapshot_dir,
+            max_bytes=SESSION_CONFIG["snapshot_max_mb"] * 2**20,
+            max_age_seconds=SESSION_CONFIG["snapshot_max_age_days"] * 24 * 3600,
+            protected=pending
+        )
+
+    def _write(self, session_id: str, snapshot: Dict):
+        path = self._path(session_id)
+        try:
+            with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                json.dump({"version": SNAPSHOT_VERSION, "saved": time.time(), **snapshot}, f)
+            os.replace(f"{path}.tmp", path)
+            TELEMETRY.increment("session_snapshot.written")
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Could not write snapshot of session %s: %s", session_id, e)
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_snapshot_writer() -> SnapshotWriter:
+    """Process-wide snapshot writer shared by every session"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = SnapshotWriter()
+        return _writer
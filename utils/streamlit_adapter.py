@@ -0,0 +1,42 @@
+"""
+Streamlit adapter: renders engine progress, status and errors in the app
+"""
+import streamlit as st
+from contextlib import contextmanager
+from utils.errors import StudyMateError
+from utils.reporting import Reporter
+
+class StreamlitReporter(Reporter):
+    """Shows engine progress bars, spinners and messages in the current run"""
+
+    def __init__(self):
+        self._progress_bars = {}
+
+    def progress(self, task: str, fraction: float):
+        bar, last = self._progress_bars.get(task, (None, 0.0))
+
+        # Progress going backwards means the task restarted, possibly in a
+        # newer script run than the one holding the old bar
+        if bar is None or fraction < last:
+            bar = st.progress(0.0)
+        bar.progress(min(fraction, 1.0))
+        self._progress_bars[task] = (bar, fraction)
+
+        # A finished task clears its bar so the next run starts a fresh one
+        if fraction >= 1.0:
+            self._progress_bars.pop(task)
+            bar.empty()
+
+    @contextmanager
+    def status(self, message: str):
+        with st.spinner(message):
+            yield
+
+    def info(self, message: str):
+        st.info(message)
+
+    def warning(self, message: str):
+        st.warning(message)
+
+    def error(self, error: StudyMateError):
+        st.error(error.message)
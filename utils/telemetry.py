@@ -0,0 +1,177 @@
+"""
+Lightweight tracing: span timers, counters and latency histograms
+
+Engine methods are wrapped with ``@traced``; the collected metrics can be
+exported as Prometheus text or JSON and are shown in the admin debug panel.
+"""
+import functools
+import io
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict
+from config.settings import TELEMETRY_CONFIG
+
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS, reservoir: int = 1000):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        # Recent samples for percentiles in the debug panel
+        self.recent = deque(maxlen=reservoir)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def percentile(self, pct: float) -> float:
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+    def summary(self) -> Dict:
+        return {
+            "count": self.count,
+            "mean_ms": 1000 * self.sum / self.count if self.count else 0.0,
+            "p50_ms": 1000 * self.percentile(50),
+            "p95_ms": 1000 * self.percentile(95),
+            "max_ms": 1000 * self.max
+        }
+
+class Telemetry:
+    """Process-wide registry of spans and counters"""
+
+    def __init__(self, enabled: bool = True, json_log_path: str = None):
+        self.enabled = enabled
+        self.json_log_path = json_log_path
+        self._lock = threading.Lock()
+        self._spans = {}
+        self._counters = {}
+
+    @contextmanager
+    def span(self, name: str):
+        """Time a block and record it under ``name``"""
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._spans.setdefault(name, Histogram()).observe(elapsed)
+                if error:
+                    self._counters[f"{name}.errors"] = self._counters.get(f"{name}.errors", 0) + 1
+            self._log({"span": name, "seconds": elapsed, "error": error})
+
+    def increment(self, name: str, value: float = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def _log(self, record: Dict):
+        if not self.json_log_path:
+            return
+        record["timestamp"] = time.time()
+        with self._lock, open(self.json_log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "spans": {name: h.summary() for name, h in sorted(self._spans.items())},
+                "counters": dict(sorted(self._counters.items()))
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        out = io.StringIO()
+        with self._lock:
+            out.write("# HELP studymate_span_seconds Duration of traced operations\n")
+            out.write("# TYPE studymate_span_seconds histogram\n")
+            for name, h in sorted(self._spans.items()):
+                cumulative = 0
+                for bound, count in zip(h.buckets, h.counts):
+                    cumulative += count
+                    out.write(f'studymate_span_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}\n')
+                out.write(f'studymate_span_seconds_bucket{{span="{name}",le="+Inf"}} {h.count}\n')
+                out.write(f'studymate_span_seconds_sum{{span="{name}"}} {h.sum}\n')
+                out.write(f'studymate_span_seconds_count{{span="{name}"}} {h.count}\n')
+
+            out.write("# HELP studymate_events_total Counted engine events\n")
+            out.write("# TYPE studymate_events_total counter\n")
+            for name, value in sorted(self._counters.items()):
+                out.write(f'studymate_events_total{{event="{name}"}} {value}\n')
+        return out.getvalue()
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+
+TELEMETRY = Telemetry(TELEMETRY_CONFIG["enabled"], TELEMETRY_CONFIG["json_log_path"])
+
+def traced(name: str):
+    """Decorator recording each call of a function as a span"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with TELEMETRY.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class RequestProfiler:
+    """Profiles a single script run, sampling with pyinstrument if installed"""
+
+    def __init__(self):
+        try:
+            from pyinstrument import Profiler
+            self._profiler = Profiler(interval=TELEMETRY_CONFIG["profiler_interval"], async_mode="disabled")
+            self.kind = "pyinstrument"
+        except ImportError:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self.kind = "cProfile"
+
+    def start(self):
+        if self.kind == "pyinstrument":
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self) -> str:
+        """Stop profiling and return a text report"""
+        if self.kind == "pyinstrument":
+            self._profiler.stop()
+            return self._profiler.output_text(unicode=True, show_all=False)
+
+        import pstats
+        self._profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(40)
+        return out.getvalue()
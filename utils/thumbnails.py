@@ -0,0 +1,206 @@
+"""
+Page thumbnails for the reader's page overview, as sprite sheets
+
+Each document gets a few sprite sheets: a grid of very low resolution
+page renderings, ``pages_per_sheet`` pages per image. Sheets are rendered
+by a process pool in the background and cached on disk by content hash,
+so the overview costs one small image per sheet and is shared by every
+session showing the same document.
+"""
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Dict, List, Optional
+from config.settings import THUMBNAIL_CONFIG
+from utils.disk_cache import evict, touch
+from utils.loaded_document import LoadedDocument, encode_pixmap
+from utils.reporting import logger
+from utils.telemetry import TELEMETRY
+
+def render_sheet(pdf_path: str, output_path: str, first: int, last: int, layout: Dict) -> str:
+    """Worker: render pages ``first`` to ``last`` (exclusive) into one sheet"""
+    import fitz  # PyMuPDF
+
+    width, height, columns = layout["width"], layout["height"], layout["columns"]
+    rows = math.ceil((last - first) / columns)
+    sheet = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, columns * width, rows * height), False)
+    sheet.clear_with(255)
+
+    with fitz.open(pdf_path) as doc:
+        for cell, page_num in enumerate(range(first, last)):
+            page = doc[page_num]
+            zoom = min(width / page.rect.width, height / page.rect.height)
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csRGB, alpha=False)
+            pix.set_origin((cell % columns) * width, (cell // columns) * height)
+            sheet.copy(pix, pix.irect)
+
+    with open(f"{output_path}.tmp", "wb") as f:
+        f.write(encode_pixmap(sheet, layout["image_format"], layout["quality"]))
+    os.replace(f"{output_path}.tmp", output_path)
+    return output_path
+
+class ThumbnailCache:
+    """Builds and serves the sprite sheets of documents by content hash.
+
+    ``request`` starts a build and returns at once; ``layout`` is None until
+    every sheet of a document is on disk.
+    """
+
+    def __init__(self, cache_dir: str = None, max_workers: int = None):
+        self.cache_dir = cache_dir or THUMBNAIL_CONFIG["cache_dir"]
+        self.max_workers = max_workers or THUMBNAIL_CONFIG["max_workers"]
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._executor = None
+        self._building = set()
+        self._failed = set()
+        self.evict()
+
+    def _directory(self, content_hash: str) -> str:
+        return os.path.join(self.cache_dir, content_hash)
+
+    def status(self, content_hash: str) -> str:
+        """One of ready, building, failed or missing"""
+        with self._lock:
+            if content_hash in self._building:
+                return "building"
+            if content_hash in self._failed:
+                return "failed"
+        if os.path.exists(os.path.join(self._directory(content_hash), "layout.json")):
+            return "ready"
+        return "missing"
+
+    def request(self, document: LoadedDocument) -> str:
+        """Start building a document's sheets unless cached; returns its status"""
+        status = self.status(document.hash)
+        if status != "missing":
+            return status
+
+        with self._lock:
+            if document.hash in self._building:
+                return "building"
+            self._building.add(document.hash)
+            if self._executor is None:
+                # Spawned, not forked: the server process runs many threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+
+        threading.Thread(
+            target=self._build, args=(document,), name="studymate-thumbnails", daemon=True
+        ).start()
+        return "building"
+
+    def _build(self, document: LoadedDocument):
+        directory = self._directory(document.hash)
+        staging = f"{directory}.tmp"
+        try:
+            os.makedirs(staging, exist_ok=True)
+            pdf_path = os.path.join(staging, "source.pdf")
+            with open(pdf_path, "wb") as f:
+                f.write(document.data)
+
+            # Cells share the first page's aspect ratio; other pages fit inside
+            with document.lock:
+                rect = document.doc[0].rect
+            width = THUMBNAIL_CONFIG["width"]
+            layout = {
+                "page_count": document.page_count,
+                "width": width,
+                "height": round(width * rect.height / rect.width),
+                "columns": THUMBNAIL_CONFIG["columns"],
+                "pages_per_sheet": THUMBNAIL_CONFIG["pages_per_sheet"],
+                "image_format": THUMBNAIL_CONFIG["image_format"],
+                "quality": THUMBNAIL_CONFIG["quality"],
+                "sheets": []
+            }
+
+            futures = []
+            for first in range(0, document.page_count, layout["pages_per_sheet"]):
+                last = min(first + layout["pages_per_sheet"], document.page_count)
+                name = f"sheet-{len(futures)}.{layout['image_format']}"
+                layout["sheets"].append(name)
+                futures.append(self._executor.submit(
+                    render_sheet, pdf_path, os.path.join(staging, name), first, last, layout
+                ))
+            wait(futures)
+            for future in futures:
+                future.result()
+
+            os.remove(pdf_path)
+            with open(os.path.join(staging, "layout.json"), "w", encoding="utf-8") as f:
+                json.dump(layout, f)
+            shutil.rmtree(directory, ignore_errors=True)
+            os.replace(staging, directory)
+            TELEMETRY.increment("thumbnails.documents_built")
+            self.evict()
+        except Exception as e:
+            logger.warning("Could not build thumbnails of %s: %s", document.name, e)
+            shutil.rmtree(staging, ignore_errors=True)
+            with self._lock:
+                self._failed.add(document.hash)
+        finally:
+            with self._lock:
+                self._building.discard(document.hash)
+
+    def layout(self, content_hash: str) -> Optional[Dict]:
+        """Sheet layout of a document, or None until its sheets are ready"""
+        try:
+            with open(os.path.join(self._directory(content_hash), "layout.json"), encoding="utf-8") as f:
+                layout = json.load(f)
+        except OSError:
+            return None
+        touch(self._directory(content_hash))
+        return layout
+
+    def evict(self):
+        """Remove the least recently viewed documents' sheets beyond
+        THUMBNAIL_CONFIG's size and age limits"""
+        with self._lock:
+            building = set(self._building)
+        evict(
+            self.cache_dir,
+            max_bytes=THUMBNAIL_CONFIG["cache_max_mb"] * 2**20,
+            max_age_seconds=THUMBNAIL_CONFIG["cache_max_age_days"] * 24 * 3600,
+            protected=building
+        )
+
+    def sheet(self, content_hash: str, sheet_index: int) -> bytes:
+        """Encoded image of one sprite sheet"""
+        layout = self.layout(content_hash)
+        with open(os.path.join(self._directory(content_hash), layout["sheets"][sheet_index]), "rb") as f:
+            return f.read()
+
+    def thumbnails(self, content_hash: str, sheet_index: int) -> List[bytes]:
+        """Every page of one sheet cut out as its own small image"""
+        import fitz  # PyMuPDF
+
+        layout = self.layout(content_hash)
+        sheet = fitz.Pixmap(self.sheet(content_hash, sheet_index))
+        width, height, columns = layout["width"], layout["height"], layout["columns"]
+        first = sheet_index * layout["pages_per_sheet"]
+        count = min(layout["pages_per_sheet"], layout["page_count"] - first)
+
+        crops = []
+        for cell in range(count):
+            x, y = (cell % columns) * width, (cell // columns) * height
+            crop = fitz.Pixmap(sheet.colorspace, fitz.IRect(x, y, x + width, y + height), False)
+            crop.copy(sheet, crop.irect)
+            crops.append(encode_pixmap(crop, layout["image_format"], layout["quality"]))
+        return crops
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    """Process-wide thumbnail cache shared by every session"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ThumbnailCache()
+        return _cache
@@ -0,0 +1,161 @@
+"""
+Speech synthesis backends for the TTS engine
+
+``gtts`` calls Google's online service and returns MP3. ``espeak`` runs
+espeak-ng (or espeak) locally and ``pyttsx3`` drives the platform's speech
+engine; both work offline and return WAV. Which backend serves a
+language is configured in TTS_CONFIG.
+"""
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import wave
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+from config.settings import TTS_CONFIG
+
+def audio_mime_type(audio: bytes) -> str:
+    """MIME type of encoded audio, from its leading bytes"""
+    if audio[:4] == b"RIFF" and audio[8:12] == b"WAVE":
+        return "audio/wav"
+    if audio[:4] == b"OggS":
+        return "audio/ogg"
+    if audio[:3] == b"ID3" or (len(audio) > 1 and audio[0] == 0xFF and audio[1] & 0xE0 == 0xE0):
+        return "audio/mpeg"
+    return "application/octet-stream"
+
+AUDIO_EXTENSIONS = {"audio/wav": "wav", "audio/ogg": "ogg", "audio/mpeg": "mp3"}
+
+def wav_duration(audio: bytes) -> Optional[float]:
+    """Duration in seconds of a WAV clip, or None if it is not one"""
+    try:
+        with wave.open(io.BytesIO(audio)) as clip:
+            return clip.getnframes() / clip.getframerate()
+    except (wave.Error, EOFError):
+        return None
+
+class TTSBackend(ABC):
+    """One way of turning text into encoded audio"""
+
+    name = ""
+    # Needs no network access
+    offline = False
+
+    @abstractmethod
+    def available(self) -> bool:
+        """Whether the backend's library or program is installed"""
+
+    @abstractmethod
+    def synthesize(self, text: str, language: str, slow: bool = False) -> bytes:
+        """Encoded audio of ``text`` spoken in ``language``"""
+
+class GTTSBackend(TTSBackend):
+    name = "gtts"
+
+    def available(self) -> bool:
+        try:
+            import gtts  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def synthesize(self, text: str, language: str, slow: bool = False) -> bytes:
+        from gtts import gTTS
+
+        buffer = io.BytesIO()
+        gTTS(text=text, lang=language, slow=slow).write_to_fp(buffer)
+        return buffer.getvalue()
+
+class EspeakBackend(TTSBackend):
+    """espeak-ng through its command line; fast and fully local"""
+
+    name = "espeak"
+    offline = True
+
+    def __init__(self):
+        self.command = shutil.which("espeak-ng") or shutil.which("espeak")
+
+    def available(self) -> bool:
+        return self.command is not None
+
+    def synthesize(self, text: str, language: str, slow: bool = False) -> bytes:
+        wpm = TTS_CONFIG["slow_wpm"] if slow else TTS_CONFIG["wpm"]
+        result = subprocess.run(
+            [self.command, "--stdout", "--stdin", "-v", language, "-s", str(wpm)],
+            input=text.encode("utf-8"), capture_output=True, check=True,
+            timeout=TTS_CONFIG["timeout_seconds"]
+        )
+        return result.stdout
+
+class Pyttsx3Backend(TTSBackend):
+    """The platform speech engine (SAPI5, NSSpeechSynthesizer or espeak)"""
+
+    name = "pyttsx3"
+    offline = True
+
+    def __init__(self):
+        self._engine = None
+        # pyttsx3 engines are not thread-safe and run one utterance at a time
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        try:
+            import pyttsx3  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def _voice_for(self, language: str) -> Optional[str]:
+        for voice in self._engine.getProperty("voices"):
+            codes = [code.decode() if isinstance(code, bytes) else str(code) for code in voice.languages]
+            if any(code.lstrip("\x05").startswith(language) for code in codes) or voice.id.endswith(language):
+                return voice.id
+        return None
+
+    def synthesize(self, text: str, language: str, slow: bool = False) -> bytes:
+        import pyttsx3
+
+        with self._lock:
+            if self._engine is None:
+                self._engine = pyttsx3.init()
+            voice = self._voice_for(language)
+            if voice:
+                self._engine.setProperty("voice", voice)
+            self._engine.setProperty("rate", TTS_CONFIG["slow_wpm"] if slow else TTS_CONFIG["wpm"])
+
+            fd, path = tempfile.mkstemp(suffix=".wav")
+            os.close(fd)
+            try:
+                self._engine.save_to_file(text, path)
+                self._engine.runAndWait()
+                with open(path, "rb") as f:
+                    return f.read()
+            finally:
+                os.unlink(path)
+
+BACKENDS = {backend.name: backend for backend in (GTTSBackend, EspeakBackend, Pyttsx3Backend)}
+
+_instances: Dict[str, TTSBackend] = {}
+_instances_lock = threading.Lock()
+
+def get_backend(name: str) -> TTSBackend:
+    """Process-wide instance of a backend by name"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown TTS backend: {name}")
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = BACKENDS[name]()
+        return _instances[name]
+
+def backend_for(language: str) -> TTSBackend:
+    """The configured backend for a language, or the first available one
+    in TTS_CONFIG["fallback_order"] if it is not installed"""
+    preferred = TTS_CONFIG["language_backends"].get(language, TTS_CONFIG["default_backend"])
+    for name in [preferred] + [n for n in TTS_CONFIG["fallback_order"] if n != preferred]:
+        backend = get_backend(name)
+        if backend.available():
+            return backend
+    raise RuntimeError("No text-to-speech backend is available")
@@ -1,18 +1,25 @@
 """
 Text-to-Speech engine for StudyMate
 """
-import streamlit as st
-from gtts import gTTS
 import io
 import base64
-from pydub import AudioSegment
+import re
 import tempfile
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict
 import time
+from config.settings import AUDIOBOOK_CONFIG
+from utils.errors import SpeechError
+from utils.tts_backends import AUDIO_EXTENSIONS, TTSBackend, audio_mime_type, backend_for
+from utils.reporting import Reporter
+from utils.telemetry import TELEMETRY, traced
 
 class TTSEngine:
-    def __init__(self):
+    def __init__(self, reporter: Reporter = None, backend: TTSBackend = None):
+        self.reporter = reporter or Reporter()
+        # Fixed backend; by default it is chosen per language from TTS_CONFIG
+        self.backend = backend
         self.supported_languages = {
             'en': 'English',
             'es': 'Spanish', 
@@ -27,62 +34,124 @@ class TTSEngine:
         }
         self.current_audio = None
         
+    @traced("tts.text_to_speech")
     def text_to_speech(self, text: str, language: str = 'en', slow: bool = False) -> bytes:
         """Convert text to speech and return audio bytes"""
         try:
             if not text.strip():
                 return None
-                
-            # Create TTS object
-            tts = gTTS(text=text, lang=language, slow=slow)
             
-            # Save to temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as tmp_file:
-                tts.save(tmp_file.name)
-                
-                # Read the audio file
-                with open(tmp_file.name, 'rb') as audio_file:
-                    audio_bytes = audio_file.read()
-                
-                # Clean up
-                os.unlink(tmp_file.name)
-                
-                return audio_bytes
+            return self._synthesize(text, language, slow)
                 
         except Exception as e:
-            st.error(f"Error generating speech: {str(e)}")
+            self.reporter.error(SpeechError(f"Error generating speech: {str(e)}", e, language=language))
             return None
     
-    def create_audio_book(self, chapters: List[Dict], language: str = 'en') -> bytes:
-        """Create an audio book from multiple text chapters"""
+    def _synthesize(self, text: str, language: str, slow: bool = False) -> bytes:
+        """Synthesise without reporting, so it can run on worker threads"""
+        backend = self.backend or backend_for(language)
+        TELEMETRY.increment("tts.characters", len(text))
+        TELEMETRY.increment(f"tts.requests.{backend.name}")
+        return backend.synthesize(text, language, slow)
+    
+    @staticmethod
+    def split_for_synthesis(text: str, max_chars: int) -> List[str]:
+        """Split text at sentence ends into pieces of at most ``max_chars``"""
+        pieces, current = [], ""
+        for sentence in re.split(r'(?<=[.!?])\s+', text.strip()):
+            # A single overlong sentence is cut at whitespace
+            if len(sentence) > max_chars and current:
+                pieces.append(current)
+                current = ""
+            while len(sentence) > max_chars:
+                cut = sentence.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                pieces.append(sentence[:cut])
+                sentence = sentence[cut:].strip()
+            if current and len(current) + len(sentence) + 1 > max_chars:
+                pieces.append(current)
+                current = ""
+            current = f"{current} {sentence}" if current else sentence
+        if current:
+            pieces.append(current)
+        return pieces
+    
+    def _synthesize_with_retry(self, text: str, language: str) -> bytes:
+        """Synthesise, retrying failures with exponential backoff"""
+        for attempt in range(AUDIOBOOK_CONFIG["retries"] + 1):
+            try:
+                return self._synthesize(text, language)
+            except Exception:
+                if attempt == AUDIOBOOK_CONFIG["retries"]:
+                    raise
+                TELEMETRY.increment("tts.retries")
+                time.sleep(AUDIOBOOK_CONFIG["retry_backoff_seconds"] * 2 ** attempt)
+    
+    def audio_book_workers(self, language: str) -> int:
+        """Concurrent requests for the backend serving ``language``"""
+        backend = self.backend or backend_for(language)
+        return AUDIOBOOK_CONFIG["max_workers"].get(backend.name, AUDIOBOOK_CONFIG["default_max_workers"])
+    
+    @traced("tts.create_audio_book")
+    def create_audio_book(self, chapters: List[Dict], language: str = 'en', max_workers: int = None) -> bytes:
+        """Create an audio book from multiple text chapters
+
+        Every chapter title and every piece of chapter text is synthesised
+        as its own request, a few at a time per backend; the audio is joined
+        in order. A chapter whose parts still fail after retrying is left
+        out and reported rather than failing the whole book.
+        """
+        from pydub import AudioSegment
+        
         try:
-            combined_audio = AudioSegment.empty()
+            # (chapter, is_title, text) in playback order
+            pieces = []
+            for i, chapter in enumerate(chapters):
+                pieces.append((i, True, f"Chapter {i+1}. {chapter.get('title', '')}"))
+                for text in self.split_for_synthesis(chapter['content'], AUDIOBOOK_CONFIG["max_chars_per_request"]):
+                    pieces.append((i, False, text))
             
-            progress_bar = st.progress(0)
-            total_chapters = len(chapters)
+            self.reporter.info(f"🎙️ Synthesising {len(chapters)} chapters in {len(pieces)} parts")
+            audio = [None] * len(pieces)
+            failed = set()
+            with ThreadPoolExecutor(max_workers=max_workers or self.audio_book_workers(language)) as executor:
+                futures = {
+                    executor.submit(self._synthesize_with_retry, text, language): n
+                    for n, (_, _, text) in enumerate(pieces)
+                }
+                # Progress and errors are reported from this thread only
+                for done, future in enumerate(as_completed(futures), start=1):
+                    n = futures[future]
+                    try:
+                        audio[n] = future.result()
+                    except Exception as e:
+                        chapter = pieces[n][0]
+                        if chapter not in failed:
+                            failed.add(chapter)
+                            self.reporter.warning(
+                                f"Skipping chapter {chapter + 1} ({chapters[chapter].get('title', '')}): {str(e)}"
+                            )
+                            # The rest of the chapter would be thrown away
+                            for other, m in futures.items():
+                                if pieces[m][0] == chapter:
+                                    other.cancel()
+                    self.reporter.progress("audio_book", done / len(pieces))
             
-            for i, chapter in enumerate(chapters):
-                st.info(f"🎙️ Processing Chapter {i+1}: {chapter.get('title', f'Chapter {i+1}')}")
-                
-                # Add chapter title
-                title_text = f"Chapter {i+1}. {chapter.get('title', '')}"
-                title_audio_bytes = self.text_to_speech(title_text, language)
+            if len(failed) == len(chapters):
+                raise SpeechError("No chapter could be synthesised")
+            kept = [n for n, piece in enumerate(pieces) if piece[0] not in failed]
+            pieces, audio = [pieces[n] for n in kept], [audio[n] for n in kept]
+            
+            combined_audio = AudioSegment.empty()
+            for n, (chapter, is_title, _) in enumerate(pieces):
+                audio_format = AUDIO_EXTENSIONS.get(audio_mime_type(audio[n]), "mp3")
+                combined_audio += AudioSegment.from_file(io.BytesIO(audio[n]), format=audio_format)
                 
-                if title_audio_bytes:
-                    title_audio = AudioSegment.from_mp3(io.BytesIO(title_audio_bytes))
-                    combined_audio += title_audio
+                last_of_chapter = n + 1 == len(pieces) or pieces[n + 1][0] != chapter
+                if is_title:
                     combined_audio += AudioSegment.silent(duration=1000)  # 1 second pause
-                
-                # Add chapter content
-                content_audio_bytes = self.text_to_speech(chapter['content'], language)
-                if content_audio_bytes:
-                    content_audio = AudioSegment.from_mp3(io.BytesIO(content_audio_bytes))
-                    combined_audio += content_audio
+                elif last_of_chapter:
                     combined_audio += AudioSegment.silent(duration=2000)  # 2 second pause
-                
-                progress_bar.progress((i + 1) / total_chapters)
-            
-            progress_bar.empty()
             
             # Export combined audio
             with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as tmp_file:
@@ -95,7 +164,7 @@ class TTSEngine:
                 return audio_bytes
                 
         except Exception as e:
-            st.error(f"Error creating audio book: {str(e)}")
+            self.reporter.error(SpeechError(f"Error creating audio book: {str(e)}", e))
             return None
     
     def get_audio_player_html(self, audio_bytes: bytes, autoplay: bool = False) -> str:
@@ -105,10 +174,11 @@ class TTSEngine:
             
         audio_base64 = base64.b64encode(audio_bytes).decode()
         autoplay_attr = "autoplay" if autoplay else ""
+        mime_type = audio_mime_type(audio_bytes)
         
         return f"""
         <audio controls {autoplay_attr} style="width: 100%; margin: 10px 0;">
-            <source src="data:audio/mp3;base64,{audio_base64}" type="audio/mp3">
+            <source src="data:{mime_type};base64,{audio_base64}" type="{mime_type}">
             Your browser does not support the audio element.
         </audio>
         """
@@ -120,8 +190,12 @@ class TTSEngine:
             
         audio_base64 = base64.b64encode(audio_bytes).decode()
         
+        # Offline backends produce WAV; name the file after what it contains
+        mime_type = audio_mime_type(audio_bytes)
+        filename = f"{os.path.splitext(filename)[0]}.{AUDIO_EXTENSIONS.get(mime_type, 'mp3')}"
+        
         return f"""
-        <a href="data:audio/mp3;base64,{audio_base64}" 
+        <a href="data:{mime_type};base64,{audio_base64}" 
            download="{filename}"
            style="display: inline-block; padding: 10px 20px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
                   color: white; text-decoration: none; border-radius: 25px; font-weight: 600; margin: 10px 0;">
@@ -0,0 +1,42 @@
+"""
+Background warm-up of heavy models after the first page has rendered
+"""
+import threading
+from config.settings import MODEL_PARAMS
+
+_started = False
+_lock = threading.Lock()
+
+def start_warmup():
+    """Load the embedder, cross-encoder and Watsonx model on a daemon thread,
+    once per process"""
+    global _started
+
+    with _lock:
+        if _started or not MODEL_PARAMS.get("warmup", True):
+            return
+        _started = True
+
+    threading.Thread(target=_warm, name="studymate-warmup", daemon=True).start()
+
+def _warm():
+    # Failures are not reported here; the first real use retries and shows them
+    try:
+        from utils.search_engine import get_embedder
+        get_embedder()
+    except Exception:
+        pass
+
+    if MODEL_PARAMS.get("rerank", False):
+        try:
+            from utils.reranker import get_cross_encoder
+            get_cross_encoder()
+        except Exception:
+            pass
+
+    try:
+        from utils.watsonx_client import WatsonxClient, get_shared_model
+        client = WatsonxClient()
+        get_shared_model(client.credentials, client.params)
+    except Exception:
+        pass
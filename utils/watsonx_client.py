@@ -1,45 +1,79 @@
 """
 Watsonx AI client for handling model interactions
 """
-from ibm_watsonx_ai.foundation_models import Model
-from ibm_watsonx_ai.foundation_models.utils.enums import DecodingMethods
 from config.settings import WATSONX_CONFIG, MODEL_PARAMS
-import streamlit as st
+import threading
+from utils.errors import ModelError
+from utils.reporting import Reporter
+from utils.telemetry import TELEMETRY, traced
+
+_shared_model = None
+_shared_model_lock = threading.Lock()
+
+def get_shared_model(credentials: dict, params: dict):
+    """Process-wide Watsonx model, created once and shared by all sessions"""
+    global _shared_model
+    
+    with _shared_model_lock:
+        if _shared_model is None:
+            # ibm_watsonx_ai is slow to import, so load it on first use
+            from ibm_watsonx_ai.foundation_models import Model
+            
+            _shared_model = Model(
+                model_id=WATSONX_CONFIG["model_id"],
+                credentials=credentials,
+                params=params,
+                project_id=WATSONX_CONFIG["project_id"]
+            )
+        return _shared_model
 
 class WatsonxClient:
-    def __init__(self):
+    def __init__(self, reporter: Reporter = None):
+        self.reporter = reporter or Reporter()
         self.credentials = {
             "url": WATSONX_CONFIG["url"],
             "apikey": WATSONX_CONFIG["api_key"]
         }
         
         self.params = {
-            "decoding_method": DecodingMethods.GREEDY,
+            "decoding_method": "greedy",
             "max_new_tokens": MODEL_PARAMS["max_new_tokens"],
             "temperature": MODEL_PARAMS["temperature"],
         }
         
+        # Created on first request (or by the background warm-up)
         self.model = None
-        self._initialize_model()
     
-    def _initialize_model(self):
-        """Initialize the Watsonx model"""
+    def _load_model(self):
+        """Initialize the Watsonx model; raises ModelError on failure"""
         try:
-            self.model = Model(
-                model_id=WATSONX_CONFIG["model_id"],
-                credentials=self.credentials,
-                params=self.params,
-                project_id=WATSONX_CONFIG["project_id"]
-            )
+            self.model = get_shared_model(self.credentials, self.params)
         except Exception as e:
-            st.error(f"Failed to initialize Watsonx model: {str(e)}")
+            raise ModelError(f"Failed to initialize Watsonx model: {str(e)}", e)
     
-    def generate_answer(self, question, context, chat_history=""):
-        """Generate answer using Watsonx model"""
-        if not self.model:
-            return "Model not initialized. Please check your configuration."
-        
-        prompt = f"""
+    def _initialize_model(self):
+        """Initialize the Watsonx model, reporting a failure"""
+        try:
+            self._load_model()
+        except ModelError as e:
+            self.reporter.error(e)
+    
+    @staticmethod
+    def format_context(search_results) -> str:
+        """Join retrieved chunks into the prompt's document context"""
+        return "\n\n".join([result[0] for result in search_results])
+    
+    @staticmethod
+    def format_chat_history(chat_history, last_n: int = 3) -> str:
+        """Render the most recent interactions for the prompt"""
+        return "\n".join([
+            f"Q: {item['question']}\nA: {item['answer']}\n"
+            for item in chat_history[-last_n:]
+        ])
+    
+    def build_prompt(self, question, context, chat_history=""):
+        """Build the question-answering prompt"""
+        return f"""
 You are StudyMate, an intelligent academic assistant designed to help students learn effectively.
 
 Chat History:
@@ -60,8 +94,21 @@ Instructions:
 
 Answer:
 """
+    
+    @traced("watsonx.generate_answer")
+    def generate_answer_or_raise(self, question, context, chat_history=""):
+        """Generate answer using Watsonx model; raises ModelError on failure
+
+        Nothing is reported, so it can run on a worker thread; the error
+        message is for the caller to show.
+        """
+        if not self.model:
+            self._load_model()
+        
+        prompt = self.build_prompt(question, context, chat_history)
         
         try:
+            TELEMETRY.increment("watsonx.prompt_characters", len(prompt))
             response = self.model.generate_text(prompt=prompt)
             
             if isinstance(response, list):
@@ -71,10 +118,28 @@ Answer:
             else:
                 return str(response)
         except Exception as e:
-            return f"Error generating response: {str(e)}"
+            raise ModelError(f"Error generating response: {str(e)}", e)
     
+    def generate_answer(self, question, context, chat_history=""):
+        """Generate answer using Watsonx model"""
+        if not self.model:
+            self._initialize_model()
+        if not self.model:
+            return "Model not initialized. Please check your configuration."
+        
+        try:
+            return self.generate_answer_or_raise(question, context, chat_history)
+        except ModelError as e:
+            return str(e)
+    
+    @traced("watsonx.generate_summary")
     def generate_summary(self, text):
         """Generate a summary of the document"""
+        if not self.model:
+            self._initialize_model()
+        if not self.model:
+            return "Model not initialized. Please check your configuration."
+        
         prompt = f"""
 Please provide a comprehensive summary of the following academic document.
 Include: